@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for the automate-meroshare-ipo application.
+"""
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Compare goodput of fixed worker counts with adaptive admission under overload.
+
+A stand-in server keeps up with a number of calls at once (its capacity)
+and slows every call down once more are in flight, until callers time out
+or it answers 503. Its capacity changes between phases, as Meroshare's
+does around an opening. Workers loop over login, listing and apply calls
+for the whole run. Each fixed worker count calls without limits, the
+adaptive run starts --workers workers behind an AIMD admission limit.
+Goodput counts calls answered in time.
+
+Usage:
+    python benchmarks/admission.py --phases 16 4 12 --phase-seconds 3 --fixed 4 8 12 16 32
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from meroshare.admission import AdmissionController, AIMDLimit  # noqa: E402
+from meroshare.errors import ServerBusy  # noqa: E402
+from meroshare.resilience import RetryPolicy  # noqa: E402
+
+# Seconds a call of each step takes on an idle server
+SERVICE = {'login': 0.04, 'listing': 0.01, 'apply': 0.02}
+
+
+class OverloadedServer:
+    """Fine up to its capacity, then slower for every call the more are in flight.
+
+    Args:
+        phases (list): Capacity of each phase
+        phase_seconds (float): Length of a phase
+        timeout (float): Callers give up on calls slower than this
+        penalty (float): Extra slowdown per call over capacity, from thrashing
+    """
+
+    def __init__(self, phases, phase_seconds, timeout=0.25, penalty=1.0):
+        self.phases = phases
+        self.phase_seconds = phase_seconds
+        self.timeout = timeout
+        self.penalty = penalty
+        self.in_flight = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def capacity(self):
+        phase = int((time.monotonic() - self.started) / self.phase_seconds)
+        return self.phases[min(phase, len(self.phases) - 1)]
+
+    def call(self, step):
+        with self._lock:
+            self.in_flight += 1
+            in_flight = self.in_flight
+        try:
+            capacity = self.capacity()
+            if in_flight > 4 * capacity:
+                time.sleep(SERVICE[step])
+                raise ServerBusy(503)
+            load = max(1.0, in_flight / capacity)
+            delay = SERVICE[step] * load * (1 + self.penalty * (load - 1))
+            if delay > self.timeout:
+                time.sleep(self.timeout)
+                raise requests.Timeout(f"{step} timed out")
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def run(workers, policy, args):
+    """Let ``workers`` threads call the server until every phase is over.
+
+    Returns:
+        Calls answered in time per second
+    """
+    server = OverloadedServer(args.phases, args.phase_seconds)
+    end = server.started + len(args.phases) * args.phase_seconds
+    answered = [0] * workers
+
+    def work(index):
+        while time.monotonic() < end:
+            for step in SERVICE:
+                try:
+                    policy.run(step, server.call, step, host='meroshare')
+                    answered[index] += 1
+                except Exception:
+                    break
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(answered) / (time.monotonic() - server.started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--phases', type=int, nargs='+', default=[16, 4, 12],
+                        help='Capacity of the server in each phase')
+    parser.add_argument('--phase-seconds', type=float, default=3.0)
+    parser.add_argument('--fixed', type=int, nargs='+', default=[4, 8, 12, 16, 32],
+                        help='Fixed worker counts to compare with')
+    parser.add_argument('--workers', type=int, default=32,
+                        help='Workers of the adaptive run, the most calls it lets in flight')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    report = {}
+    for workers in args.fixed:
+        report[f"fixed_{workers}"] = round(run(workers, RetryPolicy(attempts=1, deadlines={}), args), 1)
+    admission = AdmissionController(limit=AIMDLimit(initial=4, maximum=args.workers))
+    policy = RetryPolicy(attempts=1, deadlines={}, admission=admission)
+    report['adaptive'] = round(run(args.workers, policy, args), 1)
+    report['best_fixed'] = max(value for key, value in report.items() if key.startswith('fixed'))
+    print(json.dumps({'goodput_per_s': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare wall time and peak RSS of the browser and HTTP backends.
+
+Each backend runs the check flow (login -> navigate -> getAvailableIPOS ->
+close) in its own subprocess so peak RSS is not shared between them.
+
+The HTTP backend runs against the local stand-in server unless --base-url is
+given. The browser backend needs the usual MEROSHARE_* environment variables
+and a reachable Meroshare site.
+
+Usage:
+    python benchmarks/backends.py --backend http --runs 5
+    python benchmarks/backends.py --backend http --backend browser
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+
+def _credentials():
+    return {
+        'username': os.getenv('MEROSHARE_USERNAME'),
+        'password': os.getenv('MEROSHARE_PASSWORD'),
+        'dp_id': os.getenv('MEROSHARE_DP_ID'),
+        'crn': os.getenv('MEROSHARE_CRN'),
+        'transaction_pin': os.getenv('MEROSHARE_TRANSACTIONPIN'),
+    }
+
+
+def run_once(backend, base_url=None):
+    """Run the check flow once in this process and return measurements."""
+    fake = None
+    if backend == 'http':
+        from meroshare.api import MeroshareAPIClient
+        if base_url:
+            client = MeroshareAPIClient(base_url=base_url, **_credentials())
+        else:
+            from tests import fake_meroshare
+            fake = fake_meroshare.FakeMeroshare().start()
+            client = MeroshareAPIClient(
+                username=fake_meroshare.USERNAME,
+                password=fake_meroshare.PASSWORD,
+                dp_id=fake_meroshare.DP_ID,
+                crn=fake_meroshare.CRN,
+                transaction_pin=fake_meroshare.TRANSACTION_PIN,
+                base_url=fake.url,
+            )
+    else:
+        from meroshare.client import MeroshareClient
+        client = MeroshareClient(headless=True, **_credentials())
+
+    start = time.perf_counter()
+    try:
+        client.login()
+        client.navigate("asba")
+        client.getAvailableIPOS()
+    finally:
+        client.close()
+    wall = time.perf_counter() - start
+
+    if fake:
+        fake.stop()
+
+    # ru_maxrss is reported in KiB on Linux
+    return {
+        'backend': backend,
+        'wall_s': round(wall, 4),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'peak_child_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--backend', action='append', choices=['browser', 'http'],
+                        help='Backend to measure, may be repeated (default: both)')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per backend')
+    parser.add_argument('--base-url', help='Meroshare API root for the HTTP backend')
+    parser.add_argument('--child', choices=['browser', 'http'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(args.child, args.base_url)))
+        return
+
+    results = []
+    for backend in args.backend or ['http', 'browser']:
+        for _ in range(args.runs):
+            command = [sys.executable, __file__, '--child', backend]
+            if args.base_url:
+                command += ['--base-url', args.base_url]
+            output = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+            if output.returncode != 0:
+                print(f"{backend}: run failed\n{output.stderr}", file=sys.stderr)
+                break
+            results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    print(f"{'backend':<10}{'wall (s)':>12}{'peak RSS (MB)':>16}{'child RSS (MB)':>16}")
+    for result in results:
+        print(f"{result['backend']:<10}{result['wall_s']:>12}"
+              f"{result['peak_rss_mb']:>16}{result['peak_child_rss_mb']:>16}")
+
+
+if __name__ == '__main__':
+    main()
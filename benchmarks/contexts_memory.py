@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Measure memory per account with one browser each versus shared contexts.
+
+separate  every account launches its own Chromium on its own profile, as
+          runs without --shared-browser do.
+contexts  one Chromium hosts every account in an isolated browser context
+          (BrowserContextPool, used by --shared-browser).
+
+Each account logs in to the local Meroshare replica and opens ASBA. While
+all of them are still open, the RSS of this process tree is sampled. The
+idle RSS from before the run is subtracted to get the cost per account.
+
+Usage:
+    python benchmarks/contexts_memory.py --accounts 1 5 10 20
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from benchmarks.fake_site import server  # noqa: E402
+from benchmarks.run import tree_rss_mb  # noqa: E402
+from meroshare.client import MeroshareClient  # noqa: E402
+from meroshare.contexts import BrowserContextPool  # noqa: E402
+
+
+def measure(count, shared, lean=False):
+    """Open ``count`` logged-in accounts and return the RSS they add, in MB."""
+    idle = tree_rss_mb()
+    pool = BrowserContextPool(lean=lean).start() if shared else None
+    clients = []
+    try:
+        with server.FakeSite(rows=10) as site:
+            for _ in range(count):
+                clients.append(MeroshareClient(
+                    username=server.USERNAME, password=server.PASSWORD, dp_id=server.DP_ID,
+                    crn=server.CRN, transaction_pin=server.TRANSACTION_PIN,
+                    driver_pool=pool, lean=lean, base_url=site.url))
+
+            def open_account(client):
+                client.login()
+                client.navigate("asba")
+                client.getAvailableIPOS()
+
+            with ThreadPoolExecutor(max_workers=min(count, 8)) as executor:
+                list(executor.map(open_account, clients))
+            return tree_rss_mb() - idle
+    finally:
+        for client in clients:
+            client.close()
+        if pool:
+            pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--accounts', type=int, nargs='+', default=[1, 5, 10, 20])
+    parser.add_argument('--lean', action='store_true')
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'accounts':>9}{'total (MB)':>12}{'per account (MB)':>18}")
+    for shared in (False, True):
+        for count in args.accounts:
+            total = measure(count, shared, args.lean)
+            print(f"{'contexts' if shared else 'separate':<10}{count:>9}{total:>12.0f}"
+                  f"{total / count:>18.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Measure startup-to-login-page latency for cold and pooled browsers.
+
+cold    resolves chromedriver through webdriver-manager, then launches a new
+        browser on a new profile. This is what every run did before the pool.
+cached  launches a new browser with the driver served from the local cache.
+pooled  takes a warm browser from a DriverPool, as multi-account runs do.
+
+Each sample ends when the DP dropdown on the login page is present.
+
+Usage:
+    python benchmarks/driver_startup.py --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from selenium.webdriver.chrome.service import Service  # noqa: E402
+from selenium.webdriver.common.by import By  # noqa: E402
+from selenium.webdriver.support import expected_conditions as EC  # noqa: E402
+from selenium.webdriver.support.ui import WebDriverWait  # noqa: E402
+
+from meroshare.driver_pool import (  # noqa: E402
+    DriverPool, chrome_options, launch_driver, make_profile_dir, remove_profile_dir,
+    resolve_driver_path,
+)
+
+LOGIN_URL = 'https://meroshare.cdsc.com.np/#/login'
+
+
+def _open_login(driver):
+    driver.get(LOGIN_URL)
+    WebDriverWait(driver, 60).until(
+        EC.presence_of_element_located((By.CLASS_NAME, "select2-selection__rendered")))
+
+
+def sample_cold():
+    from selenium import webdriver
+    from webdriver_manager.chrome import ChromeDriverManager
+    from webdriver_manager.core.os_manager import ChromeType
+
+    start = time.perf_counter()
+    profile_dir = make_profile_dir()
+    driver_path = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
+    driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options(profile_dir))
+    try:
+        _open_login(driver)
+        return time.perf_counter() - start
+    finally:
+        driver.quit()
+        remove_profile_dir(profile_dir)
+
+
+def sample_cached():
+    start = time.perf_counter()
+    driver, profile_dir = launch_driver()
+    try:
+        _open_login(driver)
+        return time.perf_counter() - start
+    finally:
+        driver.quit()
+        remove_profile_dir(profile_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=3, help='Samples per mode')
+    args = parser.parse_args()
+
+    resolve_driver_path()  # Warm the cache so "cached" never downloads
+
+    samples = {
+        'cold': [sample_cold() for _ in range(args.runs)],
+        'cached': [sample_cached() for _ in range(args.runs)],
+    }
+
+    with DriverPool(size=1) as pool:
+        samples['pooled'] = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            driver = pool.acquire()
+            try:
+                _open_login(driver)
+                samples['pooled'].append(time.perf_counter() - start)
+            finally:
+                pool.release(driver)
+
+    print(f"{'mode':<8}{'median (s)':>12}{'min (s)':>10}{'max (s)':>10}")
+    for mode, values in samples.items():
+        print(f"{mode:<8}{statistics.median(values):>12.3f}{min(values):>10.3f}{max(values):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
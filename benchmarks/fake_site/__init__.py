@@ -0,0 +1,5 @@
+"""
+Local replica of the Meroshare web app for offline browser benchmarks.
+"""
+
+from benchmarks.fake_site.server import FakeSite, make_rows  # noqa: F401
@@ -0,0 +1,166 @@
+"""
+HTTP server for the local Meroshare replica.
+
+Serves the single-page app in index.html plus the small JSON API it calls.
+Every API request can be delayed to imitate a slow or overloaded site.
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INDEX = os.path.join(os.path.dirname(__file__), 'index.html')
+
+DP_ID = "13700"
+USERNAME = "user"
+PASSWORD = "pass"
+CRN = "1234567"
+TRANSACTION_PIN = "1234"
+BANK_ID = 37
+
+
+def make_rows(count):
+    """Generate ``count`` listing rows with a realistic mix of issues.
+
+    Every fourth row is a debenture and every fifth ordinary IPO is already
+    applied, so the client has to filter and skip like it does on the site.
+    """
+    rows = []
+    for index in range(count):
+        debenture = index % 4 == 3
+        rows.append({
+            'companyShareId': 1000 + index,
+            'companyName': f"Company {index:03d} Limited",
+            'scrip': f"C{index:03d}",
+            'subGroup': "For General Public",
+            'shareTypeName': "IPO",
+            'shareGroupName': "Debentures" if debenture else "Ordinary Shares",
+            'action': "edit" if not debenture and index % 5 == 4 else None,
+        })
+    return rows
+
+
+class FakeSite:
+    """A threaded server hosting the Meroshare replica on localhost.
+
+    Args:
+        rows (int): Number of rows in the ASBA listing
+        latency (float): Seconds to sleep before answering every API request
+    """
+
+    def __init__(self, rows=10, latency=0.0):
+        self.issues = make_rows(rows)
+        self.latency = latency
+        self.applications = []
+        self.tokens = set()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _api(self, method, path, body, token):
+        if (method, path) == ('POST', 'auth'):
+            if (body.get('dp') != DP_ID or body.get('username') != USERNAME
+                    or body.get('password') != PASSWORD):
+                return 401, {'message': "Invalid credentials"}
+            token = f"token-{len(self.tokens)}"
+            self.tokens.add(token)
+            return 200, {'token': token}
+
+        if token not in self.tokens:
+            return 401, {'message': "Unauthorized"}
+        if (method, path) == ('GET', 'issues'):
+            return 200, self.issues
+        if (method, path) == ('GET', 'banks'):
+            return 200, [{'id': BANK_ID, 'name': "Fake Bank Limited"}]
+        if (method, path) == ('GET', f'banks/{BANK_ID}'):
+            return 200, [{'accountNumber': "00112233445566", 'value': CRN}]
+        if (method, path) == ('POST', 'apply'):
+            if body.get('pin') != TRANSACTION_PIN:
+                return 400, {'message': "Invalid transaction PIN"}
+            self.applications.append(body)
+            for issue in self.issues:
+                if issue['companyShareId'] == body.get('issue'):
+                    issue['action'] = "edit"
+            return 201, {'message': "Share has been applied successfully."}
+        return 404, {'message': "Not found"}
+
+    def _handler_class(self):
+        site = self
+        with open(INDEX, 'rb') as f:
+            index = f.read()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, content_type, data):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _dispatch(self, method):
+                if not self.path.startswith('/api/'):
+                    self._send(200, 'text/html; charset=utf-8', index)
+                    return
+
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                if site.latency:
+                    time.sleep(site.latency)
+                status, payload = site._api(
+                    method, self.path[len('/api/'):], body, self.headers.get('Authorization'))
+                self._send(status, 'application/json', json.dumps(payload).encode())
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+        return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the Meroshare replica")
+    parser.add_argument('--rows', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    with FakeSite(args.rows, args.latency) as site:
+        print(f"Serving on {site.url}/#/login (dp {DP_ID}, {USERNAME}/{PASSWORD})")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Compare bytes transferred and page-ready time with and without --lean.
+
+Runs login() and navigate("asba") + listing for each profile. It reports
+the time each step took and the bytes the page fetched during it, taken
+from the Resource Timing API. Needs the usual MEROSHARE_* variables.
+
+Usage:
+    python benchmarks/lean_profile.py --runs 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dotenv import load_dotenv  # noqa: E402
+
+from meroshare.client import MeroshareClient  # noqa: E402
+from utils.accounts import account_from_env  # noqa: E402
+from utils.profiling import tracer  # noqa: E402
+
+TRANSFERRED_JS = """
+const entries = performance.getEntriesByType('navigation')
+    .concat(performance.getEntriesByType('resource'));
+return entries.reduce((total, entry) => total + (entry.transferSize || 0), 0);
+"""
+
+
+def run_once(lean):
+    tracer.clear()
+    client = MeroshareClient(lean=lean, **account_from_env().credentials())
+    try:
+        client.login()
+        # Hash routing keeps one document, so resource entries accumulate
+        client.driver.execute_script("performance.setResourceTimingBufferSize(2000);")
+        login_bytes = client.driver.execute_script(TRANSFERRED_JS)
+        client.navigate("asba")
+        client.getAvailableIPOS()
+        total_bytes = client.driver.execute_script(TRANSFERRED_JS)
+    finally:
+        client.close()
+
+    durations = tracer.durations()
+    return {
+        'login_s': durations['login'][0],
+        'asba_s': durations['navigate'][0] + durations['getAvailableIPOS'][0],
+        'login_kb': login_bytes / 1024,
+        'asba_kb': (total_bytes - login_bytes) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    load_dotenv()
+    tracer.enable()
+
+    print(f"{'profile':<9}{'login (s)':>11}{'login (KB)':>12}{'asba (s)':>10}{'asba (KB)':>11}")
+    for lean in (False, True):
+        samples = [run_once(lean) for _ in range(args.runs)]
+        median = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+        print(f"{'lean' if lean else 'default':<9}{median['login_s']:>11.2f}{median['login_kb']:>12.0f}"
+              f"{median['asba_s']:>10.2f}{median['asba_kb']:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
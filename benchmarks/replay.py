@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Replay a recorded cassette through a client and time every step offline.
+
+A cassette written with ``main.py --record DIR`` holds one account's
+traffic. Replaying it runs login -> navigate -> getAvailableIPOS ->
+applyAvailableIPOS -> close with every answer taken from the cassette, so
+the client's own overhead can be profiled without network or browser, and
+a captured incident becomes a regression benchmark:
+
+    wall_s        end-to-end wall time
+    steps         per-phase latency from the profiling spans
+    round_trips   exchanges answered from the cassette
+
+With --timing fast the recorded server time is skipped, with recorded it
+is waited for. --baseline and --update-baseline work like in run.py.
+
+Usage:
+    python benchmarks/replay.py cassettes/13700_user.jsonl.gz --backend http --dp-id 13700
+    python benchmarks/replay.py incident.jsonl.gz --dp-id 13700 --baseline incident.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from benchmarks.run import compare  # noqa: E402
+from meroshare.cassette import TIMINGS, Player  # noqa: E402
+from utils.profiling import tracer  # noqa: E402
+
+
+def replay_once(path, backend, timing, dp_id):
+    """Run the flow once against the cassette.
+
+    Returns:
+        (wall time in seconds, exchanges answered)
+    """
+    player = Player(path, timing=timing)
+    recorded = player.remaining()
+    # Credentials are redacted in the cassette, only the DP ID is looked up
+    credentials = {'username': "replay", 'password': "replay", 'dp_id': dp_id,
+                   'crn': "replay", 'transaction_pin': "replay"}
+    if backend == 'http':
+        from meroshare.api import MeroshareAPIClient
+        client = MeroshareAPIClient(**credentials, adapter=player.adapter())
+    else:
+        from meroshare.client import MeroshareClient
+        client = MeroshareClient(**credentials, cassette=player)
+
+    start = time.perf_counter()
+    try:
+        client.login()
+        client.navigate("asba")
+        client.getAvailableIPOS()
+        client.applyAvailableIPOS()
+    finally:
+        client.close()
+    return time.perf_counter() - start, recorded - player.remaining()
+
+
+def benchmark(path, backend, timing, dp_id, runs):
+    """Replay ``runs`` times and aggregate the measurements."""
+    walls, trips, steps = [], [], {}
+    tracer.enable()
+    for _ in range(runs):
+        tracer.clear()
+        wall, round_trips = replay_once(path, backend, timing, dp_id)
+        walls.append(wall)
+        trips.append(round_trips)
+        for name, values in tracer.durations().items():
+            steps.setdefault(name, []).append(sum(values))
+    tracer.disable()
+
+    return {
+        'wall_s': round(statistics.median(walls), 4),
+        'round_trips': int(statistics.median(trips)),
+        'steps': {name: round(statistics.median(values), 4) for name, values in sorted(steps.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('cassette', help='Cassette written by main.py --record')
+    parser.add_argument('--backend', choices=['browser', 'http'], default='http')
+    parser.add_argument('--dp-id', required=True, help='DP ID of the recorded account')
+    parser.add_argument('--timing', choices=TIMINGS, default='fast')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--baseline', help='Fail if results regress against this JSON file')
+    parser.add_argument('--update-baseline', metavar='PATH', help='Store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    config = {'cassette': os.path.basename(args.cassette), 'backend': args.backend,
+              'timing': args.timing, 'runs': args.runs}
+    result = benchmark(args.cassette, args.backend, args.timing, args.dp_id, args.runs)
+    report = {'config': config, 'result': result}
+    print(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        with open(args.update_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['config'] != config:
+            print(f"Baseline was recorded with {baseline['config']}, not {config}", file=sys.stderr)
+            sys.exit(2)
+        regressions = compare(result, baseline['result'], args.tolerance)
+        for metric, expected, actual in regressions:
+            print(f"REGRESSION {metric}: {expected} -> {actual}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
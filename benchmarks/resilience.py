@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Measure successful applications under injected latency and errors.
+
+Every account gets its own local stand-in server that answers a share of
+its requests with a 503 after the given latency. The apply flow (login ->
+getAvailableIPOS -> applyAvailableIPOS) runs for all accounts at once over
+the HTTP backend, with and without retries.
+
+Usage:
+    python benchmarks/resilience.py --error-rate 0.2 --latency 0.05 --accounts 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from meroshare.api import MeroshareAPIClient  # noqa: E402
+from meroshare.resilience import Backoff, CircuitBreaker, RetryPolicy  # noqa: E402
+from tests import fake_meroshare  # noqa: E402
+
+
+def apply_once(args, retry_policy, seed):
+    """Run the apply flow for one account against its own server.
+
+    Returns:
+        Number of applications the server received
+    """
+    with fake_meroshare.FakeMeroshare(
+            latency=args.latency, error_rate=args.error_rate, seed=seed) as fake:
+        client = MeroshareAPIClient(
+            username=fake_meroshare.USERNAME,
+            password=fake_meroshare.PASSWORD,
+            dp_id=fake_meroshare.DP_ID,
+            crn=fake_meroshare.CRN,
+            transaction_pin=fake_meroshare.TRANSACTION_PIN,
+            base_url=fake.url,
+            retry_policy=retry_policy,
+        )
+        try:
+            client.login()
+            client.getAvailableIPOS()
+            client.applyAvailableIPOS()
+        except Exception:
+            pass
+        finally:
+            client.close()
+        return len(fake.applications)
+
+
+def run(args, retry_policy, run_index):
+    """Apply for every account at the same time.
+
+    Returns:
+        (applications made, wall time in seconds)
+    """
+    seeds = [run_index * args.accounts + i for i in range(args.accounts)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.accounts) as executor:
+        made = sum(executor.map(lambda seed: apply_once(args, retry_policy, seed), seeds))
+    return made, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--accounts', type=int, default=8, help='Accounts applying at the same time')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds added to every request')
+    parser.add_argument('--error-rate', type=float, default=0.2, help='Share of requests answered with 503')
+    parser.add_argument('--retries', type=int, default=4, help='Retries per step with resilience on')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per configuration')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    configurations = {
+        'no retries': lambda: None,
+        'resilient': lambda: RetryPolicy(
+            attempts=args.retries + 1, backoff=Backoff(base=0.05, cap=1),
+            breaker=CircuitBreaker(failure_threshold=4 * args.accounts, reset_timeout=0.5)),
+    }
+
+    # Every account has two open ordinary-share IPOs to apply for
+    expected = 2 * args.accounts * args.runs
+    print(f"{'configuration':<16}{'applied':>12}{'wall (s)':>12}{'per second':>12}")
+    for name, make_policy in configurations.items():
+        applied = wall = 0
+        for run_index in range(args.runs):
+            made, seconds = run(args, make_policy(), run_index)
+            applied += made
+            wall += seconds
+        print(f"{name:<16}{f'{applied}/{expected}':>12}{wall / args.runs:>12.3f}"
+              f"{applied / wall:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
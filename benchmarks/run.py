@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark suite against a local fake Meroshare.
+
+Drives a client through login -> navigate -> getAvailableIPOS ->
+applyAvailableIPOS -> close against a local replica and records:
+
+    wall_s        end-to-end wall time
+    steps         per-phase latency from the profiling spans
+    round_trips   WebDriver commands (browser) or HTTP requests (http)
+    peak_rss_mb   peak RSS of this process and all its children
+    log_emit_us   time a worker spends in one logger.info call with the
+                  queued, context-tagged logging of utils.logs
+    traced_us     time @traced adds to every client step with the tracer
+                  off: log context and the step metrics
+
+Results are medians over --runs (peak RSS is the maximum). With
+--baseline, any metric worse than the baseline by more than --tolerance
+fails the run with exit status 1. No network access is needed once
+chromedriver is in the local driver cache.
+
+Usage:
+    python benchmarks/run.py --rows 30 --latency 0.05 --runs 3
+    python benchmarks/run.py --update-baseline benchmarks/baseline.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from utils.logs import log_context, setup_logging  # noqa: E402
+from utils.metrics import registry  # noqa: E402
+from utils.profiling import traced, tracer  # noqa: E402
+
+# Differences below these are noise regardless of the relative tolerance
+ABSOLUTE_SLACK = {'wall_s': 0.05, 'steps': 0.02, 'round_trips': 2, 'peak_rss_mb': 10,
+                  'log_emit_us': 2, 'traced_us': 2}
+
+
+def _rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss_mb(root=None):
+    """Sum the RSS of a process and all of its descendants, in MB."""
+    root = root or os.getpid()
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        total += _rss_kb(pid)
+        stack.extend(children.get(pid, []))
+    return total / 1024
+
+
+class PeakRSS:
+    """Samples the process tree RSS in the background and keeps the peak."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, tree_rss_mb())
+
+
+class CommandCounter:
+    """Counts WebDriver commands sent to chromedriver."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+        self._original = RemoteConnection.execute
+        counter = self
+
+        def execute(connection, command, params):
+            counter.count += 1
+            return counter._original(connection, command, params)
+
+        RemoteConnection.execute = execute
+        return self
+
+    def __exit__(self, *exc_info):
+        from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+        RemoteConnection.execute = self._original
+
+
+def _scenario(client):
+    client.login()
+    client.navigate("asba")
+    client.getAvailableIPOS()
+    client.applyAvailableIPOS()
+
+
+def run_browser(rows, latency):
+    from benchmarks.fake_site import server
+    from meroshare.client import MeroshareClient
+
+    with server.FakeSite(rows, latency) as site:
+        client = MeroshareClient(
+            username=server.USERNAME, password=server.PASSWORD, dp_id=server.DP_ID,
+            crn=server.CRN, transaction_pin=server.TRANSACTION_PIN, base_url=site.url)
+        with PeakRSS() as rss, CommandCounter() as commands:
+            start = time.perf_counter()
+            try:
+                _scenario(client)
+            finally:
+                client.close()
+            wall = time.perf_counter() - start
+        return wall, commands.count, rss.peak
+
+
+def run_http(rows, latency):
+    from benchmarks.fake_site.server import make_rows
+    from meroshare.api import MeroshareAPIClient
+    from tests import fake_meroshare
+
+    issues = [
+        fake_meroshare.make_issue(
+            row['companyShareId'], row['companyName'],
+            share_group=row['shareGroupName'], action=row['action'])
+        for row in make_rows(rows)
+    ]
+    with fake_meroshare.FakeMeroshare(issues, latency) as fake:
+        client = MeroshareAPIClient(
+            username=fake_meroshare.USERNAME, password=fake_meroshare.PASSWORD,
+            dp_id=fake_meroshare.DP_ID, crn=fake_meroshare.CRN,
+            transaction_pin=fake_meroshare.TRANSACTION_PIN, base_url=fake.url)
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            try:
+                _scenario(client)
+            finally:
+                client.close()
+            wall = time.perf_counter() - start
+        return wall, len(fake.requests), rss.peak
+
+
+RUNNERS = {'browser': run_browser, 'http': run_http}
+
+
+def log_emit_cost(records=10000):
+    """Median microseconds per logger.info call, formatting and writing excluded.
+
+    Records are written to /dev/null by the listener thread, so this is the
+    cost the logging thread pays, e.g. an account worker mid-apply.
+    """
+    log = logging.getLogger('benchmarks.logs')
+    with open(os.devnull, 'w') as sink:
+        setup = setup_logging(stream=sink)
+        samples = []
+        try:
+            with log_context(account='bench', issue='ISSUE', phase='emit'):
+                for _ in range(5):
+                    start = time.perf_counter()
+                    for i in range(records // 5):
+                        log.info("Record %d", i)
+                    samples.append((time.perf_counter() - start) / (records // 5))
+        finally:
+            setup.stop()
+    return round(statistics.median(samples) * 1e6, 2)
+
+
+def traced_overhead(calls=20000):
+    """Median microseconds @traced adds to a call while the tracer is off."""
+    def step(client):
+        return client
+
+    wrapped = traced('bench')(step)
+    samples = []
+    with log_context(account='bench'):
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(calls // 5):
+                step(None)
+            plain = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(calls // 5):
+                wrapped(None)
+            samples.append((time.perf_counter() - start - plain) / (calls // 5))
+    registry.clear()
+    return round(statistics.median(samples) * 1e6, 2)
+
+
+def benchmark(backend, rows, latency, runs):
+    """Run the scenario ``runs`` times and aggregate the measurements."""
+    walls, trips, peaks, steps = [], [], [], {}
+    tracer.enable()
+    for _ in range(runs):
+        tracer.clear()
+        wall, round_trips, peak = RUNNERS[backend](rows, latency)
+        walls.append(wall)
+        trips.append(round_trips)
+        peaks.append(peak)
+        for name, values in tracer.durations().items():
+            steps.setdefault(name, []).append(sum(values))
+    tracer.disable()
+
+    return {
+        'wall_s': round(statistics.median(walls), 4),
+        'round_trips': int(statistics.median(trips)),
+        'peak_rss_mb': round(max(peaks), 1),
+        'steps': {name: round(statistics.median(values), 4) for name, values in sorted(steps.items())},
+        'log_emit_us': log_emit_cost(),
+        'traced_us': traced_overhead(),
+    }
+
+
+def _flatten(result):
+    flat = {key: value for key, value in result.items() if key != 'steps'}
+    flat.update({f"steps.{name}": value for name, value in result.get('steps', {}).items()})
+    return flat
+
+
+def compare(current, baseline, tolerance):
+    """Return (metric, baseline, current) for every regression beyond tolerance."""
+    regressions = []
+    now = _flatten(current)
+    for metric, expected in _flatten(baseline).items():
+        if metric not in now:
+            continue
+        slack = ABSOLUTE_SLACK[metric.split('.', 1)[0]]
+        if now[metric] > expected * (1 + tolerance) + slack:
+            regressions.append((metric, expected, now[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--backend', choices=sorted(RUNNERS), default='browser')
+    parser.add_argument('--rows', type=int, default=20, help='Rows in the ASBA listing')
+    parser.add_argument('--latency', type=float, default=0.02, help='Server latency per request (s)')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='Fail if results regress against this JSON file')
+    parser.add_argument('--update-baseline', metavar='PATH', help='Store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    args = parser.parse_args()
+
+    config = {'backend': args.backend, 'rows': args.rows, 'latency': args.latency, 'runs': args.runs}
+    result = benchmark(args.backend, args.rows, args.latency, args.runs)
+    report = {'config': config, 'result': result}
+
+    print(json.dumps(report, indent=2))
+    for path in filter(None, (args.output, args.update_baseline)):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['config'] != config:
+            print(f"Baseline was recorded with {baseline['config']}, not {config}", file=sys.stderr)
+            sys.exit(2)
+        regressions = compare(result, baseline['result'], args.tolerance)
+        for metric, expected, actual in regressions:
+            print(f"REGRESSION {metric}: {expected} -> {actual}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Measure how a batch of accounts scales across worker processes.
+
+A coordinator publishes one job per account to a SQLite queue, then 1, 2,
+4, ... worker processes lease them, each running --concurrency jobs at a
+time. A job only sleeps for --job-seconds, standing in for a browser
+session, so the numbers show the queue's overhead against ideal linear
+scaling.
+
+Usage:
+    python benchmarks/sharding.py --accounts 200 --nodes 1 2 4 --job-seconds 0.05
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from models.account import Account  # noqa: E402
+from work_queue import SQLiteQueue, Worker, publish, wait  # noqa: E402
+
+
+def make_accounts(count):
+    return [Account(f"user{i}", "pass", "13700", "CRN") for i in range(count)]
+
+
+def node(path, accounts, concurrency, job_seconds, name, ready):
+    """One worker process; exits once the queue has been empty for a moment."""
+    def run(account, action):
+        time.sleep(job_seconds)
+        return "ok"
+
+    queue = SQLiteQueue(path)
+    worker = Worker(queue, make_accounts(accounts), run, name=name, concurrency=concurrency,
+                    idle_exit=2, poll_interval=0.02)
+    ready.put(name)
+    worker.run()
+    queue.close()
+
+
+def run(nodes, args):
+    """Time one batch from publishing until every job is done."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'queue.sqlite3')
+        queue = SQLiteQueue(path)
+        context = multiprocessing.get_context('spawn')
+        ready = context.Queue()
+        processes = [
+            context.Process(target=node, args=(
+                path, args.accounts, args.concurrency, args.job_seconds, f"node{i}", ready))
+            for i in range(nodes)
+        ]
+        for process in processes:
+            process.start()
+        # Interpreter startup is not part of the measurement
+        for _ in processes:
+            ready.get(timeout=60)
+
+        start = time.perf_counter()
+        batch = publish(queue, make_accounts(args.accounts), {'check_only': True})
+        jobs = wait(queue, batch, poll_interval=0.01)
+        wall = time.perf_counter() - start
+
+        for process in processes:
+            process.join()
+        queue.close()
+    assert all(job.ok for job in jobs)
+    return wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--accounts', type=int, default=200)
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--concurrency', type=int, default=4, help='Jobs at a time per node')
+    parser.add_argument('--job-seconds', type=float, default=0.05)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    report = {}
+    for nodes in args.nodes:
+        wall = run(nodes, args)
+        ideal = args.accounts * args.job_seconds / (nodes * args.concurrency)
+        report[nodes] = {'wall_s': round(wall, 3), 'ideal_s': round(ideal, 3),
+                         'efficiency': round(ideal / wall, 2)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
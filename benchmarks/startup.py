@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Guard the CLI startup time with ``python -X importtime``.
+
+Imports ``main`` in a fresh interpreter for each scenario and records the
+cumulative import time of ``main`` itself, interpreter startup excluded:
+
+    cli     ``import main``, what --help and argument errors pay
+    http    the CLI plus the HTTP backend
+
+Each scenario also lists modules it must never load; selenium in
+particular stays out of everything but the browser backend. The run fails
+with exit status 1 when the median import time is over --budget-ms or a
+forbidden module was imported.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 80 --runs 9
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+
+# Statement run in a fresh interpreter, and top-level packages it must not import
+SCENARIOS = {
+    'cli': ("import main", ('selenium', 'webdriver_manager', 'requests', 'cryptography')),
+    'http': ("import main; main.load_backend('http')", ('selenium', 'webdriver_manager')),
+}
+
+
+def import_profile(statement):
+    """Run ``statement`` under ``-X importtime``.
+
+    Returns:
+        (cumulative microseconds spent importing main, set of imported modules)
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=SRC, capture_output=True, text=True, check=True)
+    total, modules = 0, set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        if name.strip() == 'main':
+            total = int(cumulative)
+    return total, modules
+
+
+def forbidden_imports(modules, packages):
+    """Return the modules that belong to any of ``packages``."""
+    return sorted(name for name in modules if name.split('.', 1)[0] in packages)
+
+
+def measure(statement, runs):
+    """Median import time in milliseconds and every module imported."""
+    times, modules = [], set()
+    for _ in range(runs):
+        total, seen = import_profile(statement)
+        times.append(total)
+        modules |= seen
+    return round(statistics.median(times) / 1000, 1), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=120,
+                        help='Fail when importing main takes longer than this')
+    args = parser.parse_args()
+
+    report, failed = {}, False
+    for scenario, (statement, packages) in SCENARIOS.items():
+        import_ms, modules = measure(statement, args.runs)
+        forbidden = forbidden_imports(modules, packages)
+        report[scenario] = {'import_ms': import_ms, 'modules': len(modules), 'forbidden': forbidden}
+        if forbidden:
+            print(f"FORBIDDEN {scenario}: {', '.join(forbidden[:5])}", file=sys.stderr)
+            failed = True
+        if scenario == 'cli' and import_ms > args.budget_ms:
+            print(f"OVER BUDGET {scenario}: {import_ms} ms > {args.budget_ms} ms", file=sys.stderr)
+            failed = True
+
+    print(json.dumps(report, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Compare how quickly WebDriverWait and the in-page waits notice a DOM change.
+
+A local page inserts an element after a random delay. Each sample records
+the time between the insertion and the wait returning. Then login ->
+navigate -> getAvailableIPOS -> applyAvailableIPOS is timed end to end
+against the local Meroshare replica, once with the client's waits and
+once with every wait swapped for WebDriverWait.
+
+Usage:
+    python benchmarks/wait_latency.py --samples 20 --runs 3
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from selenium.webdriver.common.by import By  # noqa: E402
+from selenium.webdriver.support import expected_conditions as EC  # noqa: E402
+from selenium.webdriver.support.ui import WebDriverWait  # noqa: E402
+
+from benchmarks.run import run_browser  # noqa: E402
+from meroshare import client as client_module  # noqa: E402
+from meroshare.driver_pool import launch_driver, remove_profile_dir  # noqa: E402
+from meroshare.waits import wait_for  # noqa: E402
+
+PAGE = """data:text/html,<html><body><script>
+window.insertAfter = (ms) => {
+    document.querySelectorAll('#target').forEach((node) => node.remove());
+    window.insertedAt = null;
+    setTimeout(() => {
+        const node = document.createElement('div');
+        node.id = 'target';
+        document.body.appendChild(node);
+        window.insertedAt = performance.timeOrigin + performance.now();
+    }, ms);
+};
+</script></body></html>"""
+
+EXPECTED_CONDITIONS = {
+    'present': EC.presence_of_element_located,
+    'visible': EC.visibility_of_element_located,
+    'clickable': EC.element_to_be_clickable,
+}
+
+
+def webdriver_wait(driver, locator, timeout=10, condition='present'):
+    """wait_for done with WebDriverWait, which polls every 500 ms."""
+    return WebDriverWait(driver, timeout).until(EXPECTED_CONDITIONS[condition](locator))
+
+
+def sample(driver, wait):
+    delay = random.randint(50, 400)
+    driver.execute_script("window.insertAfter(arguments[0]);", delay)
+    wait()
+    returned_at = time.time() * 1000
+    inserted_at = driver.execute_script("return window.insertedAt;")
+    return (returned_at - inserted_at) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=10, help='Rows in the replica listing')
+    args = parser.parse_args()
+
+    driver, profile_dir = launch_driver()
+    try:
+        driver.get(PAGE)
+        locator = (By.ID, "target")
+        results = {
+            'WebDriverWait': [
+                sample(driver, lambda: WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located(locator)))
+                for _ in range(args.samples)
+            ],
+            'wait_for': [
+                sample(driver, lambda: wait_for(driver, locator, 10))
+                for _ in range(args.samples)
+            ],
+        }
+    finally:
+        driver.quit()
+        remove_profile_dir(profile_dir)
+
+    print(f"{'wait':<15}{'median (ms)':>13}{'p95 (ms)':>10}")
+    for name, values in results.items():
+        values.sort()
+        p95 = values[int(len(values) * 0.95) - 1]
+        print(f"{name:<15}{statistics.median(values) * 1000:>13.1f}{p95 * 1000:>10.1f}")
+
+    walls = {'wait_for': [], 'WebDriverWait': []}
+    for _ in range(args.runs):
+        walls['wait_for'].append(run_browser(args.rows, 0)[0])
+        with patch.object(client_module, 'wait_for', webdriver_wait):
+            walls['WebDriverWait'].append(run_browser(args.rows, 0)[0])
+
+    print(f"\n{'login + apply':<15}{'median (s)':>13}")
+    for name, values in walls.items():
+        print(f"{name:<15}{statistics.median(values):>13.2f}")
+    saved = statistics.median(walls['WebDriverWait']) - statistics.median(walls['wait_for'])
+    print(f"\nMeasured saving per login + apply: {saved:.2f}s over {args.runs} run(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,26 +4,50 @@ Automate Meroshare IPO - Main Entry Point
 
 This script provides functionality to automate the process of applying for IPOs
 through the Meroshare platform in Nepal.
+
+Backends, caches and the ledger are imported only once a run needs them,
+so --help, invalid arguments and the HTTP backend never load selenium.
 """
 
 import os
+import re
 import sys
+import atexit
 import argparse
+import importlib
 import logging
+import threading
 from dotenv import load_dotenv
 
-from meroshare.client import MeroshareClient
+from meroshare.diagnostics import ARTIFACT_DIR, FailureCapture
+from models.ipo import ApplyStatus, summarize_results
+from runner import format_results, run_accounts
+from scheduler import PrewarmScheduler
+from utils.accounts import account_from_env, load_accounts, missing_env_vars
+from utils.issue_calendar import group_openings, load_calendar, openings_from_issues
+from utils.logs import log_context, setup_logging
+from utils.metrics import format_snapshot, registry, write_snapshot
+from utils.profiling import format_summary, tracer
+from watcher import Watcher
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Recorder of each cassette path, shared by every client of the account
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+# Module and class of each backend, imported on first use
+BACKENDS = {
+    'browser': ('meroshare.client', 'MeroshareClient'),
+    'http': ('meroshare.api', 'MeroshareAPIClient'),
+}
+
+
+def load_backend(backend):
+    """Import and return the client class of a backend."""
+    module, name = BACKENDS[backend]
+    return getattr(importlib.import_module(module), name)
+
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -46,7 +70,65 @@ def parse_arguments():
     parser.add_argument(
         '--apply',
         type=str,
-        help='Apply for a specific IPO by name'
+        help='Apply for IPOs whose name or scrip matches (case-insensitive regex)'
+    )
+
+    parser.add_argument(
+        '--results',
+        action='store_true',
+        help='Check allotment results of every account over HTTP instead of applying'
+    )
+
+    parser.add_argument(
+        '--issues',
+        type=str,
+        help='Comma-separated scrips or names, or a YAML/CSV file of them, for --results'
+    )
+
+    parser.add_argument(
+        '--report',
+        type=str,
+        metavar='FILE',
+        help='Write the --results report to FILE (.json for JSON, CSV otherwise)'
+    )
+
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=16,
+        help='Maximum number of requests in flight with --results'
+    )
+
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep the session open and poll for new IPOs; applies with --apply-all/--apply'
+    )
+
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=300,
+        help='Seconds between polls in --watch mode'
+    )
+
+    parser.add_argument(
+        '--prewarm',
+        action='store_true',
+        help='Log in ahead of upcoming issue openings and apply the moment they open'
+    )
+
+    parser.add_argument(
+        '--calendar',
+        type=str,
+        help='YAML or CSV file of upcoming issues (name, opens_at) for --prewarm'
+    )
+
+    parser.add_argument(
+        '--lead',
+        type=float,
+        default=60,
+        help='Seconds before an opening to log in with --prewarm'
     )
 
     parser.add_argument(
@@ -55,6 +137,204 @@ def parse_arguments():
         help='Run browser in headless mode'
     )
 
+    parser.add_argument(
+        '--backend',
+        choices=sorted(BACKENDS),
+        default='browser',
+        help='Talk to Meroshare through a browser or directly over HTTP'
+    )
+
+    parser.add_argument(
+        '--lean',
+        action='store_true',
+        help='Skip images, fonts, media and trackers in the browser'
+    )
+
+    parser.add_argument(
+        '--tabs',
+        type=int,
+        default=1,
+        metavar='N',
+        help='With the browser backend, apply for up to N issues at once in separate tabs'
+             ' (not with --shared-browser)'
+    )
+
+    parser.add_argument(
+        '--accounts',
+        type=str,
+        help='YAML or CSV file with one Meroshare account per entry'
+    )
+
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=4,
+        help='Maximum number of accounts processed at the same time'
+    )
+
+    parser.add_argument(
+        '--publish',
+        action='store_true',
+        help='Queue one job per account of --accounts for --worker processes and wait for them'
+    )
+
+    parser.add_argument(
+        '--worker',
+        action='store_true',
+        help='Run jobs from --queue for the accounts of --accounts, --max-workers at a time'
+    )
+
+    parser.add_argument(
+        '--queue',
+        type=str,
+        metavar='URL',
+        help='Job queue shared by --publish and --worker: a SQLite file or redis://host:port/db'
+    )
+
+    parser.add_argument(
+        '--idle-exit',
+        type=float,
+        default=60,
+        metavar='SECONDS',
+        help='Stop a --worker once no job has been open for SECONDS (default 60)'
+    )
+
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        default=0,
+        help='Pre-launch this many browsers and share them between accounts'
+    )
+
+    parser.add_argument(
+        '--reconcile',
+        action='store_true',
+        help="Refresh the local ledger of applied issues from Meroshare's application report"
+    )
+
+    parser.add_argument(
+        '--no-ledger',
+        action='store_true',
+        help='Do not consult or update the local ledger of applied issues'
+    )
+
+    parser.add_argument(
+        '--shared-browser',
+        action='store_true',
+        help='Run every account in an isolated context of one shared browser'
+    )
+
+    parser.add_argument(
+        '--no-session-cache',
+        action='store_true',
+        help='Always log in and look up the bank account instead of reusing cached ones'
+    )
+
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=3,
+        help='Retry each step this many times on timeouts and busy-server errors (0 disables)'
+    )
+
+    parser.add_argument(
+        '--hedge-after',
+        type=float,
+        metavar='SECONDS',
+        help='With --backend http, resend a read that has not answered after SECONDS'
+    )
+
+    parser.add_argument(
+        '--rate',
+        type=float,
+        metavar='PER_SECOND',
+        help='Send at most this many calls per second to each Meroshare host'
+    )
+
+    parser.add_argument(
+        '--source-rate',
+        type=float,
+        metavar='PER_SECOND',
+        help='Send at most this many calls per second from this machine, all hosts together'
+    )
+
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='Adapt the number of calls in flight, up to --max-workers, to how fast Meroshare answers'
+    )
+
+    parser.add_argument(
+        '--artifacts',
+        type=str,
+        default=ARTIFACT_DIR,
+        metavar='DIR',
+        help='Where screenshots, page sources and console logs of failed steps are kept'
+    )
+
+    parser.add_argument(
+        '--no-artifacts',
+        action='store_true',
+        help='Do not capture the browser state of failed steps'
+    )
+
+    parser.add_argument(
+        '--log-format',
+        choices=['text', 'json'],
+        default='text',
+        help='Write log lines as plain text or as one JSON object each (default: text)'
+    )
+
+    parser.add_argument(
+        '--log-dir',
+        type=str,
+        metavar='DIR',
+        help='Also write one JSON log file per account to DIR'
+    )
+
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        metavar='PORT',
+        help='Serve Prometheus metrics on http://HOST:PORT/metrics, e.g. with --watch or --worker'
+    )
+
+    parser.add_argument(
+        '--metrics-out',
+        type=str,
+        metavar='FILE',
+        help='Write a JSON snapshot of the metrics to FILE when the run ends'
+    )
+
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='profiles',
+        metavar='DIR',
+        help='Write a Chrome trace of every phase to DIR (default: profiles)'
+    )
+
+    parser.add_argument(
+        '--record',
+        type=str,
+        metavar='DIR',
+        help='Record the redacted traffic of every account into a cassette under DIR'
+    )
+
+    parser.add_argument(
+        '--replay',
+        type=str,
+        metavar='DIR',
+        help='Answer every request from the cassettes under DIR instead of Meroshare'
+    )
+
+    parser.add_argument(
+        '--replay-timing',
+        choices=['recorded', 'fast'],
+        default='recorded',
+        help='Wait as long as Meroshare took when recording, or answer at once'
+    )
+
     return parser.parse_args()
 
 
@@ -73,7 +353,7 @@ def check_available_ipos(client, headless=True):
         client.login()
         client.navigate("asba")
         logger.info("Successfully checked available IPOs")
-        client.getAvailableIPOS()
+        return client.getAvailableIPOS()
 
     except Exception as e:
         logger.error(f"Failed to check IPOs: {str(e)}")
@@ -87,18 +367,29 @@ def apply_for_ipo(client, ipo_name=None, apply_all=False, headless=True):
 
     Args:
         client: An authenticated MeroshareClient instance
-        ipo_name: Name of specific IPO to apply for
+        ipo_name: Name (or regular expression) of the IPO to apply for
         apply_all: Whether to apply for all available IPOs
         headless: Whether to run in headless mode
+
+    Returns:
+        List of ApplyResult, one per selected IPO
     """
+    pattern = None if apply_all else ipo_name
     try:
         client.login()
         client.navigate("asba")
         client.getAvailableIPOS()
-        client.applyAvailableIPOS()
+        results = client.applyAvailableIPOS(pattern)
+
+        for result in results:
+            message = f" ({result.message})" if result.message else ""
+            logger.info(f"{result.issue.company_name}: {result.status.value}{message}")
+
+        if any(result.status is ApplyStatus.FAILED for result in results):
+            raise Exception(f"Some applications failed: {summarize_results(results)}")
 
-        # TODO: Implement IPO application logic
         logger.info("Successfully applied for IPO(s)")
+        return results
     except Exception as e:
         logger.error(f"Failed to apply for IPO(s): {str(e)}")
         raise
@@ -106,6 +397,303 @@ def apply_for_ipo(client, ipo_name=None, apply_all=False, headless=True):
         client.close()
 
 
+def reconcile_ledger(client):
+    """Refresh the ledger of one account from its application report.
+
+    Returns:
+        List of LedgerEntry now stored for the account
+    """
+    try:
+        client.login()
+        return client.reconcile()
+    except Exception as e:
+        logger.error(f"Failed to reconcile the ledger: {str(e)}")
+        raise
+    finally:
+        client.close()
+
+
+def build_client(account, backend='browser', driver_pool=None, session_store=None,
+                 lean=False, ledger=None, bank_cache=None, retry_policy=None, hedge_after=None,
+                 diagnostics=None, tabs=1, cassette=None):
+    """Create a fresh client for an account on the selected backend."""
+    options = {'session_store': session_store, 'ledger': ledger, 'bank_cache': bank_cache,
+               'retry_policy': retry_policy}
+    if backend == 'browser':
+        options['driver_pool'] = driver_pool
+        options['lean'] = lean
+        options['diagnostics'] = diagnostics
+        options['tabs'] = tabs
+        options['cassette'] = cassette
+    else:
+        options['hedge_after'] = hedge_after
+        if cassette:
+            options['adapter'] = cassette.adapter()
+    return load_backend(backend)(headless=True, **options, **account.credentials())
+
+
+def client_factory(args, driver_pool=None, **services):
+    """Return a function that builds a client for an account.
+
+    Args:
+        services: Collaborators shared by every client of the run, such as
+            session_store, ledger, bank_cache, retry_policy and diagnostics
+    """
+    return lambda account: build_client(
+        account, args.backend, driver_pool, lean=args.lean, hedge_after=args.hedge_after,
+        tabs=args.tabs, cassette=open_cassette(args, account), **services)
+
+
+def open_cassette(args, account):
+    """Recorder or Player of the account's cassette under --record or --replay, if any."""
+    directory = args.replay or args.record
+    if not directory:
+        return None
+    from meroshare.cassette import Player, Recorder
+
+    path = os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]+', '_', account.label) + '.jsonl.gz')
+    if args.replay:
+        return Player(path, timing=args.replay_timing)
+    # One writer per file, two gzip writers appending to it would interleave
+    with _recorders_lock:
+        recorder = _recorders.get(path)
+        if recorder is None:
+            os.makedirs(directory, exist_ok=True)
+            recorder = _recorders[path] = Recorder(path, secrets=(
+                account.username, account.password, account.crn, account.transaction_pin))
+            atexit.register(recorder.close)
+    return recorder
+
+
+def make_retry_policy(args):
+    """Build the retry policy shared by every account, with one circuit breaker."""
+    from meroshare.resilience import CircuitBreaker, RetryPolicy
+
+    return RetryPolicy(
+        attempts=args.retries + 1, breaker=CircuitBreaker(), admission=make_admission(args))
+
+
+def make_admission(args):
+    """Build the admission controller selected on the command line, if any."""
+    if not (args.rate or args.source_rate or args.adaptive):
+        return None
+    from meroshare.admission import AdmissionController, AIMDLimit
+
+    limit = AIMDLimit(initial=min(4, args.max_workers), maximum=args.max_workers) \
+        if args.adaptive else None
+    admission = AdmissionController(args.rate, args.source_rate, limit)
+    logger.info(f"Admission limits: {admission.describe()}")
+    return admission
+
+
+def make_driver_pool(args):
+    """Start the shared browsers selected on the command line, if any."""
+    if args.backend != 'browser':
+        return None
+    if args.shared_browser:
+        from meroshare.contexts import BrowserContextPool
+
+        return BrowserContextPool(headless=True, lean=args.lean).start()
+    if args.pool_size > 0:
+        from meroshare.driver_pool import DriverPool
+
+        return DriverPool(size=args.pool_size, headless=True, lean=args.lean).start()
+    return None
+
+
+def run_action(args, client):
+    """Run the action selected on the command line with the given client.
+
+    Returns:
+        A short description of the outcome for reports
+    """
+    if args.reconcile:
+        entries = reconcile_ledger(client)
+        return f"{len(entries)} application(s) in ledger"
+    if args.watch:
+        watcher = Watcher(
+            client,
+            interval=args.interval,
+            pattern=None if args.apply_all else args.apply,
+            apply=bool(args.apply_all or args.apply) and not args.check_only,
+        )
+        return watcher.run()
+    if args.check_only:
+        ipos = check_available_ipos(client, args.headless)
+        return f"{len(ipos)} IPO(s) available"
+    if args.apply_all:
+        results = apply_for_ipo(client, apply_all=True, headless=args.headless)
+        return summarize_results(results)
+    if args.apply:
+        results = apply_for_ipo(client, ipo_name=args.apply, headless=args.headless)
+        return summarize_results(results)
+
+    # No specific action requested, just check IPOs as default
+    ipos = check_available_ipos(client, args.headless)
+    return f"{len(ipos)} IPO(s) available"
+
+
+# Options that select the action of a job, sent from --publish to --worker
+JOB_OPTIONS = ('check_only', 'apply_all', 'apply', 'reconcile')
+
+
+def open_job_queue(args):
+    """Open the job queue selected with --queue."""
+    from work_queue import QUEUE_PATH, open_queue
+
+    return open_queue(args.queue or QUEUE_PATH)
+
+
+def publish_jobs(args, accounts):
+    """Queue the selected action for every account and wait for the workers.
+
+    Returns:
+        True when every account succeeded
+    """
+    from work_queue import job_results, publish, wait
+
+    queue = open_job_queue(args)
+    try:
+        batch = publish(queue, accounts, {option: getattr(args, option) for option in JOB_OPTIONS})
+        results = job_results(wait(queue, batch), accounts)
+    finally:
+        queue.close()
+    logger.info(f"Results:\n{format_results(results)}")
+    return all(result.ok for result in results)
+
+
+def run_worker(args, accounts, make_client):
+    """Run queued jobs until the queue has been idle for --idle-exit seconds.
+
+    Returns:
+        List of AccountResult of the jobs this worker ran
+    """
+    from work_queue import Worker
+
+    def run(account, action):
+        options = argparse.Namespace(**{**vars(args), **action})
+        return run_action(options, make_client(account))
+
+    queue = open_job_queue(args)
+    try:
+        return Worker(
+            queue, accounts, run, concurrency=args.max_workers, idle_exit=args.idle_exit).run()
+    finally:
+        queue.close()
+
+
+def upcoming_openings(args, account, make_client):
+    """Read upcoming openings from --calendar, or from the listing itself."""
+    if args.calendar:
+        return load_calendar(args.calendar)
+
+    client = make_client(account)
+    try:
+        client.login()
+        return openings_from_issues(client.poll_issues())
+    finally:
+        client.close()
+
+
+def run_prewarm(args, accounts, make_client):
+    """Apply for every account at each upcoming opening, in order.
+
+    Args:
+        make_client (callable): Builds a client for an account, see client_factory
+
+    Returns:
+        True when every account succeeded at every opening
+    """
+    openings = group_openings(upcoming_openings(args, accounts[0], make_client))
+    if not openings:
+        logger.info("No upcoming issue openings found")
+        return True
+
+    ok = True
+    for opening in openings:
+        scheduler = PrewarmScheduler(
+            accounts,
+            make_client,
+            opening,
+            lead=args.lead,
+        )
+        results = scheduler.run()
+        logger.info(f"Results:\n{format_results(results)}")
+        ok = ok and all(result.ok for result in results)
+    return ok
+
+
+def check_results(args, accounts, session_store=None, ledger=None, retry_policy=None):
+    """Report the allotment results of every account.
+
+    Returns:
+        True when every result could be read
+    """
+    from results import ResultChecker, format_report, parse_issue_list, write_report
+
+    checker = ResultChecker(
+        accounts,
+        issues=parse_issue_list(args.issues),
+        max_workers=args.concurrency,
+        ledger=ledger,
+        session_store=session_store,
+        retry_policy=retry_policy,
+    )
+    rows = checker.run()
+    if args.report:
+        write_report(rows, args.report)
+        logger.info(f"Wrote {len(rows)} result(s) to {args.report}")
+    else:
+        # The report is the output of --results, not a log line
+        sys.stdout.write(format_report(rows))
+    return not any(row.error for row in rows)
+
+
+def write_profile(directory):
+    """Export the trace of this run and summarise phases seen more than once."""
+    path = tracer.export(directory)
+    logger.info(f"Wrote profile to {path}")
+    durations = tracer.durations()
+    if any(len(values) > 1 for values in durations.values()):
+        logger.info(f"Phase summary:\n{format_summary(durations)}")
+
+
+def make_services(args):
+    """Build the collaborators shared by every client of the run.
+
+    Only called once the run is known to go ahead, so a run that fails on
+    its arguments never opens the caches or the ledger.
+    """
+    from meroshare.bank_cache import BankCache
+    from meroshare.ledger import Ledger
+    from meroshare.session_store import SessionStore
+
+    # A cassette holds every call only when none is skipped thanks to a cache,
+    # and a replay must not write its redacted answers into them
+    cassette = bool(args.record or args.replay)
+    diagnostics = None if args.no_artifacts or args.replay else FailureCapture(args.artifacts)
+    if diagnostics:
+        atexit.register(diagnostics.flush)
+    return {
+        'session_store': None if args.no_session_cache or cassette else SessionStore(),
+        'ledger': None if args.no_ledger or cassette else Ledger(),
+        'bank_cache': None if args.no_session_cache or cassette else BankCache(),
+        'retry_policy': make_retry_policy(args),
+        'diagnostics': diagnostics,
+    }
+
+
+def write_metrics(path=None):
+    """Log a summary of this run's metrics and write the full snapshot to ``path``."""
+    snapshot = registry.snapshot()
+    if not snapshot:
+        return
+    logger.info(f"Metrics:\n{format_snapshot(snapshot)}")
+    if path:
+        write_snapshot(path, snapshot)
+        logger.info(f"Wrote metrics to {path}")
+
+
 def main():
     """Main entry point for the application."""
     # Load environment variables from .env file
@@ -113,39 +701,112 @@ def main():
 
     # Parse command line arguments
     args = parse_arguments()
+    setup_logging(fmt=args.log_format, log_dir=args.log_dir)
 
-    # Check for required environment variables
-    required_vars = ['MEROSHARE_USERNAME', 'MEROSHARE_PASSWORD',
-                     'MEROSHARE_DP_ID', 'MEROSHARE_CRN']
+    if args.profile:
+        tracer.enable()
+        atexit.register(write_profile, args.profile)
+
+    if args.metrics_port is not None:
+        registry.serve(args.metrics_port)
+        logger.info(f"Serving metrics on port {args.metrics_port} at /metrics")
+    atexit.register(write_metrics, args.metrics_out)
+
+    if (args.publish or args.worker) and not args.accounts:
+        logger.error("--publish and --worker need the accounts file: --accounts FILE")
+        sys.exit(1)
+
+    if args.tabs > 1 and args.shared_browser:
+        # New tabs open outside the account's isolated context and would share its storage
+        logger.error("--tabs cannot be combined with --shared-browser")
+        sys.exit(1)
+
+    if args.accounts:
+        try:
+            accounts = load_accounts(args.accounts)
+        except (OSError, ValueError, ImportError) as e:
+            logger.error(f"Could not load accounts: {str(e)}")
+            sys.exit(1)
+
+        if args.publish:
+            try:
+                ok = publish_jobs(args, accounts)
+            except ImportError as e:
+                logger.error(f"Could not open the job queue: {str(e)}")
+                sys.exit(1)
+            if not ok:
+                sys.exit(1)
+            return
 
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+        services = make_services(args)
+        if args.results:
+            if not check_results(args, accounts, services['session_store'], services['ledger'],
+                                 services['retry_policy']):
+                sys.exit(1)
+            return
+
+        driver_pool = make_driver_pool(args)
+        make_client = client_factory(args, driver_pool, **services)
+        try:
+            if args.prewarm:
+                try:
+                    ok = run_prewarm(args, accounts, make_client)
+                except (OSError, ValueError, ImportError) as e:
+                    logger.error(f"Could not schedule openings: {str(e)}")
+                    sys.exit(1)
+                if not ok:
+                    sys.exit(1)
+                return
+
+            if args.worker:
+                results = run_worker(args, accounts, make_client)
+            else:
+                results = run_accounts(
+                    accounts,
+                    lambda account: run_action(args, make_client(account)),
+                    max_workers=args.max_workers,
+                )
+        finally:
+            if driver_pool:
+                driver_pool.close()
+        logger.info(f"Results:\n{format_results(results)}")
+        if not all(result.ok for result in results):
+            sys.exit(1)
+        return
+
+    # Check for required environment variables
+    missing_vars = missing_env_vars()
     if missing_vars:
         logger.error(
             f"Missing required environment variables: {', '.join(missing_vars)}")
         logger.error("Please set these variables in your .env file")
         sys.exit(1)
 
+    services = make_services(args)
+    if args.results:
+        if not check_results(args, [account_from_env()], services['session_store'],
+                             services['ledger'], services['retry_policy']):
+            sys.exit(1)
+        return
+
+    make_client = client_factory(args, **services)
+    if args.prewarm:
+        try:
+            ok = run_prewarm(args, [account_from_env()], make_client)
+        except (OSError, ValueError, ImportError) as e:
+            logger.error(f"Could not schedule openings: {str(e)}")
+            sys.exit(1)
+        if not ok:
+            sys.exit(1)
+        return
+
     # Initialize Meroshare client
-    client = MeroshareClient(
-        username=os.getenv('MEROSHARE_USERNAME'),
-        password=os.getenv('MEROSHARE_PASSWORD'),
-        dp_id=os.getenv('MEROSHARE_DP_ID'),
-        crn=os.getenv('MEROSHARE_CRN'),
-        transaction_pin=os.getenv("MEROSHARE_TRANSACTIONPIN"),
-        headless=True
-    )
+    account = account_from_env()
+    client = make_client(account)
 
     try:
-        # Process command line arguments
-        if args.check_only:
-            check_available_ipos(client, args.headless)
-        elif args.apply_all:
-            apply_for_ipo(client, apply_all=True, headless=args.headless)
-        elif args.apply:
-            apply_for_ipo(client, ipo_name=args.apply, headless=args.headless)
-        else:
-            # No specific action requested, just check IPOs as default
-            check_available_ipos(client, args.headless)
+        with log_context(account=account.label):
+            run_action(args, client)
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
         sys.exit(1)
@@ -0,0 +1,217 @@
+"""
+Rate limits and adaptive concurrency shared by every call to Meroshare.
+
+Before a call (a login, a listing read, a submission) goes out it takes a
+token from the bucket of its host and from the bucket of the address it is
+sent from, then one of a limited number of in-flight slots. The slot limit
+adapts the way TCP congestion control does (AIMD): it grows by about one
+per limit's worth of calls that answer about as fast as the quickest seen
+for their step, and is cut by a factor when calls slow down past that or
+fail with a busy-server error. Many accounts started at an opening then
+push the site only as hard as it keeps up.
+
+The controller is attached to the shared RetryPolicy, so every retry is
+admitted like a first try.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from meroshare.resilience import is_retryable
+
+logger = logging.getLogger(__name__)
+
+# Key of the bucket every host shares, the limit of this machine's address
+SOURCE = 'source'
+
+_local = threading.local()
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average, in bursts of up to ``burst``.
+
+    Args:
+        rate (float): Tokens added per second
+        burst (float): Tokens the bucket holds, by default one second's worth
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, borrowing against the future when the bucket is empty.
+
+        Returns:
+            Seconds to wait before the token may be used
+        """
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        """Take a token, waiting for it if needed.
+
+        Returns:
+            Seconds waited
+        """
+        delay = self.reserve()
+        if delay:
+            self._sleep(delay)
+        return delay
+
+
+class AIMDLimit:
+    """Number of calls allowed in flight, adapted to how the site copes.
+
+    Args:
+        initial (int): Limit to start from
+        minimum (int): The limit never drops below this
+        maximum (int): The limit never grows above this
+        tolerance (float): A call this many times slower than the quickest
+            of its step counts as congestion
+        backoff (float): Factor the limit is cut by on congestion
+        window (float): Seconds the quickest latency of a step is remembered,
+            so a site that got slower for good is relearned
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, tolerance=1.5, backoff=0.7, window=10.0,
+                 clock=time.monotonic):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.window = window
+        self.in_flight = 0
+        self._clock = clock
+        self._baseline = {}
+        self._cut_at = float('-inf')
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot.
+
+        Returns:
+            When the call started, to pass back to ``release``
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return self._clock()
+
+    def release(self, step, started, overloaded=False):
+        """Free a slot and adapt the limit to how the call went.
+
+        Returns:
+            The reason the limit was cut, or None
+        """
+        with self._condition:
+            now = self._clock()
+            self.in_flight -= 1
+            latency = now - started
+            baseline, seen_at = self._baseline.get(step, (None, None))
+            slow = baseline is not None and latency > baseline * self.tolerance
+            if not overloaded and (baseline is None or latency < baseline
+                                   or now - seen_at > self.window):
+                self._baseline[step] = (latency, now)
+
+            reason = None
+            if overloaded or slow:
+                # Calls sent before the last cut saw the old limit, only react once per cut
+                if started > self._cut_at:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._cut_at = now
+                    reason = "busy server" if overloaded else \
+                        f"{step} took {latency:.2f}s against {baseline:.2f}s"
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+            return reason
+
+
+class AdmissionController:
+    """Admits calls to Meroshare within rate limits and an adaptive concurrency limit.
+
+    Args:
+        host_rate (float): Calls per second to each host, None for no limit
+        source_rate (float): Calls per second to all hosts together, None for no limit
+        limit (AIMDLimit): Adaptive limit of calls in flight, None for no limit
+    """
+
+    def __init__(self, host_rate=None, source_rate=None, limit=None, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.host_rate = host_rate
+        self.source_rate = source_rate
+        self.limit = limit
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key, rate):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, clock=self._clock, sleep=self._sleep)
+            return bucket
+
+    def describe(self):
+        """Current limits, as logged whenever the concurrency limit changes."""
+        parts = []
+        if self.host_rate:
+            parts.append(f"{self.host_rate:g}/s per host")
+        if self.source_rate:
+            parts.append(f"{self.source_rate:g}/s from this address")
+        if self.limit:
+            parts.append(f"{int(self.limit.limit)} in flight "
+                         f"({self.limit.minimum}-{self.limit.maximum})")
+        return ", ".join(parts) or "no limits"
+
+    @contextmanager
+    def admit(self, step, host=''):
+        """Hold a call until it may go out, then learn from how it went.
+
+        A call made while another one of the same thread is admitted, such
+        as a bank lookup inside a submission, is let through at once.
+
+        Args:
+            step (str): Step of the call, latencies are compared per step
+            host (str): Host the call goes to, selects its rate limit
+        """
+        if getattr(_local, 'admitted', False):
+            yield
+            return
+
+        if self.source_rate:
+            self._bucket(SOURCE, self.source_rate).acquire()
+        if self.host_rate and host:
+            self._bucket(host, self.host_rate).acquire()
+        started = self.limit.acquire() if self.limit else None
+
+        _local.admitted = True
+        overloaded = False
+        try:
+            yield
+        except Exception as e:
+            overloaded = is_retryable(e)
+            raise
+        finally:
+            _local.admitted = False
+            if self.limit:
+                before = int(self.limit.limit)
+                reason = self.limit.release(step, started, overloaded)
+                if int(self.limit.limit) != before:
+                    logger.info(f"Admission limit {before} -> {int(self.limit.limit)}"
+                                f"{f' after {reason}' if reason else ''}: {self.describe()}")
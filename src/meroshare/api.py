@@ -0,0 +1,478 @@
+"""
+Meroshare client implementation talking directly to the JSON backend.
+
+This is the same API the Meroshare Angular app calls, so no browser is needed.
+"""
+
+import logging
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from meroshare.bank_cache import discover_bank_account
+from meroshare.errors import SessionExpired
+from meroshare.ledger import APPLIED, LedgerEntry, account_key
+from meroshare.resilience import NO_RETRY, hedge, is_retryable, is_safe_to_resend
+from meroshare.session_store import StoredSession
+from models.ipo import ApplyResult, ApplyStatus, Issue, select_issues
+from utils.logs import log_context
+from utils.metrics import record_applications
+from utils.profiling import span, traced
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://webbackend.cdsc.com.np/api/meroShare/"
+WEB_ORIGIN = "https://meroshare.cdsc.com.np"
+
+DEFAULT_KITTA = 10
+
+APPLICABLE_ISSUE_QUERY = {
+    "filterFieldParams": [
+        {"key": "companyIssue.companyISIN.script", "alias": "Scrip"},
+        {"key": "companyIssue.companyISIN.company.name", "alias": "Company Name"},
+        {"key": "companyIssue.assignedToClient.name", "value": "", "alias": "Issue Manager"},
+    ],
+    "page": 1,
+    "size": 20,
+    "searchRoleViewConstants": "VIEW_APPLICABLE_SHARE",
+    "filterDateParams": [
+        {"key": "minIssueOpenDate", "condition": "", "alias": "", "value": ""},
+        {"key": "maxIssueCloseDate", "condition": "", "alias": "", "value": ""},
+    ],
+}
+
+APPLICATION_REPORT_QUERY = {
+    "filterFieldParams": [
+        {"key": "companyShare.companyIssue.companyISIN.script", "alias": "Scrip"},
+        {"key": "companyShare.companyIssue.companyISIN.company.name", "alias": "Company Name"},
+    ],
+    "page": 1,
+    "size": 200,
+    "searchRoleViewConstants": "VIEW_APPLICANT_FORM_COMPLETE",
+    "filterDateParams": [
+        {"key": "appliedDate", "condition": "", "alias": "", "value": ""},
+        {"key": "appliedDate", "condition": "", "alias": "", "value": ""},
+    ],
+}
+
+
+class MeroshareAPIClient:
+    """Client for interacting with Meroshare platform over plain HTTP."""
+
+    # Label of this backend in metrics
+    backend = 'http'
+
+    def __init__(self, username, password, dp_id, crn, transaction_pin, headless=True,
+                 base_url=API_URL, pool_size=10, timeout=30, session_store=None, ledger=None,
+                 bank_cache=None, retry_policy=None, hedge_after=None, adapter=None):
+        """Initialize the Meroshare API client.
+
+        Args:
+            username (str): Meroshare username
+            password (str): Meroshare password
+            dp_id (str): DP ID number
+            crn (str): Customer Reference Number
+            transaction_pin (str): Transaction PIN used to confirm applications
+            headless (bool): Accepted for parity with MeroshareClient, unused
+            base_url (str): Root of the Meroshare JSON API
+            pool_size (int): Maximum number of pooled keep-alive connections
+            timeout (float): Per-request timeout in seconds
+            session_store (SessionStore): Reuse a saved login when it is still valid
+            ledger (Ledger): Skip issues recorded as applied and record new applications
+            bank_cache (BankCache): Reuse the bank account looked up in an earlier run
+            retry_policy (RetryPolicy): Retries transient failures, by default none are
+            hedge_after (float): Send a second copy of a slow read after this many seconds
+            adapter (HTTPAdapter): Connection pool shared with other clients, left open on close
+        """
+        self.username = username
+        self.password = password
+        self.dp_id = dp_id
+        self.crn = crn
+        self.transaction_pin = transaction_pin
+        self.headless = headless
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session_store = session_store
+        self.ledger = ledger
+        self.bank_cache = bank_cache
+        self.retry_policy = retry_policy or NO_RETRY
+        self.hedge_after = hedge_after
+        self.adapter = adapter
+        self.bank_account = None
+        self.session = None
+        self.token = None
+        self.own_detail = None
+        self.issues = None
+
+    def _setup_session(self):
+        """Set up a pooled requests session with the headers the web app sends."""
+        session = requests.Session()
+        adapter = self.adapter or HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept': 'application/json, text/plain, */*',
+            'Content-Type': 'application/json',
+            'Origin': WEB_ORIGIN,
+            'Referer': f'{WEB_ORIGIN}/',
+        })
+        self.session = session
+
+    def _request(self, method, path, step='navigate', idempotent=True, **kwargs):
+        """Send a request to the API and return the decoded JSON body.
+
+        Args:
+            step (str): Step the request belongs to, selects its retry deadline
+            idempotent (bool): Whether sending it twice is harmless. Other
+                requests are only resent when they certainly were not processed.
+        """
+        def send():
+            return self._send(method, path, **kwargs)
+
+        def call():
+            if idempotent and self.hedge_after is not None:
+                return hedge(send, self.hedge_after)
+            return send()
+        return self.retry_policy.run(
+            step, call, retryable=is_retryable if idempotent else is_safe_to_resend,
+            host=urlsplit(self.base_url).netloc)
+
+    def _send(self, method, path, **kwargs):
+        with span('http.request', method=method, path=path):
+            response = self.session.request(
+                method, urljoin(self.base_url, path), timeout=self.timeout, **kwargs)
+        if response.status_code == 401 and self.token:
+            # Drop the stale token so the next login starts from scratch
+            self.token = None
+            self.session.headers.pop('Authorization', None)
+            raise SessionExpired(f"Session rejected by {path}")
+        response.raise_for_status()
+        if not response.content:
+            return None
+        return response.json()
+
+    def _client_id(self):
+        """Resolve the configured DP ID to the internal client id used by the API."""
+        for capital in self._request('GET', 'capital/', step='login'):
+            if str(capital['code']) == str(self.dp_id):
+                return capital['id']
+        raise ValueError(f"Unknown DP ID: {self.dp_id}")
+
+    @traced('login.restore_session')
+    def _restore_session(self):
+        """Reuse a stored token if one cheap request confirms it is still valid."""
+        stored = self.session_store.load(self.dp_id, self.username, self.password)
+        if not stored or not stored.token:
+            return False
+
+        self.session.headers['Authorization'] = stored.token
+        try:
+            self.own_detail = self._request('GET', 'ownDetail/', step='login')
+        except (requests.HTTPError, SessionExpired):
+            logger.info("Stored session has expired, logging in again")
+            self.session.headers.pop('Authorization', None)
+            self.session_store.delete(self.dp_id, self.username)
+            return False
+
+        self.token = stored.token
+        logger.info("Restored stored Meroshare session")
+        return True
+
+    @traced('login')
+    def login(self):
+        """Log in to Meroshare and keep the authorization token on the session."""
+        if not self.session:
+            self._setup_session()
+
+        if self.session_store and self._restore_session():
+            return
+
+        try:
+            client_id = self._client_id()
+            logger.info(f"Selected DP ID: {self.dp_id}")
+
+            token = self.retry_policy.run(
+                'login', self._authenticate, client_id, host=urlsplit(self.base_url).netloc)
+            self.token = token
+            self.session.headers['Authorization'] = token
+            logger.info("Successfully logged in to Meroshare")
+
+            if self.session_store:
+                self.session_store.save(
+                    self.dp_id, self.username, self.password, StoredSession(token=token))
+
+        except Exception as e:
+            logger.error(f"Failed to login: {str(e)}")
+            self.close()
+            raise
+
+    def _authenticate(self, client_id):
+        """Exchange the credentials for an authorization token."""
+        response = self.session.post(
+            urljoin(self.base_url, 'auth/'),
+            json={
+                'clientId': client_id,
+                'username': self.username,
+                'password': self.password,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        token = response.headers.get('Authorization')
+        if not token:
+            raise Exception("Login response did not contain an authorization token")
+        return token
+
+    @traced('navigate')
+    def navigate(self, element):
+        """Load the data behind a Meroshare section.
+
+        Args:
+            element (str): The section to load (e.g., 'asba')
+        """
+        if not self.token:
+            raise Exception("Session not authenticated. Please login first.")
+
+        try:
+            if element.lower() == 'asba':
+                if self.own_detail is None:
+                    self.own_detail = self._request('GET', 'ownDetail/')
+                logger.info("Navigated to My ASBA section")
+            else:
+                raise ValueError(f"Unknown navigation element: {element}")
+
+        except Exception as e:
+            logger.error(f"Failed to navigate to {element}: {str(e)}")
+            raise
+
+    @traced('getAvailableIPOS')
+    def getAvailableIPOS(self):
+        """Return the open ordinary-share IPO issues."""
+        if not self.token:
+            raise Exception("Session not authenticated. Please login first.")
+
+        try:
+            issues = [issue for issue in self.poll_issues() if issue.is_ordinary_ipo]
+
+            logger.info("------------------------------------------")
+            for index, issue in enumerate(issues, start=1):
+                logger.info(f"{index}. {issue.company_name}")
+            logger.info("------------------------------------------")
+
+            return issues
+
+        except Exception as e:
+            logger.error(f"Failed to get IPOs: {e}")
+            raise
+
+    @traced('poll')
+    def poll_issues(self):
+        """Fetch the current listing with a single request, without logging it.
+
+        Returns:
+            Every listed Issue, not only ordinary-share IPOs
+        """
+        if not self.token:
+            raise Exception("Session not authenticated. Please login first.")
+
+        listing = self._request(
+            'POST', 'companyShare/applicableIssue/', step='listing', json=APPLICABLE_ISSUE_QUERY)
+        self.issues = [
+            Issue.from_api(data, index) for index, data in enumerate(listing.get('object', []))
+        ]
+        return self.issues
+
+    @traced('applyAvailableIPOS')
+    def applyAvailableIPOS(self, pattern=None):
+        """Apply for every open ordinary-share IPO in a single session.
+
+        Args:
+            pattern (str): Only apply for issues whose name or scrip matches
+                this case-insensitive regular expression
+
+        Returns:
+            List of ApplyResult, one per selected issue
+        """
+        if not self.token:
+            raise Exception("Session not authenticated. Please login first.")
+
+        if self.issues is None:
+            self.getAvailableIPOS()
+
+        selected = select_issues(self.issues, pattern)
+        if pattern and not selected:
+            logger.warning(f"No open IPO matches '{pattern}'")
+
+        known = self.ledger.applied(self._ledger_account) if self.ledger else set()
+        results = []
+        for issue in selected:
+            if issue.key in known:
+                logger.info(f"Ledger shows {issue.company_name} as applied, skipping.")
+                results.append(ApplyResult(issue, ApplyStatus.SKIPPED, "Already applied (ledger)"))
+                continue
+            if not issue.can_apply:
+                logger.info(f"Already Applied to {issue.company_name}, skipping.")
+                results.append(ApplyResult(issue, ApplyStatus.SKIPPED, "Already applied"))
+                continue
+
+            with log_context(issue=issue.key):
+                try:
+                    self.fillApplyForm(issue)
+                    results.append(ApplyResult(issue, ApplyStatus.APPLIED))
+                except Exception as e:
+                    results.append(ApplyResult(issue, ApplyStatus.FAILED, str(e)))
+
+        # The listing changes once applications are submitted
+        self.issues = None
+        record_applications(results, self.backend)
+        return results
+
+    @traced('fillApplyForm')
+    def fillApplyForm(self, issue):
+        """Submit an application for a single issue.
+
+        Args:
+            issue (Issue): An entry returned by getAvailableIPOS
+        """
+        if not self.token:
+            raise Exception("Session not authenticated. Please login first.")
+
+        try:
+            if self.own_detail is None:
+                self.own_detail = self._request('GET', 'ownDetail/', step='apply')
+
+            account = self._bank_account()
+
+            demat = self.own_detail['demat']
+            form = {
+                'demat': demat,
+                'boid': demat[-8:],
+                'accountNumber': account.account_number,
+                'customerId': account.customer_id,
+                'accountBranchId': account.branch_id,
+                'accountTypeId': account.account_type_id,
+                'appliedKitta': str(DEFAULT_KITTA),
+                'crnNumber': self.crn,
+                'transactionPIN': self.transaction_pin,
+                'companyShareId': issue.issue_id,
+                'bankId': str(account.bank_id),
+            }
+            try:
+                self._request('POST', 'applicantForm/share/apply', step='apply', idempotent=False,
+                              json=form)
+            except Exception as e:
+                if not is_retryable(e):
+                    if isinstance(e, requests.HTTPError):
+                        # The cached account may have been closed or relinked
+                        self._forget_bank_account()
+                    raise
+                # The response got lost, the application may still have landed
+                if not self._landed(issue):
+                    raise
+                logger.info(f"Application for {issue.company_name} "
+                            f"landed despite {e.__class__.__name__}")
+            logger.info(f"Applied for {issue.company_name}")
+
+            if self.ledger:
+                self.ledger.record(self._ledger_account, LedgerEntry(
+                    issue.key, issue.company_name, APPLIED, DEFAULT_KITTA))
+
+        except Exception as e:
+            logger.error(f"Failed to submit application: {e}")
+            raise
+
+    def _landed(self, issue):
+        """Check the listing for an application whose response was lost."""
+        try:
+            listing = self._request('POST', 'companyShare/applicableIssue/', step='listing',
+                                    json=APPLICABLE_ISSUE_QUERY)
+        except Exception as e:
+            logger.warning(f"Could not confirm the application for {issue.company_name}: {e}")
+            return False
+        for data in listing.get('object', []):
+            if str(data.get('companyShareId')) == str(issue.issue_id):
+                return not Issue.from_api(data).can_apply
+        return False
+
+    def _bank_account(self):
+        """Return the bank account to pay from, looking it up at most once."""
+        if self.bank_account is None and self.bank_cache:
+            self.bank_account = self.bank_cache.load(self.dp_id, self.username, self.password)
+        if self.bank_account is None:
+            self.bank_account = discover_bank_account(
+                self._request('GET', 'bank/', step='apply'),
+                lambda bank_id: self._request('GET', f'bank/{bank_id}', step='apply'),
+                wanted=self.crn)
+            logger.info(f"Paying from {self.bank_account.bank_name}")
+            if self.bank_cache:
+                self.bank_cache.save(self.dp_id, self.username, self.password, self.bank_account)
+        return self.bank_account
+
+    def _forget_bank_account(self):
+        self.bank_account = None
+        if self.bank_cache:
+            self.bank_cache.delete(self.dp_id, self.username)
+
+    @property
+    def _ledger_account(self):
+        return account_key(self.dp_id, self.username)
+
+    @traced('application_report')
+    def application_report(self):
+        """Return every application listed in the account's application report.
+
+        Returns:
+            List of LedgerEntry, one per application
+        """
+        return [LedgerEntry.from_report(data) for data in self.application_rows()]
+
+    def application_rows(self):
+        """Return the raw entries of the application report."""
+        if not self.token:
+            raise Exception("Session not authenticated. Please login first.")
+
+        report = self._request(
+            'POST', 'applicantForm/active/search/', step='listing', json=APPLICATION_REPORT_QUERY)
+        return report.get('object', [])
+
+    @traced('allotment')
+    def allotment(self, form_id):
+        """Return the detail of one application, including its allotment status.
+
+        Args:
+            form_id (int): applicantFormId of an application report entry
+        """
+        if not self.token:
+            raise Exception("Session not authenticated. Please login first.")
+
+        return self._request('GET', f'applicantForm/report/detail/{form_id}', step='listing')
+
+    @traced('reconcile')
+    def reconcile(self):
+        """Replace the account's ledger with the site's application report.
+
+        Returns:
+            The LedgerEntry list now stored for the account
+        """
+        if not self.ledger:
+            raise Exception("No ledger configured")
+
+        entries = self.application_report()
+        self.ledger.replace(self._ledger_account, entries)
+        logger.info(f"Ledger now holds {len(entries)} application(s)")
+        return entries
+
+    @traced('close')
+    def close(self):
+        """Close the HTTP session and drop the authorization token."""
+        if self.session:
+            # A shared adapter keeps its connections for the other clients
+            if not self.adapter:
+                self.session.close()
+            self.session = None
+        self.token = None
+        self.own_detail = None
+        self.issues = None
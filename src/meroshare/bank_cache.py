@@ -0,0 +1,116 @@
+"""
+Per-account cache of the bank account used to pay for applications.
+
+Looking up the linked bank and its accounts takes two requests, or two
+dropdown round trips in the browser, and the answer rarely changes. It is
+looked up once, then kept on disk, encrypted like stored sessions, until
+it expires or an application made with it fails.
+"""
+
+import os
+import time
+from dataclasses import asdict, dataclass
+
+from meroshare.session_store import EncryptedStore
+
+BANK_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ipo_automate', 'banks')
+
+
+@dataclass(frozen=True, slots=True)
+class BankAccount:
+    """The bank account an application is paid from.
+
+    Attributes:
+        bank_id (int): Meroshare id of the bank
+        bank_name (str): Name of the bank as shown in the form
+        account_number (str): Account number at the bank
+        customer_id (int): Meroshare id of the account
+        branch_id (int): Meroshare id of the account's branch
+        account_type_id (int): Meroshare id of the account type
+    """
+
+    bank_id: int
+    bank_name: str
+    account_number: str
+    customer_id: int = None
+    branch_id: int = None
+    account_type_id: int = None
+
+    @classmethod
+    def from_api(cls, bank, account):
+        """Build from a bank/ entry and one of its bank/{id} accounts."""
+        return cls(
+            bank_id=bank['id'],
+            bank_name=bank.get('name'),
+            account_number=account['accountNumber'],
+            customer_id=account.get('id'),
+            branch_id=account.get('accountBranchId'),
+            account_type_id=account.get('accountTypeId'),
+        )
+
+
+def discover_bank_account(banks, fetch_accounts, wanted=None):
+    """Pick the bank account to pay from.
+
+    The account whose number or id is ``wanted`` is taken. When none
+    matches and only one account is linked, that one is taken.
+
+    Args:
+        banks (list): Entries of the bank/ endpoint
+        fetch_accounts (callable): Returns the bank/{id} entries for a bank id
+        wanted (str): Account number or id of the configured account, e.g. the CRN
+
+    Returns:
+        BankAccount
+
+    Raises:
+        Exception: When no account is linked, or several are and none is ``wanted``
+    """
+    if not banks:
+        raise Exception("No bank linked to this account")
+    candidates = []
+    for bank in banks:
+        for account in fetch_accounts(bank['id']) or []:
+            if wanted and str(wanted) in (str(account.get('accountNumber')), str(account.get('id'))):
+                return BankAccount.from_api(bank, account)
+            candidates.append((bank, account))
+
+    if not candidates:
+        raise Exception(f"No account found for bank {', '.join(str(bank.get('name')) for bank in banks)}")
+    if len(candidates) > 1:
+        names = ', '.join(sorted({str(bank.get('name')) for bank, _ in candidates}))
+        raise Exception(f"{len(candidates)} bank accounts are linked ({names}) and none matches "
+                        f"the configured CRN, cannot tell which one to pay from")
+    return BankAccount.from_api(*candidates[0])
+
+
+class BankCache(EncryptedStore):
+    """Load and save the bank account of each Meroshare account.
+
+    Args:
+        directory (str): Where cache files are kept
+        ttl (float): Entries older than this many seconds are looked up again
+    """
+
+    suffix = '.bank'
+    label = 'bank cache entry'
+
+    def __init__(self, directory=BANK_DIR, ttl=7 * 24 * 3600):
+        super().__init__(directory)
+        self.ttl = ttl
+
+    def load(self, dp_id, username, password):
+        """Return the cached BankAccount, or None if missing or expired."""
+        entry = self._read(dp_id, username, password,
+                           lambda data: (data['saved_at'], BankAccount(**data['account'])))
+        if entry is None:
+            return None
+        saved_at, account = entry
+        if time.time() - saved_at > self.ttl:
+            self.delete(dp_id, username)
+            return None
+        return account
+
+    def save(self, dp_id, username, password, account):
+        """Encrypt and store a BankAccount, readable only by the current user."""
+        self._write(dp_id, username, password, {'saved_at': time.time(), 'account': asdict(account)})
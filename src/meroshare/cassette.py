@@ -0,0 +1,303 @@
+"""
+Record the traffic of a real run into a cassette and play it back offline.
+
+A cassette holds every HTTP exchange of the http backend, or every
+WebDriver command and response of the browser backend, as JSON lines,
+gzipped when the file name ends in ``.gz``. Credentials, tokens and
+account numbers are redacted before anything is written, and very long
+values such as screenshots are left out.
+
+Playing a cassette back answers each request with the next recorded
+response for the same method and path (or WebDriver command), either
+after the recorded server time or at once:
+
+    recorder = Recorder('incident.jsonl.gz', secrets=(password, pin))
+    client = MeroshareAPIClient(..., adapter=recorder.adapter())
+
+    player = Player('incident.jsonl.gz', timing='fast')
+    client = MeroshareAPIClient(..., adapter=player.adapter())
+
+No network or browser is needed to replay, so a captured incident can be
+profiled and turned into a regression benchmark.
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from meroshare.errors import ReplayMismatch
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+TIMINGS = ('recorded', 'fast')
+REDACTED = '<redacted>'
+
+# Keys whose values are never written, compared case-insensitively
+SECRET_KEYS = frozenset({
+    'authorization', 'token', 'password', 'username', 'transactionpin', 'crnnumber', 'demat',
+    'boid', 'accountnumber', 'customerid',
+})
+
+# Response headers worth keeping, the rest only make the cassette bigger
+KEPT_HEADERS = ('Content-Type', 'Authorization')
+
+# Longer strings, such as screenshots and page sources, are left out
+MAX_VALUE = 100_000
+
+# WebDriver commands answered without a recording
+UNRECORDED_COMMANDS = {'newSession': {'sessionId': 'replay', 'capabilities': {}}, 'quit': None}
+
+
+def _open(path, mode):
+    return gzip.open(path, mode + 't', encoding='utf-8') if path.endswith('.gz') \
+        else open(path, mode, encoding='utf-8')
+
+
+def _decode(body):
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body
+
+
+class Recorder:
+    """Appends every exchange of a client to a cassette, redacted.
+
+    Args:
+        path (str): Cassette file, appended to if it exists
+        secrets (iterable): Values to redact wherever they appear, such as
+            the password. Values of SECRET_KEYS, such as tokens and account
+            numbers, are added as they are seen.
+    """
+
+    replaying = False
+
+    def __init__(self, path, secrets=()):
+        self.path = path
+        self.secrets = {str(secret) for secret in secrets if secret and len(str(secret)) > 2}
+        self._file = None
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def redact(self, value):
+        """Return ``value`` with secret keys, secret values and huge strings replaced."""
+        if isinstance(value, dict):
+            redacted = {}
+            for key, item in value.items():
+                if str(key).lower() in SECRET_KEYS and item is not None:
+                    if isinstance(item, (str, int)) and len(str(item)) > 2:
+                        self.secrets.add(str(item))
+                    redacted[key] = REDACTED
+                else:
+                    redacted[key] = self.redact(item)
+            return redacted
+        if isinstance(value, (list, tuple)):
+            return [self.redact(item) for item in value]
+        if isinstance(value, str):
+            if len(value) > MAX_VALUE:
+                return f"<{len(value)} characters left out>"
+            for secret in self.secrets:
+                value = value.replace(secret, REDACTED)
+        return value
+
+    def record(self, kind, key, request, response, elapsed):
+        """Write one exchange.
+
+        Args:
+            kind (str): 'http' or 'webdriver'
+            key (str): What replay matches on, e.g. 'GET /api/bank/' or a command name
+            elapsed (float): Seconds the server took to answer
+        """
+        with self._lock:
+            # The response first, it may hold secrets the request repeats
+            response = self.redact(response)
+            if self._file is None:
+                self._file = _open(self.path, 'a')
+                self._write({'cassette': VERSION, 'recorded': time.strftime('%Y-%m-%dT%H:%M:%S%z')})
+            self._write({
+                'at': round(time.monotonic() - self._started, 4), 'kind': kind, 'key': key,
+                'elapsed': round(elapsed, 4), 'request': self.redact(request), 'response': response,
+            })
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def adapter(self, pool_maxsize=10):
+        """An HTTP adapter that records every exchange it sends."""
+        return RecordingAdapter(self, pool_maxsize=pool_maxsize)
+
+    def attach(self, driver):
+        """Record every command ``driver`` sends from now on."""
+        if not isinstance(driver.command_executor, RecordingExecutor):
+            driver.command_executor = RecordingExecutor(driver.command_executor, self)
+
+    def detach(self, driver):
+        """Stop recording ``driver``, e.g. before it goes back to a pool."""
+        if isinstance(driver.command_executor, RecordingExecutor):
+            driver.command_executor = driver.command_executor.executor
+
+    def close(self):
+        """Flush the cassette. Recording again later appends to it."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Sends requests like HTTPAdapter and writes each exchange to a Recorder."""
+
+    def __init__(self, recorder, **kwargs):
+        super().__init__(pool_connections=1, **kwargs)
+        self.recorder = recorder
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        elapsed = time.perf_counter() - start
+        self.recorder.record(
+            'http', f"{request.method} {urlsplit(request.url).path}",
+            {'body': _decode(request.body)},
+            {'status': response.status_code,
+             'headers': {name: response.headers[name] for name in KEPT_HEADERS
+                         if name in response.headers},
+             'body': _decode(response.content) if response.content else None},
+            elapsed)
+        return response
+
+
+class RecordingExecutor:
+    """Wraps a WebDriver command executor and writes each command to a Recorder."""
+
+    def __init__(self, executor, recorder):
+        self.executor = executor
+        self.recorder = recorder
+
+    def execute(self, command, params):
+        start = time.perf_counter()
+        response = self.executor.execute(command, params)
+        params = {key: value for key, value in (params or {}).items() if key != 'sessionId'}
+        if command == 'sendKeysToElement':
+            # Typed one character per item, too short to find as a secret later
+            params = {**params, 'text': REDACTED, 'value': [REDACTED]}
+        self.recorder.record('webdriver', command, params, response, time.perf_counter() - start)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.executor, name)
+
+
+class Player:
+    """Answers requests from a cassette instead of the network.
+
+    Each request gets the next unused response recorded for its key, so
+    the order of requests with different keys may change between runs.
+
+    Args:
+        path (str): Cassette file written by a Recorder
+        timing (str): 'recorded' waits as long as the server took, 'fast' does not wait
+    """
+
+    replaying = True
+
+    def __init__(self, path, timing='recorded', sleep=time.sleep):
+        if timing not in TIMINGS:
+            raise ValueError(f"Unknown replay timing: {timing}")
+        self.path = path
+        self.timing = timing
+        self._sleep = sleep
+        self._entries = defaultdict(deque)
+        self._lock = threading.Lock()
+        with _open(path, 'r') as f:
+            for line in f:
+                entry = json.loads(line)
+                if 'cassette' not in entry:
+                    self._entries[(entry['kind'], entry['key'])].append(entry)
+        logger.info(f"Replaying {self.remaining()} exchange(s) from {path} ({timing} timing)")
+
+    def remaining(self):
+        """Number of recorded exchanges not played back yet."""
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    def next(self, kind, key):
+        """Return the next recorded exchange for ``key``, after its recorded time if asked.
+
+        Raises:
+            ReplayMismatch: When nothing more is recorded for ``key``
+        """
+        with self._lock:
+            entries = self._entries.get((kind, key))
+            if not entries:
+                raise ReplayMismatch(f"Nothing recorded for {key} in {self.path}")
+            entry = entries.popleft()
+        if self.timing == 'recorded':
+            self._sleep(entry['elapsed'])
+        return entry
+
+    def adapter(self, pool_maxsize=10):
+        """An HTTP adapter that answers from the cassette."""
+        return ReplayAdapter(self)
+
+    def driver(self):
+        """A WebDriver whose commands are answered from the cassette."""
+        from selenium import webdriver
+
+        return webdriver.Remote(command_executor=ReplayExecutor(self), options=webdriver.ChromeOptions())
+
+    def close(self):
+        pass
+
+
+class ReplayAdapter(BaseAdapter):
+    """An HTTP adapter that answers every request from a Player."""
+
+    def __init__(self, player):
+        super().__init__()
+        self.player = player
+
+    def send(self, request, **kwargs):
+        recorded = self.player.next('http', f"{request.method} {urlsplit(request.url).path}")
+        response = requests.Response()
+        response.status_code = recorded['response']['status']
+        response.headers.update(recorded['response']['headers'])
+        body = recorded['response']['body']
+        response._content = b'' if body is None else (
+            body.encode() if isinstance(body, str) else json.dumps(body).encode())
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        return response
+
+    def close(self):
+        pass
+
+
+class ReplayExecutor:
+    """A WebDriver command executor that answers every command from a Player."""
+
+    def __init__(self, player):
+        self.player = player
+
+    def execute(self, command, params):
+        try:
+            return self.player.next('webdriver', command)['response']
+        except ReplayMismatch:
+            if command in UNRECORDED_COMMANDS:
+                return {'value': UNRECORDED_COMMANDS[command]}
+            raise
+
+    def close(self):
+        pass
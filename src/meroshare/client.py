@@ -4,26 +4,301 @@ Meroshare client implementation using Selenium for browser automation.
 
 import logging
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+from dataclasses import replace
+from urllib.parse import urlsplit
+
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.core.os_manager import ChromeType
-import tempfile
 
 from selenium.common.exceptions import ElementClickInterceptedException
 
+from meroshare.api import (
+    API_URL, APPLICABLE_ISSUE_QUERY, APPLICATION_REPORT_QUERY, DEFAULT_KITTA, WEB_ORIGIN,
+)
+from meroshare.bank_cache import discover_bank_account
+from meroshare.diagnostics import captured
+from meroshare.driver_pool import launch_driver, remove_profile_dir
+from meroshare.errors import ServerBusy, SessionExpired
+from meroshare.ledger import APPLIED, LedgerEntry, account_key
+from meroshare.resilience import NO_RETRY, RETRYABLE_STATUS
+from meroshare.session_store import StoredSession
+from meroshare.waits import wait_for
+from models.ipo import ApplyResult, ApplyStatus, Issue, select_issues
+from utils.logs import log_context
+from utils.metrics import record_applications
+from utils.profiling import span, traced
+
 logger = logging.getLogger(__name__)
 
+TOKEN_KEY = 'Authorization'
+
+READ_STORAGE_JS = """
+const dump = (storage) => {
+    const items = {};
+    for (let i = 0; i < storage.length; i++) {
+        const key = storage.key(i);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+};
+return [dump(window.localStorage), dump(window.sessionStorage)];
+"""
+
+WRITE_STORAGE_JS = """
+const [local, session] = arguments;
+for (const [key, value] of Object.entries(local)) { window.localStorage.setItem(key, value); }
+for (const [key, value] of Object.entries(session)) { window.sessionStorage.setItem(key, value); }
+"""
+
+EXTRACT_ISSUES_JS = """
+const text = (row, tooltip) => {
+    const span = row.querySelector(`span[tooltip='${tooltip}']`);
+    return span ? span.textContent.trim() : null;
+};
+return Array.from(document.querySelectorAll('div.company-list')).map((row, index) => {
+    const button = row.querySelector('button.btn-issue');
+    return {
+        index: index,
+        companyName: text(row, 'Company Name'),
+        subGroup: text(row, 'Sub Group'),
+        scrip: text(row, 'Scrip'),
+        shareType: text(row, 'Share Type'),
+        shareGroup: text(row, 'Share Group'),
+        button: button ? button.textContent.trim() : null,
+        enabled: button ? !button.disabled && button.offsetParent !== null : false,
+    };
+});
+"""
+
+# Matches a listing row on its scrip, share group and sub group, since
+# sibling issues of one company share the scrip
+ROW_MATCHES_JS = """
+const rowMatches = (row, [scrip, shareGroup, subGroup]) => {
+    const text = (tooltip) => {
+        const span = row.querySelector(`span[tooltip='${tooltip}']`);
+        return span ? span.textContent.trim() : null;
+    };
+    return text('Scrip') === scrip && (!shareGroup || text('Share Group') === shareGroup)
+        && (!subGroup || text('Sub Group') === subGroup);
+};
+"""
+
+# Clicks Apply on the row at an index, unless the listing moved and another issue is there
+CLICK_APPLY_JS = ROW_MATCHES_JS + """
+const row = document.querySelectorAll('div.company-list')[arguments[0]];
+if (!row || !rowMatches(row, arguments[1])) {
+    return false;
+}
+const button = Array.from(row.querySelectorAll('button.btn-issue'))
+    .find((candidate) => candidate.textContent.trim() === 'Apply');
+if (!button || button.disabled) {
+    return false;
+}
+button.scrollIntoView({block: 'center'});
+button.click();
+return true;
+"""
+
+CHECK_TOKEN_JS = """
+const [url, token, done] = arguments;
+fetch(url, {headers: {'Authorization': token}})
+    .then((response) => done(response.status))
+    .catch(() => done(0));
+"""
+
+SEARCH_JS = """
+const [url, query, key, done] = arguments;
+const token = window.localStorage.getItem(key) || window.sessionStorage.getItem(key);
+if (!token) {
+    done({status: 0, object: null});
+    return;
+}
+fetch(url, {
+    method: 'POST',
+    headers: {'Authorization': token, 'Content-Type': 'application/json'},
+    body: JSON.stringify(query),
+})
+    .then((response) => response.ok
+        ? response.json().then((body) => done({status: response.status, object: body.object || []}))
+        : done({status: response.status, object: null}))
+    .catch(() => done({status: 0, object: null}));
+"""
+
+
+API_GET_JS = """
+const [url, key, done] = arguments;
+const token = window.localStorage.getItem(key) || window.sessionStorage.getItem(key);
+if (!token) {
+    done({status: 0, body: null});
+    return;
+}
+fetch(url, {headers: {'Authorization': token}})
+    .then((response) => response.ok
+        ? response.json().then((body) => done({status: response.status, body: body}))
+        : done({status: response.status, body: null}))
+    .catch(() => done({status: 0, body: null}));
+"""
+
+# Helpers of the form scripts below, which define ``timeout`` first. fillForm
+# fills the whole application form and submits it. Options are chosen by
+# selectedIndex plus a change event, which works for [value] and [ngValue]
+# bound selects alike. With no known value the first real option is taken.
+FORM_HELPERS_JS = """
+const deadline = Date.now() + timeout;
+const wanted = (option, values) => {
+    const known = values.filter((value) => value !== null && value !== undefined).map(String);
+    if (!known.length) {
+        return option.value !== '' && !option.disabled;
+    }
+    const text = option.textContent.trim();
+    return known.some((value) =>
+        option.value === value || option.value.endsWith(': ' + value) || text === value);
+};
+const until = (find, label) => new Promise((resolve, reject) => {
+    const tick = () => {
+        const found = find();
+        if (found) {
+            resolve(found);
+        } else if (Date.now() > deadline) {
+            reject(new Error('Timed out waiting for ' + label));
+        } else {
+            setTimeout(tick, 25);
+        }
+    };
+    tick();
+});
+const option = (id, values) => () => {
+    const select = document.getElementById(id);
+    const index = select ? Array.from(select.options).findIndex((o) => wanted(o, values)) : -1;
+    return index < 0 ? null : [select, index];
+};
+const choose = ([select, index]) => {
+    select.selectedIndex = index;
+    select.dispatchEvent(new Event('change', {bubbles: true}));
+};
+const type = (id, value) => {
+    const input = document.getElementById(id);
+    input.value = value;
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+};
+const formFor = (company) => {
+    // The text around the form, without any listing rows still on the page
+    const form = document.getElementById('selectBank').closest('form');
+    const scope = (form && form.parentElement) || document.body;
+    let text = scope.textContent;
+    scope.querySelectorAll('div.company-list').forEach((row) => {
+        text = text.replace(row.textContent, '');
+    });
+    return !company || text.includes(company);
+};
+const fillForm = (bank, account, kitta, crn, company) =>
+    until(option('selectBank', bank), 'the bank option')
+        .then((found) => {
+            if (!formFor(company)) {
+                throw new Error('The open form is not for ' + company);
+            }
+            return found;
+        })
+        .then((found) => {
+            choose(found);
+            return until(option('accountNumber', account), 'the account option');
+        })
+        .then((found) => {
+            choose(found);
+            type('appliedKitta', kitta);
+            type('crnNumber', crn);
+            const disclaimer = document.getElementById('disclaimer');
+            if (!disclaimer.checked) {
+                disclaimer.click();
+            }
+            return until(() => {
+                const button = document.querySelector("button.btn.btn-gap.btn-primary[type='submit']");
+                return button && !button.disabled && button;
+            }, 'the submit button');
+        })
+        .then((button) => button.click());
+const confirmation = () =>
+    until(() => document.querySelector('.toast-message, .toast'), 'the confirmation')
+        .then((toast) => {
+            const message = toast.textContent.trim();
+            const failed = toast.closest('.toast-error, .toast-warning');
+            return {error: failed ? message : null, message: message};
+        });
+"""
+
+# Fills and submits the open application form in one call
+FILL_FORM_JS = """
+const [bank, account, kitta, crn, company, timeout, done] = arguments;
+""" + FORM_HELPERS_JS + """
+fillForm(bank, account, kitta, crn, company)
+    .then(() => done(null))
+    .catch((error) => done(error.message));
+"""
+
+# Waits for the toast that accepts or refuses a submitted PIN, null once accepted
+CONFIRMATION_JS = """
+const [timeout, done] = arguments;
+""" + FORM_HELPERS_JS + """
+confirmation()
+    .then((outcome) => done(outcome.error))
+    .catch((error) => done(error.message));
+"""
+
+# Applies for one issue from the listing without blocking WebDriver: opens
+# the form, fills it, submits the PIN and waits for the confirmation toast.
+# The outcome is left in window.__meroshareApply for _poll_tabs to collect.
+PIPELINE_APPLY_JS = """
+const [scrip, shareGroup, subGroup, company, index, bank, account, kitta, crn, pin, timeout] = arguments;
+""" + FORM_HELPERS_JS + ROW_MATCHES_JS + """
+const finish = (outcome) => { window.__meroshareApply = outcome; };
+finish({done: false});
+const applyButton = () => {
+    const rows = Array.from(document.querySelectorAll('div.company-list'));
+    const row = scrip
+        ? rows.find((candidate) => rowMatches(candidate, [scrip, shareGroup, subGroup]))
+        : rows[index];
+    const button = row && Array.from(row.querySelectorAll('button.btn-issue'))
+        .find((candidate) => candidate.textContent.trim() === 'Apply');
+    return button && !button.disabled && button;
+};
+until(applyButton, 'the Apply button')
+    .then((button) => {
+        button.click();
+        return fillForm(bank, account, kitta, crn, company);
+    })
+    .then(() => until(() => document.getElementById('transactionPIN'), 'the PIN input'))
+    .then((input) => {
+        input.value = pin;
+        input.dispatchEvent(new Event('input', {bubbles: true}));
+        return until(() => Array.from(document.querySelectorAll('button:not(.btn-issue)'))
+            .find((button) => button.textContent.trim() === 'Apply' && !button.disabled),
+            'the PIN Apply button');
+    })
+    .then((button) => {
+        button.click();
+        return confirmation();
+    })
+    .then((outcome) => finish({done: true, ...outcome}))
+    .catch((error) => finish({done: true, error: error.message}));
+"""
+
+READ_OUTCOME_JS = "return window.__meroshareApply || null;"
+
 
 class MeroshareClient:
     """Client for interacting with Meroshare platform using Selenium."""
 
-    def __init__(self, username, password, dp_id, crn, transaction_pin,  headless=True):
+    # Label of this backend in metrics
+    backend = 'browser'
+    # Seconds one tab may take from opening the form to the confirmation
+    PIPELINE_TIMEOUT = 60
+    # Seconds between two rounds of polling the open tabs
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, username, password, dp_id, crn, transaction_pin,  headless=True,
+                 driver_pool=None, session_store=None, lean=False, base_url=WEB_ORIGIN,
+                 api_url=API_URL, ledger=None, bank_cache=None, retry_policy=None,
+                 diagnostics=None, tabs=1, cassette=None):
         """Initialize the Meroshare client.
 
         Args:
@@ -32,6 +307,19 @@ class MeroshareClient:
             dp_id (str): DP ID number
             crn (str): Customer Reference Number
             headless (bool): Whether to run browser in headless mode
+            driver_pool (DriverPool): Borrow a warm browser instead of launching one,
+                or a BrowserContextPool to bind to a context of a shared browser
+            session_store (SessionStore): Reuse a saved login when it is still valid
+            lean (bool): Block images, fonts, media and trackers in the browser
+            base_url (str): Origin of the Meroshare web app
+            api_url (str): Root of the JSON API the web app talks to
+            ledger (Ledger): Skip issues recorded as applied and record new applications
+            bank_cache (BankCache): Reuse the bank account looked up in an earlier run
+            retry_policy (RetryPolicy): Retries transient failures, by default none are
+            diagnostics (FailureCapture): Stores the browser state of failed steps
+            tabs (int): Apply for up to this many issues at once, each in its own tab
+            cassette (Recorder or Player): Record every WebDriver command, or
+                replay recorded ones instead of starting a browser
         """
         self.username = username
         self.password = password
@@ -39,109 +327,167 @@ class MeroshareClient:
         self.crn = crn
         self.transaction_pin = transaction_pin
         self.headless = headless
+        self.driver_pool = driver_pool
+        self.session_store = session_store
+        self.lean = lean
+        self.base_url = base_url.rstrip('/')
+        self.api_url = api_url if api_url.endswith('/') else api_url + '/'
+        self.ledger = ledger
+        self.bank_cache = bank_cache
+        self.retry_policy = retry_policy or NO_RETRY
+        self.diagnostics = diagnostics
+        self.tabs = max(1, tabs)
+        # Handles of the tabs this client opened, the only ones it may close
+        self._tabs = set()
+        self.cassette = cassette
+        self.bank_account = None
         self.driver = None
+        self.issues = None
+        self._profile_dir = None
 
+    @traced('driver_start')
     def _setup_driver(self):
-        """Set up the Chrome WebDriver with appropriate options."""
-        chrome_options = Options()
-        temp_dir = tempfile.mkdtemp()
-        if self.headless:
-            chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--remote-debugging-port=9222')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument(f'--user-data-dir={temp_dir}')
-
-        # Use ChromeDriverManager with Chrome browser
-        driver_path = ChromeDriverManager(
-            chrome_type=ChromeType.CHROMIUM).install()
-        service = Service(driver_path)
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.driver.maximize_window()
+        """Set up the Chrome WebDriver, from the pool when one is configured."""
+        if self.cassette and self.cassette.replaying:
+            self.driver = self.cassette.driver()
+            return
+        if self.driver_pool:
+            self.driver = self.driver_pool.acquire()
+        else:
+            self.driver, self._profile_dir = launch_driver(self.headless, lean=self.lean)
+        if self.cassette:
+            self.cassette.attach(self.driver)
+
+    def _save_session(self):
+        """Capture cookies and web storage of the logged-in browser."""
+        local_storage, session_storage = self.driver.execute_script(READ_STORAGE_JS)
+        token = local_storage.get(TOKEN_KEY) or session_storage.get(TOKEN_KEY)
+        self.session_store.save(self.dp_id, self.username, self.password, StoredSession(
+            token=token,
+            cookies=self.driver.get_cookies(),
+            local_storage=local_storage,
+            session_storage=session_storage,
+        ))
+
+    @traced('login.restore_session')
+    def _restore_session(self):
+        """Load a stored session into the browser if it is still valid.
+
+        Returns:
+            True when the dashboard is reachable without logging in
+        """
+        stored = self.session_store.load(self.dp_id, self.username, self.password)
+        if not stored:
+            return False
+
+        # Storage and cookies can only be written once the origin is loaded
+        self.driver.get(f'{self.base_url}/#/login')
+        if stored.token:
+            status = self.driver.execute_async_script(
+                CHECK_TOKEN_JS, f'{self.api_url}ownDetail/', stored.token)
+            if status != 200:
+                logger.info("Stored session has expired, logging in again")
+                self.session_store.delete(self.dp_id, self.username)
+                return False
+
+        local_storage = dict(stored.local_storage)
+        if stored.token and TOKEN_KEY not in local_storage and TOKEN_KEY not in stored.session_storage:
+            # Saved by the http backend, which keeps nothing but the token
+            local_storage[TOKEN_KEY] = stored.token
+        self.driver.execute_script(WRITE_STORAGE_JS, local_storage, stored.session_storage)
+        for cookie in stored.cookies:
+            try:
+                self.driver.add_cookie(cookie)
+            except Exception:
+                continue
+
+        self.driver.get(f'{self.base_url}/#/dashboard')
+        self.driver.refresh()
+        try:
+            wait_for(self.driver, (By.CSS_SELECTOR, "i.msi.msi-logout.header-menu__icon"), 10)
+        except Exception:
+            logger.info("Stored session was rejected, logging in again")
+            self.session_store.delete(self.dp_id, self.username)
+            return False
 
+        logger.info("Restored stored Meroshare session")
+        return True
+
+    @traced('login')
+    @captured('login')
     def login(self):
         """Log in to Meroshare platform."""
         if not self.driver:
             self._setup_driver()
 
+        if self.session_store and self._restore_session():
+            return
+
         try:
-            # Navigate to login page
-            self.driver.get('https://meroshare.cdsc.com.np/#/login')
+            self.retry_policy.run('login', self._submit_login, host=urlsplit(self.base_url).netloc)
+            logger.info("Successfully logged in to Meroshare")
+
+            if self.session_store:
+                self._save_session()
+
+        except Exception as e:
+            logger.error(f"Failed to login: {str(e)}")
+            # The browser is kept for another attempt, callers close it
+            raise
+
+    def _submit_login(self):
+        """Fill and submit the login form, starting from a fresh page load."""
+        # Navigate to login page
+        with span('login.page_load'):
+            self.driver.get(f'{self.base_url}/#/login')
             logger.info("Navigated to Meroshare login page")
 
-            # Wait for the login form to be visible
-            # Increased timeout to 20 seconds
-            wait = WebDriverWait(self.driver, 60)
-
-            # Wait for the page to be fully loaded
-            wait.until(
-                EC.presence_of_element_located(
-                    (By.CLASS_NAME, "select2-selection__rendered"))
-            )
-
-            # Click on DP dropdown to open it
-            dp_dropdown = wait.until(
-                EC.element_to_be_clickable(
-                    (By.CLASS_NAME, "select2-selection__rendered"))
-            )
+            # Wait for the DP dropdown to become clickable
+            dp_dropdown = wait_for(
+                self.driver, (By.CLASS_NAME, "select2-selection__rendered"), 60, 'clickable')
+
+        with span('login.dp_select'):
             dp_dropdown.click()
             logger.info("Clicked on DP dropdown")
 
             # Wait for the search input to be visible and enter DP ID
-            search_input = wait.until(
-                EC.presence_of_element_located(
-                    (By.CLASS_NAME, "select2-search__field"))
-            )
+            search_input = wait_for(self.driver, (By.CLASS_NAME, "select2-search__field"), 60)
             search_input.clear()
             search_input.send_keys(self.dp_id)
             search_input.send_keys(Keys.ENTER)
             logger.info(f"Selected DP ID: {self.dp_id}")
 
+        with span('login.credentials'):
             # Enter username
-            username_field = wait.until(
-                EC.presence_of_element_located((By.NAME, "username"))
-            )
+            username_field = wait_for(self.driver, (By.NAME, "username"), 60)
             username_field.clear()
             username_field.send_keys(self.username)
             logger.info("Entered username")
 
             # Enter password
-            password_field = wait.until(
-                EC.presence_of_element_located((By.NAME, "password"))
-            )
+            password_field = wait_for(self.driver, (By.NAME, "password"), 60)
             password_field.clear()
             password_field.send_keys(self.password)
             logger.info("Entered password")
 
+        with span('login.submit'):
             # Click login button
-            login_button = wait.until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//button[contains(text(), 'Login')]"))
-            )
+            login_button = wait_for(
+                self.driver, (By.XPATH, "//button[contains(text(), 'Login')]"), 60, 'clickable')
             login_button.click()
             logger.info("Clicked login button")
 
             # Wait for successful login by checking for logout icon
-            wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "i.msi.msi-logout.header-menu__icon"))
-            )
-            logger.info("Successfully logged in to Meroshare")
-
-        except Exception as e:
-            logger.error(f"Failed to login: {str(e)}")
-            if self.driver:
-                self.driver.save_screenshot("login_error.png")
-                logger.info(
-                    "Saved screenshot of error state to login_error.png")
-                self.driver.quit()
-            raise
+            wait_for(self.driver, (By.CSS_SELECTOR, "i.msi.msi-logout.header-menu__icon"), 60)
 
+    @traced('navigate')
+    @captured('navigate')
     def navigate(self, element):
         """Navigate to a specific section in Meroshare.
 
+        Opening My ASBA while it is already open loads it again, so the
+        listing read next is always the current one.
+
         Args:
             element (str): The element to navigate to (e.g., 'asba', 'dashboard', etc.)
         """
@@ -149,29 +495,12 @@ class MeroshareClient:
             raise Exception("Browser not initialized. Please login first.")
 
         try:
-            wait = WebDriverWait(self.driver, 10)
             if element.lower() == 'asba':
-                # Wait for and click the My ASBA link
-                asba_link = wait.until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//a[@href='#/asba']"))
-                )
-                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", asba_link)
-                time.sleep(0.3)
-                try:
-                    asba_link.click()
-                except ElementClickInterceptedException:
-                    logger.info("Click intercepted, using JavaScript click instead")
-                    self.driver.execute_script("arguments[0].click();", asba_link)
+                self.retry_policy.run('navigate', self._open_asba, on_retry=self.driver.refresh,
+                                      host=urlsplit(self.base_url).netloc)
+                self.issues = None
 
-                
                 logger.info("Navigated to My ASBA section")
-
-                # # Wait for the ASBA page to load
-                # wait.until(
-                #     EC.presence_of_element_located((By.CLASS_NAME, "asba-container"))
-                # )
-                # return
             else:
                 raise ValueError(f"Unknown navigation element: {element}")
 
@@ -179,206 +508,515 @@ class MeroshareClient:
             logger.error(f"Failed to navigate to {element}: {str(e)}")
             raise
 
-    def getAvailableIPOS(self):
+    def _open_asba(self):
+        if self.driver.current_url.endswith('#/asba'):
+            # The app ignores a link to the page already open, e.g. after a
+            # submission, so only loading it again renders the current listing
+            self.driver.refresh()
+            return
+
+        # Wait for and click the My ASBA link
+        asba_link = wait_for(self.driver, (By.XPATH, "//a[@href='#/asba']"), 10, 'clickable')
+        self.driver.execute_script(
+            "arguments[0].scrollIntoView({block: 'center', behavior: 'instant'});", asba_link)
+        try:
+            asba_link.click()
+        except ElementClickInterceptedException:
+            logger.info("Click intercepted, using JavaScript click instead")
+            self.driver.execute_script("arguments[0].click();", asba_link)
+
+    @traced('listing.snapshot')
+    def _snapshot_issues(self):
+        """Read every row of the ASBA listing in a single WebDriver round trip."""
+        def read():
+            wait_for(self.driver, (By.CSS_SELECTOR, "div.company-list"), 10)
+            return self.driver.execute_script(EXTRACT_ISSUES_JS)
+
+        rows = self.retry_policy.run('listing', read, on_retry=self.driver.refresh,
+                                     host=urlsplit(self.base_url).netloc)
+        self.issues = [Issue.from_row(row) for row in rows]
+        return self.issues
+
+    def _identify(self, issues):
+        """Give issues read from the page the companyShareId the page does not show.
+
+        Sibling issues of one company share a scrip, the id tells them apart
+        and matches what the http backend, the ledger and the reports use.
+        It is looked up with one in-page request; when that fails the issues
+        keep the id built from their scrip and groups.
+
+        Returns:
+            The issues, with their ids where found
+        """
+        try:
+            listing = self._search('companyShare/applicableIssue/', APPLICABLE_ISSUE_QUERY)
+        except SessionExpired:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not look up the issue ids: {e}")
+            return issues
+        ids, by_scrip = {}, {}
+        for data in listing or []:
+            company_share_id = str(data['companyShareId'])
+            ids[(data.get('scrip'), data.get('shareGroupName'), data.get('subGroup'))] = company_share_id
+            by_scrip.setdefault(data.get('scrip'), []).append(company_share_id)
+
+        def issue_id(issue):
+            found = ids.get(issue.row_key)
+            if found is None and len(by_scrip.get(issue.scrip, ())) == 1:
+                # The row shows no sub group, but the scrip has no siblings
+                found = by_scrip[issue.scrip][0]
+            return found or issue.issue_id
+
+        return [replace(issue, issue_id=issue_id(issue)) for issue in issues]
+
+    @traced('poll')
+    @captured('poll_issues')
+    def poll_issues(self):
+        """Fetch the current listing from inside the page, without navigating.
+
+        The logged-in app keeps its API token in web storage, so one in-page
+        request returns the same data the ASBA listing is rendered from. When
+        no token is found the listing is re-read from the DOM instead.
+
+        Returns:
+            Every listed Issue, not only ordinary-share IPOs
+        """
         if not self.driver:
             raise Exception("Browser not initialized. Please login first.")
 
+        listing = self._search('companyShare/applicableIssue/', APPLICABLE_ISSUE_QUERY)
+        if listing is None:
+            self.navigate('asba')
+            return self._snapshot_issues()
+        return [Issue.from_api(data, index) for index, data in enumerate(listing)]
+
+    def _search(self, path, query):
+        """POST a search query to the API from inside the page.
+
+        Returns:
+            The entries of the response, or None when the page holds no token
+            or the request failed
+        """
+        def send():
+            return self._checked(self.driver.execute_async_script(
+                SEARCH_JS, f'{self.api_url}{path}', query, TOKEN_KEY))['object']
+
+        return self._in_page('listing', send)
+
+    def _api_get(self, path):
+        """GET an API resource from inside the page, None if it cannot be read."""
+        def send():
+            return self._checked(self.driver.execute_async_script(
+                API_GET_JS, f'{self.api_url}{path}', TOKEN_KEY))['body']
+
+        return self._in_page('apply', send)
+
+    def _checked(self, result):
+        """Raise for in-page answers that are worth acting on."""
+        if result['status'] == 401:
+            raise SessionExpired("Meroshare rejected the browser session")
+        if result['status'] in RETRYABLE_STATUS:
+            raise ServerBusy(result['status'])
+        return result
+
+    def _in_page(self, step, send):
+        """Run an in-page request, retrying while the site is busy.
+
+        Returns:
+            What ``send`` returns, or None when the site stays busy, so
+            callers fall back to reading the page
+        """
         try:
-            wait = WebDriverWait(self.driver, 10)
+            return self.retry_policy.run(step, send, host=urlsplit(self.api_url).netloc)
+        except ServerBusy as e:
+            logger.warning(f"In-page request failed: {e}")
+            return None
+
+    def _bank_account(self):
+        """Return the bank account to pay from, looking it up at most once.
+
+        Returns:
+            BankAccount, or None when it cannot be looked up from the page
+        """
+        if self.bank_account is None and self.bank_cache:
+            self.bank_account = self.bank_cache.load(self.dp_id, self.username, self.password)
+        if self.bank_account is None:
+            banks = self._api_get('bank/')
+            if banks is None:
+                return None
+            self.bank_account = discover_bank_account(
+                banks, lambda bank_id: self._api_get(f'bank/{bank_id}'), wanted=self.crn)
+            logger.info(f"Paying from {self.bank_account.bank_name}")
+            if self.bank_cache:
+                self.bank_cache.save(self.dp_id, self.username, self.password, self.bank_account)
+        return self.bank_account
+
+    def _forget_bank_account(self):
+        self.bank_account = None
+        if self.bank_cache:
+            self.bank_cache.delete(self.dp_id, self.username)
+
+    @property
+    def _ledger_account(self):
+        return account_key(self.dp_id, self.username)
+
+    @property
+    def account_label(self):
+        """Name of the account in failure artifacts."""
+        return account_key(self.dp_id, self.username)
+
+    @traced('application_report')
+    @captured('application_report')
+    def application_report(self):
+        """Return every application listed in the account's application report.
+
+        Returns:
+            List of LedgerEntry, one per application
+        """
+        if not self.driver:
+            raise Exception("Browser not initialized. Please login first.")
 
-            # Wait for all IPO containers
-            containers = wait.until(
-                EC.presence_of_all_elements_located(
-                    (By.CSS_SELECTOR, "div.company-list")
-                )
-            )
+        report = self._search('applicantForm/active/search/', APPLICATION_REPORT_QUERY)
+        if report is None:
+            raise Exception("Could not read the application report")
+        return [LedgerEntry.from_report(data) for data in report]
 
-            filtered_containers = []
-            company_names = []
+    @traced('reconcile')
+    @captured('reconcile')
+    def reconcile(self):
+        """Replace the account's ledger with the site's application report.
 
-            for container in containers:
-                try:
-                    share_type = container.find_element(By.CSS_SELECTOR, "span[tooltip='Share Type']").text.strip()
-                    share_group = container.find_element(By.CSS_SELECTOR, "span[tooltip='Share Group']").text.strip()
+        Returns:
+            The LedgerEntry list now stored for the account
+        """
+        if not self.ledger:
+            raise Exception("No ledger configured")
 
-                    if share_type == "IPO" and share_group == "Ordinary Shares":
-                        # Get company name for this container
-                        company_name = container.find_element(By.CSS_SELECTOR, "span[tooltip='Company Name']").text.strip()
+        entries = self.application_report()
+        self.ledger.replace(self._ledger_account, entries)
+        logger.info(f"Ledger now holds {len(entries)} application(s)")
+        return entries
 
-                        filtered_containers.append(container)
-                        company_names.append(company_name)
+    @traced('getAvailableIPOS')
+    @captured('getAvailableIPOS')
+    def getAvailableIPOS(self):
+        """Return the open ordinary-share IPOs listed under My ASBA."""
+        if not self.driver:
+            raise Exception("Browser not initialized. Please login first.")
 
-                except Exception as e:
-                    logger.warning(f"Error reading container info, skipping: {e}")
+        try:
+            issues = [issue for issue in self._snapshot_issues() if issue.is_ordinary_ipo]
 
             logger.info("------------------------------------------")
-            for index, name in enumerate(company_names, start=1):
-                logger.info(f"{index}. {name}")
+            for index, issue in enumerate(issues, start=1):
+                logger.info(f"{index}. {issue.company_name}")
             logger.info("------------------------------------------")
 
-            # Return the filtered containers for further processing (like clicking Apply)
-            return filtered_containers
+            return issues
 
         except Exception as e:
             logger.error(f"Failed to get IPOs: {e}")
             raise
 
-    def applyAvailableIPOS(self):
+    @traced('apply.issue')
+    @captured('apply_issue')
+    def _apply_one(self, issue):
+        """Open the form for one issue from the listing and submit it."""
+        # Find the row again, its position may change between listings. The
+        # scrip alone would also match the issue's siblings
+        current = next((row for row in self.issues or [] if row.row_key == issue.row_key), None)
+        if current is None:
+            return ApplyResult(issue, ApplyStatus.FAILED, "No longer listed")
+        if not current.can_apply:
+            return ApplyResult(issue, ApplyStatus.SKIPPED, "Already applied")
+
+        if not self.driver.execute_script(CLICK_APPLY_JS, current.index, list(current.row_key)):
+            return ApplyResult(issue, ApplyStatus.SKIPPED, "Apply button not available")
+        logger.info(f"Clicked Apply on {issue.company_name}.")
+
+        self.fillApplyForm(issue)
+        return ApplyResult(issue, ApplyStatus.APPLIED)
+
+    def _apply_with_retries(self, issue):
+        """Apply for one issue, starting over from the listing after a transient failure.
+
+        The listing is re-read before every retry, so an application that
+        went through despite the error is never submitted twice.
+        """
+        attempts = 0
+
+        def attempt():
+            nonlocal attempts
+            attempts += 1
+            return self._apply_one(issue)
+
+        def back_to_listing():
+            self.navigate("asba")
+            self._snapshot_issues()
+
+        result = self.retry_policy.run('apply', attempt, on_retry=back_to_listing,
+                                       host=urlsplit(self.base_url).netloc)
+        if attempts > 1 and result.status is ApplyStatus.SKIPPED and result.message == "Already applied":
+            if self.ledger:
+                self.ledger.record(self._ledger_account, LedgerEntry(
+                    issue.key, issue.company_name, APPLIED, DEFAULT_KITTA))
+            return ApplyResult(issue, ApplyStatus.APPLIED, "Confirmed after a retry")
+        return result
+
+    @traced('applyAvailableIPOS')
+    @captured('applyAvailableIPOS')
+    def applyAvailableIPOS(self, pattern=None):
+        """Apply for every open ordinary-share IPO in a single session.
+
+        Args:
+            pattern (str): Only apply for issues whose name or scrip matches
+                this case-insensitive regular expression
+
+        Returns:
+            List of ApplyResult, one per selected issue
+        """
         if not self.driver:
             raise Exception("Browser not initialized. Please login first.")
-    
-        try:
-            wait = WebDriverWait(self.driver, 10)
-
-            containers = wait.until(
-                EC.presence_of_all_elements_located(
-                    (By.CSS_SELECTOR, "div.company-list"))
-            )
 
-            for container in containers:
+        # Reuse the listing read by getAvailableIPOS instead of rescanning
+        if self.issues is None:
+            self._snapshot_issues()
+
+        selected = select_issues(self.issues, pattern)
+        if pattern and not selected:
+            logger.warning(f"No open IPO matches '{pattern}'")
+        if selected:
+            selected = self._identify(selected)
+
+        known = self.ledger.applied(self._ledger_account) if self.ledger else set()
+        skipped = {issue.key: self._skipped(issue, known) for issue in selected}
+        eligible = [issue for issue in selected if skipped[issue.key] is None]
+        if self.tabs > 1 and len(eligible) > 1:
+            applied = self._apply_in_tabs(eligible)
+            results = [skipped[issue.key] or applied[issue.key] for issue in selected]
+            record_applications(results, self.backend)
+            return results
+
+        results = []
+        for issue in selected:
+            if skipped[issue.key]:
+                results.append(skipped[issue.key])
+                continue
+
+            with log_context(issue=issue.key):
                 try:
-                    share_type = container.find_element(
-                        By.CSS_SELECTOR, "span[tooltip='Share Type']").text.strip()
-                    share_group = container.find_element(
-                        By.CSS_SELECTOR, "span[tooltip='Share Group']").text.strip()
-
-                    if share_type == "IPO" and share_group == "Ordinary Shares":
-                        try:
-                            # Try to locate the Apply button inside the container
-                            apply_button = container.find_element(
-                                By.XPATH, ".//button[contains(@class, 'btn-issue') and .//i[contains(text(), 'Apply')]]"
-                            )
-
-                            print(not apply_button.is_displayed() or not apply_button.is_enabled())
-
-                            # Optional: Check visibility and if it's enabled
-                            if not apply_button.is_displayed() or not apply_button.is_enabled():
-                                logger.info("Already Applied, skipping this IPO.")
-                                continue
-
-                            # Scroll into view
-                            self.driver.execute_script("arguments[0].scrollIntoView();", apply_button)
-
-                            # Wait until it's clickable
-                            WebDriverWait(self.driver, 10).until(
-                                EC.element_to_be_clickable((
-                                    By.XPATH,
-                                    ".//button[contains(@class, 'btn-issue') and .//i[contains(text(), 'Apply')]]"
-                                ))
-                            )
-
-                            # Click the Apply button
-                            apply_button.click()
-                            print("[INFO] Clicked Apply on first Ordinary Share IPO.")
-
-                            # Proceed to form filling
-                            self.fillApplyForm()
-
-                            break  # Exit after applying to first IPO
+                    result = self._apply_with_retries(issue)
+                except Exception as e:
+                    logger.error(f"Failed to apply for {issue.company_name}: {e}")
+                    result = ApplyResult(issue, ApplyStatus.FAILED, str(e))
+                if result.status is ApplyStatus.APPLIED:
+                    logger.info(f"Applied for {issue.company_name}")
+            results.append(result)
+
+            # Go back to the listing for the next issue without logging in again
+            if result.status is not ApplyStatus.SKIPPED and issue is not selected[-1]:
+                try:
+                    self.navigate("asba")
+                    self._snapshot_issues()
+                except Exception as e:
+                    logger.error(f"Could not return to My ASBA: {e}")
+                    remaining = selected[selected.index(issue) + 1:]
+                    results.extend(
+                        ApplyResult(other, ApplyStatus.FAILED, "Could not return to My ASBA")
+                        for other in remaining)
+                    break
+
+        record_applications(results, self.backend)
+        return results
+
+    def _skipped(self, issue, known):
+        """Return the result of an issue that needs no application, or None."""
+        if issue.key in known:
+            logger.info(f"Ledger shows {issue.company_name} as applied, skipping.")
+            return ApplyResult(issue, ApplyStatus.SKIPPED, "Already applied (ledger)")
+        if not issue.can_apply:
+            logger.info(f"Already Applied to {issue.company_name}, skipping.")
+            return ApplyResult(issue, ApplyStatus.SKIPPED, "Already applied")
+        return None
+
+    def _open_tab(self, issue, storage, account):
+        """Open My ASBA in a new tab and start applying for an issue there.
+
+        Returns:
+            Handle of the new tab
+        """
+        self.driver.switch_to.new_window('tab')
+        handle = self.driver.current_window_handle
+        self._tabs.add(handle)
+        # The token lives in web storage, which a new tab does not share
+        self.driver.get(f'{self.base_url}/#/login')
+        self.driver.execute_script(WRITE_STORAGE_JS, *storage)
+        self.driver.get(f'{self.base_url}/#/asba')
+        self.driver.refresh()
+        self.driver.execute_script(
+            PIPELINE_APPLY_JS, *issue.row_key, issue.company_name, issue.index,
+            [account.bank_id, account.bank_name] if account else [],
+            [account.account_number] if account else [],
+            str(DEFAULT_KITTA), self.crn, self.transaction_pin, self.PIPELINE_TIMEOUT * 1000)
+        return handle
+
+    def _finish_tab(self, handle, issue, outcome):
+        """Turn the outcome of a tab into a result, then close the tab."""
+        error = outcome.get('error') if outcome else "Timed out waiting for the confirmation"
+        if error:
+            logger.error(f"Failed to apply for {issue.company_name}: {error}")
+            if self.diagnostics:
+                try:
+                    self.diagnostics.capture(
+                        self.driver, self.account_label, 'apply_tab', Exception(error))
+                except Exception as capture_error:
+                    logger.warning(f"Could not capture failure artifacts: {capture_error}")
+            result = ApplyResult(issue, ApplyStatus.FAILED, error)
+        else:
+            logger.info(f"Applied for {issue.company_name}")
+            if self.ledger:
+                self.ledger.record(self._ledger_account, LedgerEntry(
+                    issue.key, issue.company_name, APPLIED, DEFAULT_KITTA))
+            result = ApplyResult(issue, ApplyStatus.APPLIED, outcome.get('message') or "")
+        try:
+            self.driver.close()
+            self._tabs.discard(handle)
+        except Exception as e:
+            logger.warning(f"Could not close the tab of {issue.company_name}: {e}")
+        return result
 
-                        except Exception:
-                            logger.info("Seems like already Applied")
-                            continue  # Go to next IPO container
+    @traced('apply.tabs')
+    def _apply_in_tabs(self, issues):
+        """Apply for several issues at once, each in its own tab.
 
-                except Exception as inner_e:
-                    print(f"[WARN] Error in one container, skipping: {inner_e}")
+        Each tab runs the whole application inside the page, so the next form
+        is opened and filled while earlier PIN submissions are still waiting
+        on the server. WebDriver only starts tabs and polls them in turn, with
+        at most ``tabs`` open besides the listing. A failure only fails the
+        issue of its tab.
 
-        except Exception as e:
-            logger.error(f"Testing this exception : {e}")
-            raise Exception(f"Testing this exception : {e}")
+        Returns:
+            Dict of issue key to ApplyResult
+        """
+        main = self.driver.current_window_handle
+        storage = self.driver.execute_script(READ_STORAGE_JS)
+        account = self._bank_account()
+        pending, running, results = list(issues), {}, {}
+
+        while pending or running:
+            while pending and len(running) < self.tabs:
+                issue = pending.pop(0)
+                try:
+                    handle = self._open_tab(issue, storage, account)
+                    running[handle] = (issue, time.monotonic())
+                    logger.info(f"Applying for {issue.company_name} in a new tab.")
+                except Exception as e:
+                    logger.error(f"Could not open a tab for {issue.company_name}: {e}")
+                    results[issue.key] = ApplyResult(issue, ApplyStatus.FAILED, str(e))
+                    try:
+                        self._close_failed_tabs(main, running)
+                    except Exception as close_error:
+                        logger.warning(f"Could not close the failed tab: {close_error}")
+
+            finished = False
+            for handle, (issue, started) in list(running.items()):
+                with log_context(issue=issue.key):
+                    try:
+                        self.driver.switch_to.window(handle)
+                        outcome = self.driver.execute_script(READ_OUTCOME_JS)
+                    except Exception as e:
+                        outcome = {'done': True, 'error': str(e)}
+                    timed_out = time.monotonic() - started > self.PIPELINE_TIMEOUT + 5
+                    if not (outcome and outcome.get('done')) and not timed_out:
+                        continue
+                    results[issue.key] = self._finish_tab(
+                        handle, issue, outcome if not timed_out else None)
+                del running[handle]
+                finished = True
+            self.driver.switch_to.window(main)
+            if running and not finished:
+                time.sleep(self.POLL_INTERVAL)
+
+        # The listing in the main tab no longer shows what was applied
+        self.issues = None
+        return results
+
+    def _close_failed_tabs(self, main, running):
+        """Close a tab this client left behind in a failed start and return to the listing.
+
+        Tabs it did not open, such as those of other accounts in the same
+        browser, are left alone.
+        """
+        try:
+            for handle in self._tabs - set(running):
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+                self._tabs.discard(handle)
+        finally:
+            self.driver.switch_to.window(main)
+
+    @traced('fillApplyForm')
+    @captured('fillApplyForm')
+    def fillApplyForm(self, issue=None):
+        """Fill and submit the open application form.
 
-    def fillApplyForm(self):
+        Args:
+            issue (Issue): The issue the form belongs to, recorded in the ledger
+                once Meroshare confirms the application
+        """
         if not self.driver:
             raise Exception("Browser not initialized. Please login first.")
 
         try:
-            # Initialize with longer wait time
-            wait = WebDriverWait(self.driver, 15)
-
-            # Retry mechanism
-
-            # 1. Wait for dropdown to be ready (Angular-specific wait)
-            select_element = wait.until(
-                lambda d: d.find_element(By.ID, "selectBank")
-            )
-
-            # 2. Click to open dropdown (may be needed for Angular)
-            select_element.click()
-            time.sleep(1)  # Brief pause for dropdown animation
-
-            # 3. Find the option (using more robust XPath)
-            option = wait.until(
-                EC.presence_of_element_located(
-                    (By.XPATH,
-                     "//select[@id='selectBank']/option[@value='37']")
-                )
-            )
-
-            option.click()
-
-            time.sleep(1)
-
-            account_number = wait.until(
-                EC.presence_of_element_located(
-                    (By.ID, "accountNumber")
-                )
-            )
-
-            account_number.click()
-
-            account_number_option = wait.until(EC.presence_of_element_located((
-                By.XPATH,
-                f"//select[@id='accountNumber']/option[@value={self.crn}]"
-            )))
-
-            account_number_option.click()
-
-            applied_kitta = wait.until(EC.presence_of_element_located((
-                By.ID, "appliedKitta"
-            )))
-            applied_kitta.clear()
-            applied_kitta.send_keys("10")
-
-            crnNumber = wait.until(EC.presence_of_element_located(
-                (By.ID, "crnNumber")
-            ))
-
-            crnNumber.clear()
-
-            crnNumber.send_keys(self.crn)
-
-            disclaimer = wait.until(EC.presence_of_element_located(
-                (By.ID, "disclaimer")
-            ))
-
-            disclaimer.click()
-
-            button_locator = wait.until(EC.presence_of_element_located((
-                By.CSS_SELECTOR, "button.btn.btn-gap.btn-primary[type='submit']")
-            ))
-
-            button_locator.click()
-
-            transaction_pin_container = wait.until(EC.presence_of_element_located(
-                (By.ID, "transactionPIN")
-            ))
-
-            transaction_pin_container.clear()
-
-            transaction_pin_container.send_keys(self.transaction_pin)
-
-            pin_submit = wait.until(EC.presence_of_element_located(
-                (By.XPATH, "//button[span[text()='Apply ']]")
-            ))
-
-            pin_submit.click()
+            with span('apply.form'):
+                account = self._bank_account()
+                bank_values = [account.bank_id, account.bank_name] if account else []
+                account_values = [account.account_number] if account else []
+                error = self.driver.execute_async_script(
+                    FILL_FORM_JS, bank_values, account_values, str(DEFAULT_KITTA), self.crn,
+                    issue.company_name if issue else None, 15000)
+                if error:
+                    # The cached account may have been closed or relinked
+                    self._forget_bank_account()
+                    raise Exception(error)
+
+            with span('apply.pin_submit'):
+                transaction_pin_container = wait_for(self.driver, (By.ID, "transactionPIN"), 15)
+                transaction_pin_container.clear()
+                transaction_pin_container.send_keys(self.transaction_pin)
+
+                pin_submit = wait_for(
+                    self.driver, (By.XPATH, "//button[span[text()='Apply ']]"), 15, 'clickable')
+                pin_submit.click()
+
+            # Only an accepted PIN counts as applied, a refused one must not reach the ledger
+            with span('apply.confirm'):
+                error = self.driver.execute_async_script(CONFIRMATION_JS, 15000)
+                if error:
+                    raise Exception(error)
+
+            if self.ledger and issue:
+                self.ledger.record(self._ledger_account, LedgerEntry(
+                    issue.key, issue.company_name, APPLIED, DEFAULT_KITTA))
 
         except Exception as e:
-            logger.error(f"Critical failure in bank selection: {e}")
+            logger.error(f"Failed to fill the application form: {e}")
             raise
 
+    @traced('close')
     def close(self):
         """Close the browser and clean up resources."""
+        if self.cassette:
+            if self.driver and not self.cassette.replaying:
+                self.cassette.detach(self.driver)
+            self.cassette.close()
         if self.driver:
-            self.driver.quit()
+            if self.driver_pool and not (self.cassette and self.cassette.replaying):
+                site = urlsplit(self.base_url)
+                self.driver_pool.release(self.driver, origin=f'{site.scheme}://{site.netloc}')
+            else:
+                self.driver.quit()
             self.driver = None
+        remove_profile_dir(self._profile_dir)
+        self._profile_dir = None
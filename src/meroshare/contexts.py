@@ -0,0 +1,209 @@
+"""
+Many accounts in one browser, each in its own isolated browser context.
+
+A browser context is Chrome's incognito-like partition: separate cookies,
+storage and cache inside the same browser process. Contexts are created
+over the browser-level DevTools connection. Each account gets its own
+WebDriver session that is attached to the running browser and bound to
+the tab of its context. The browser, GPU and network processes are shared,
+so an account costs one renderer and one chromedriver instead of a whole
+Chromium.
+"""
+
+import itertools
+import json
+import logging
+import threading
+import urllib.request
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from meroshare.driver_pool import (
+    SCRIPT_TIMEOUT, enable_lean_mode, launch_driver, reap_stale_profiles, remove_profile_dir,
+    resolve_driver_path,
+)
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SIZE = {'width': 1920, 'height': 1080}
+
+
+class BrowserCDP:
+    """A DevTools connection to the browser target itself.
+
+    Page-level CDP through chromedriver cannot create browser contexts,
+    so these commands go to the browser endpoint directly.
+
+    Args:
+        debugger_address (str): host:port the browser's DevTools listens on
+        timeout (float): Seconds to wait for any single reply
+    """
+
+    def __init__(self, debugger_address, timeout=30):
+        import websocket
+
+        with urllib.request.urlopen(f'http://{debugger_address}/json/version', timeout=timeout) as f:
+            url = json.load(f)['webSocketDebuggerUrl']
+        # Chrome rejects DevTools websockets that send an unexpected Origin
+        self._socket = websocket.create_connection(url, timeout=timeout, suppress_origin=True)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def send(self, method, params=None):
+        """Run one CDP command and return its result, ignoring events."""
+        with self._lock:
+            message_id = next(self._ids)
+            self._socket.send(json.dumps({'id': message_id, 'method': method, 'params': params or {}}))
+            while True:
+                message = json.loads(self._socket.recv())
+                if message.get('id') == message_id:
+                    break
+        if 'error' in message:
+            raise Exception(f"{method} failed: {message['error'].get('message')}")
+        return message.get('result', {})
+
+    def close(self):
+        try:
+            self._socket.close()
+        except Exception:
+            pass
+
+
+class BrowserContextPool:
+    """Hands out WebDriver sessions bound to fresh contexts of one shared browser.
+
+    It has the same acquire/release interface as DriverPool, so a
+    MeroshareClient binds to a context by taking it from this pool. Released
+    contexts are disposed, which drops their cookies and storage, rather than
+    being reused.
+
+    Args:
+        headless (bool): Whether to run the browser in headless mode
+        lean (bool): Launch the browser with the lean profile
+        max_contexts (int): Upper bound on contexts open at once, None for no limit
+    """
+
+    def __init__(self, headless=True, lean=False, max_contexts=None):
+        self.headless = headless
+        self.lean = lean
+        self.max_contexts = max_contexts
+        self._slots = threading.BoundedSemaphore(max_contexts) if max_contexts else None
+        self._host = None
+        self._profile_dir = None
+        self._cdp = None
+        self._driver_path = None
+        self._debugger_address = None
+        self._contexts = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def active(self):
+        """Number of contexts currently handed out."""
+        return len(self._contexts)
+
+    def start(self):
+        """Launch the shared browser and connect to its DevTools endpoint."""
+        reap_stale_profiles()
+        self._driver_path = resolve_driver_path()
+        self._host, self._profile_dir = launch_driver(self.headless, self._driver_path, self.lean)
+        try:
+            self._debugger_address = self._host.capabilities['goog:chromeOptions']['debuggerAddress']
+            self._cdp = BrowserCDP(self._debugger_address)
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"Shared browser ready at {self._debugger_address}")
+        return self
+
+    def _attach(self, target_id):
+        """Start a WebDriver session on the running browser, focused on one tab."""
+        options = Options()
+        options.debugger_address = self._debugger_address
+        driver = webdriver.Chrome(service=Service(self._driver_path), options=options)
+        try:
+            # chromedriver uses DevTools target ids as window handles
+            driver.switch_to.window(target_id)
+            driver.set_script_timeout(SCRIPT_TIMEOUT)
+            if self.lean:
+                enable_lean_mode(driver)
+        except Exception:
+            driver.quit()
+            raise
+        return driver
+
+    def acquire(self, timeout=None):
+        """Create an isolated context and return a driver bound to it."""
+        if self._closed:
+            raise Exception("Browser context pool is closed")
+        if self._slots and not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No browser context became available")
+        if self._closed:
+            # Closing releases the slots of every context, waiters included
+            if self._slots:
+                self._slots.release()
+            raise Exception("Browser context pool is closed")
+
+        context_id = None
+        try:
+            context_id = self._cdp.send('Target.createBrowserContext')['browserContextId']
+            target_id = self._cdp.send('Target.createTarget', {
+                'url': 'about:blank', 'browserContextId': context_id, **WINDOW_SIZE,
+            })['targetId']
+            driver = self._attach(target_id)
+        except Exception:
+            if context_id:
+                self._dispose(context_id)
+            if self._slots:
+                self._slots.release()
+            raise
+
+        with self._lock:
+            self._contexts[driver] = context_id
+        return driver
+
+    def _dispose(self, context_id):
+        try:
+            self._cdp.send('Target.disposeBrowserContext', {'browserContextId': context_id})
+        except Exception as e:
+            logger.warning(f"Could not dispose browser context {context_id}: {e}")
+
+    def release(self, driver, origin=None):
+        """End the driver's session and dispose of its context, with all its storage."""
+        with self._lock:
+            context_id = self._contexts.pop(driver, None)
+        try:
+            # Sessions attached with debuggerAddress leave the browser running
+            driver.quit()
+        except Exception:
+            pass
+        if context_id is None:
+            return
+        self._dispose(context_id)
+        if self._slots:
+            self._slots.release()
+
+    def close(self):
+        """Dispose every context and quit the shared browser."""
+        self._closed = True
+        for driver in list(self._contexts):
+            self.release(driver)
+        if self._cdp:
+            self._cdp.close()
+            self._cdp = None
+        if self._host:
+            try:
+                self._host.quit()
+            except Exception:
+                pass
+            self._host = None
+        remove_profile_dir(self._profile_dir)
+        self._profile_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,200 @@
+"""
+Failure artifacts of the browser client, written off the hot path.
+
+When a client step fails, the screenshot, page source, browser console and
+current URL are read from the browser and handed to a background thread.
+That thread compresses them into one zip per failure under
+``<directory>/<run>/<account>/`` and prunes old artifacts by age and total
+size, so failing runs never wait on disk and concurrent runs never
+overwrite each other.
+"""
+
+import base64
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import traceback
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ipo_automate', 'artifacts')
+
+# Attribute set on exceptions already captured by an inner step
+CAPTURED_ATTR = '_meroshare_captured'
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value)).strip('_') or 'unknown'
+
+
+def new_run_id():
+    """Directory name of a run, unique across concurrent runs on one machine."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+class FailureCapture:
+    """Capture and store failure artifacts of browser clients.
+
+    Args:
+        directory (str): Root directory of every run's artifacts
+        run_id (str): Name of this run's directory, see new_run_id
+        max_bytes (int): Oldest artifacts are removed beyond this total size
+        max_age (float): Artifacts older than this many seconds are removed
+    """
+
+    def __init__(self, directory=ARTIFACT_DIR, run_id=None, max_bytes=200 * 1024 * 1024,
+                 max_age=14 * 24 * 3600):
+        self.directory = directory
+        self.run_id = run_id or new_run_id()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name='failure-capture', daemon=True)
+                self._thread.start()
+                # Prune artifacts of earlier runs once, in the background
+                self._queue.put(None)
+
+    def capture(self, driver, account, phase, error=None):
+        """Read the browser state now and store it in the background.
+
+        Only the reads that need the browser happen on the calling thread.
+        Any of them failing, for example on a crashed browser, is skipped.
+
+        Args:
+            driver: WebDriver of the failing client
+            account (str): Account the client runs for, names the directory
+            phase (str): Failing step, e.g. 'login' or 'fillApplyForm'
+            error (Exception): The failure, stored with its traceback
+
+        Returns:
+            Path the artifact will be written to
+        """
+        with self._lock:
+            self._sequence += 1
+            name = f"{time.strftime('%H%M%S')}-{self._sequence:03d}-{_slug(phase)}.zip"
+        path = os.path.join(self.directory, self.run_id, _slug(account), name)
+
+        meta = {'account': account, 'phase': phase, 'time': time.time()}
+        if error is not None:
+            meta['error'] = f"{type(error).__name__}: {error}"
+            meta['traceback'] = ''.join(
+                traceback.format_exception(type(error), error, error.__traceback__))
+        files = {}
+        for key, read in (('url', lambda: driver.current_url),
+                          ('title', lambda: driver.title)):
+            try:
+                meta[key] = read()
+            except Exception:
+                meta[key] = None
+        # The screenshot is decoded in the background too
+        for filename, read in (('screenshot.png', lambda: driver.get_screenshot_as_base64()),
+                               ('page.html', lambda: driver.page_source.encode()),
+                               ('console.json', lambda: json.dumps(driver.get_log('browser')).encode())):
+            try:
+                files[filename] = read()
+            except Exception:
+                continue
+        files['meta.json'] = json.dumps(meta, indent=2, default=str).encode()
+
+        self._start()
+        self._queue.put((path, files))
+        logger.info(f"Saving failure artifacts to {path}")
+        return path
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is not None:
+                    self._write(*item)
+                self.prune()
+            except Exception as e:
+                logger.warning(f"Could not store failure artifacts: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path, files):
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for filename, data in files.items():
+                if filename.endswith('.png'):
+                    data = base64.b64decode(data)
+                # PNG is already compressed
+                compress = zipfile.ZIP_STORED if filename.endswith('.png') else zipfile.ZIP_DEFLATED
+                archive.writestr(filename, data, compress_type=compress)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        """Remove artifacts beyond the age and size limits, oldest first."""
+        artifacts = []
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                artifacts.append((stat.st_mtime, stat.st_size, path))
+
+        artifacts.sort()
+        total = sum(size for _, size, _ in artifacts)
+        cutoff = time.time() - self.max_age
+        for mtime, size, path in artifacts:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+        # Drop run and account directories left empty
+        for root, _, _ in os.walk(self.directory, topdown=False):
+            if root != self.directory and not os.listdir(root):
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass
+
+    def flush(self):
+        """Wait until every captured artifact is written."""
+        if self._thread is not None:
+            self._queue.join()
+
+
+def captured(phase):
+    """Capture failure artifacts when a MeroshareClient method raises.
+
+    Uses the client's ``diagnostics`` and ``driver``. A failure is captured
+    once, by the innermost decorated method it passes through.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                if self.diagnostics and self.driver and not getattr(e, CAPTURED_ATTR, False):
+                    try:
+                        setattr(e, CAPTURED_ATTR, True)
+                        self.diagnostics.capture(self.driver, self.account_label, phase, e)
+                    except Exception as capture_error:
+                        logger.warning(f"Could not capture failure artifacts: {capture_error}")
+                raise
+        return wrapper
+    return decorator
@@ -0,0 +1,359 @@
+"""
+Cached chromedriver resolution and a pool of pre-launched browsers.
+"""
+
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import stat
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ipo_automate', 'drivers')
+PROFILE_PREFIX = 'meroshare-profile-'
+BROWSER_BINARIES = ('chromium', 'chromium-browser', 'google-chrome', 'google-chrome-stable')
+MEROSHARE_ORIGIN = 'https://meroshare.cdsc.com.np'
+
+# Upper bound for in-page async waits, which enforce their own shorter timeouts
+SCRIPT_TIMEOUT = 120
+
+# Put in the idle queue once no browser will come back, to wake waiting threads
+_NO_MORE_BROWSERS = object()
+
+# Requests the automation never needs. The app's own scripts, stylesheets and
+# API calls are kept because visibility and click checks depend on them.
+LEAN_BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.webp', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.ogg',
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*facebook.com*', '*hotjar.com*',
+]
+
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+    'profile.default_content_setting_values.media_stream': 2,
+}
+
+_resolve_lock = threading.Lock()
+
+
+def browser_major_version():
+    """Return the major version of the installed Chromium/Chrome, or None."""
+    for binary in BROWSER_BINARIES:
+        path = shutil.which(binary)
+        if not path:
+            continue
+        try:
+            output = subprocess.run(
+                [path, '--version'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r'(\d+)\.\d+\.\d+', output)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _load_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def resolve_driver_path(cache_dir=CACHE_DIR):
+    """Return a chromedriver matching the installed browser.
+
+    The driver is downloaded through webdriver-manager only the first time a
+    browser major version is seen. It is then copied into ``cache_dir`` and
+    served from there, with no network access, on every later call.
+
+    Args:
+        cache_dir (str): Directory holding the versioned driver cache
+
+    Returns:
+        Path to a chromedriver executable
+    """
+    with _resolve_lock:
+        version = browser_major_version()
+        manifest = _load_manifest(cache_dir)
+
+        cached = manifest.get(version) if version else None
+        if cached is None and version is None and manifest:
+            # Browser version is unknown, reuse the newest cached driver
+            cached = manifest[max(manifest, key=int)]
+        if cached and os.access(cached, os.X_OK):
+            return cached
+
+        from webdriver_manager.chrome import ChromeDriverManager
+        from webdriver_manager.core.os_manager import ChromeType
+
+        logger.info(f"Resolving chromedriver for browser version {version or 'unknown'}")
+        downloaded = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
+
+        version = version or '0'
+        target_dir = os.path.join(cache_dir, version)
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, os.path.basename(downloaded))
+        shutil.copy2(downloaded, target)
+        os.chmod(target, os.stat(target).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+        manifest[version] = target
+        _save_manifest(cache_dir, manifest)
+        return target
+
+
+def chrome_options(profile_dir, headless=True, lean=False):
+    """Build the Chrome options shared by every Meroshare browser.
+
+    Args:
+        profile_dir (str): User data directory for the browser
+        headless (bool): Whether to run browser in headless mode
+        lean (bool): Disable images, media and background features
+    """
+    options = Options()
+    if headless:
+        options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument(f'--user-data-dir={profile_dir}')
+    # Keep the console readable for failure artifacts
+    options.set_capability('goog:loggingPrefs', {'browser': 'ALL'})
+    if lean:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--disable-background-networking')
+        options.add_argument('--disable-component-update')
+        options.add_argument('--mute-audio')
+        options.add_experimental_option('prefs', LEAN_PREFS)
+    return options
+
+
+def enable_lean_mode(driver):
+    """Block images, fonts, media and third-party trackers over CDP."""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+
+
+def make_profile_dir():
+    """Create a fresh, recognisable temporary browser profile directory."""
+    return tempfile.mkdtemp(prefix=PROFILE_PREFIX)
+
+
+def remove_profile_dir(profile_dir):
+    """Delete a browser profile directory, ignoring errors."""
+    if profile_dir:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def reap_stale_profiles(max_age=6 * 3600):
+    """Remove temporary profiles left behind by crashed runs.
+
+    Args:
+        max_age (float): Only profiles untouched for this many seconds are removed
+
+    Returns:
+        Number of profile directories removed
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), PROFILE_PREFIX + '*')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                remove_profile_dir(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def launch_driver(headless=True, driver_path=None, lean=False):
+    """Start a Chrome WebDriver on a fresh temporary profile.
+
+    Args:
+        headless (bool): Whether to run browser in headless mode
+        driver_path (str): chromedriver to use, resolved from the cache if None
+        lean (bool): Skip heavy resources the automation never needs
+
+    Returns:
+        Tuple of (driver, profile_dir). The caller owns the profile directory.
+    """
+    profile_dir = make_profile_dir()
+    try:
+        service = Service(driver_path or resolve_driver_path())
+        driver = webdriver.Chrome(
+            service=service, options=chrome_options(profile_dir, headless, lean))
+        driver.maximize_window()
+        driver.set_script_timeout(SCRIPT_TIMEOUT)
+        if lean:
+            enable_lean_mode(driver)
+    except Exception:
+        remove_profile_dir(profile_dir)
+        raise
+    return driver, profile_dir
+
+
+def reset_driver(driver, origin=None):
+    """Clear cookies and site storage so a browser can serve another account.
+
+    Args:
+        origin (str): Site the last account used, when not Meroshare itself
+            (e.g. a staging or fake site)
+    """
+    driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+    # sessionStorage belongs to the tab and survives clearDataForOrigin
+    driver.execute_cdp_cmd('DOMStorage.enable', {})
+    for site in dict.fromkeys(filter(None, (MEROSHARE_ORIGIN, origin))):
+        driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+            'origin': site,
+            'storageTypes': 'all',
+        })
+        driver.execute_cdp_cmd('DOMStorage.clear', {
+            'storageId': {'securityOrigin': site, 'isLocalStorage': False},
+        })
+    driver.execute_cdp_cmd('DOMStorage.disable', {})
+    driver.get('about:blank')
+
+
+class DriverPool:
+    """A fixed-size pool of warm browsers shared by Meroshare clients.
+
+    Browsers are launched up front and reset between uses instead of being
+    relaunched. A browser that fails to reset is replaced with a fresh one.
+
+    Args:
+        size (int): Number of browsers to keep running
+        headless (bool): Whether to run browsers in headless mode
+        lean (bool): Launch browsers with the lean profile
+    """
+
+    def __init__(self, size=1, headless=True, lean=False):
+        self.size = size
+        self.headless = headless
+        self.lean = lean
+        self._idle = queue.Queue()
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._driver_path = None
+        self._closed = False
+
+    def start(self):
+        """Resolve the driver once and launch every browser in parallel."""
+        reap_stale_profiles()
+        self._driver_path = resolve_driver_path()
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            for driver in executor.map(lambda _: self._launch(), range(self.size)):
+                self._idle.put(driver)
+        logger.info(f"Driver pool ready with {self.size} browser(s)")
+        return self
+
+    def _launch(self):
+        driver, profile_dir = launch_driver(self.headless, self._driver_path, self.lean)
+        with self._lock:
+            self._profiles[driver] = profile_dir
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            profile_dir = self._profiles.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        remove_profile_dir(profile_dir)
+
+    def _check_open(self):
+        if self._closed:
+            raise Exception("Driver pool is closed")
+        if not self.size:
+            raise Exception("Driver pool has no browsers left")
+
+    def acquire(self, timeout=None):
+        """Take a browser from the pool, waiting until one is free.
+
+        Raises:
+            Exception: When the pool is closed or has no browsers left, also
+                while waiting
+        """
+        self._check_open()
+        try:
+            driver = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No browser became available in the driver pool") from None
+        if driver is _NO_MORE_BROWSERS:
+            # Pass it on to the next waiting thread
+            self._idle.put(driver)
+            self._check_open()
+            raise Exception("Driver pool has no browsers left")
+        return driver
+
+    def release(self, driver, origin=None):
+        """Reset a browser and return it to the pool.
+
+        Args:
+            origin (str): Site the browser was used on, cleared besides Meroshare
+        """
+        if self._closed:
+            self._discard(driver)
+            return
+        try:
+            reset_driver(driver, origin)
+        except Exception as e:
+            logger.warning(f"Could not reset browser, replacing it: {e}")
+            self._discard(driver)
+            try:
+                driver = self._launch()
+            except Exception as e:
+                # The account releasing it is done, only later accounts lose a browser
+                with self._lock:
+                    self.size -= 1
+                logger.error(f"Could not replace the browser, {self.size} left in the pool: {e}")
+                if not self.size:
+                    self._idle.put(_NO_MORE_BROWSERS)
+                return
+        self._idle.put(driver)
+
+    def close(self):
+        """Quit every browser and remove their profiles."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not _NO_MORE_BROWSERS:
+                self._discard(driver)
+        self._idle.put(_NO_MORE_BROWSERS)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,27 @@
+"""
+Exceptions shared by the Meroshare clients.
+"""
+
+
+class SessionExpired(Exception):
+    """The site rejected the current session and a new login is required."""
+
+
+class CircuitOpen(Exception):
+    """Too many recent failures, calls to the site are paused for a while."""
+
+
+class ReplayMismatch(Exception):
+    """A replayed client made a request the cassette holds no answer for."""
+
+
+class ServerBusy(Exception):
+    """The site answered with a status that asks to try again later.
+
+    Attributes:
+        status (int): HTTP status of the answer, 0 when the request failed
+    """
+
+    def __init__(self, status, message=None):
+        super().__init__(message or f"Meroshare answered with status {status}")
+        self.status = status
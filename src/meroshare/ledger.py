@@ -0,0 +1,182 @@
+"""
+Local SQLite ledger of the issues each account has already applied for.
+
+Clients consult it before opening an application form, so issues applied
+for in an earlier run are skipped without any work on the site.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from models.ipo import Allotment
+
+logger = logging.getLogger(__name__)
+
+LEDGER_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'ipo_automate', 'ledger.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    account TEXT NOT NULL,
+    issue TEXT NOT NULL,
+    company_name TEXT,
+    applied_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    kitta INTEGER,
+    PRIMARY KEY (account, issue)
+);
+CREATE TABLE IF NOT EXISTS allotments (
+    account TEXT NOT NULL,
+    issue TEXT NOT NULL,
+    company_name TEXT,
+    status TEXT NOT NULL,
+    alloted_kitta INTEGER,
+    applied_kitta INTEGER,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (account, issue)
+);
+"""
+
+APPLIED = 'applied'
+
+
+def account_key(dp_id, username):
+    """Ledger key of an account, unique across DPs."""
+    return f"{dp_id}:{username}"
+
+
+@dataclass(frozen=True, slots=True)
+class LedgerEntry:
+    """One application known to the ledger.
+
+    Attributes:
+        issue (str): Issue.key of the issue applied for
+        company_name (str): Name of the issuing company
+        status (str): 'applied' once the application was submitted
+        kitta (int): Number of shares applied for, None if unknown
+        applied_at (float): Unix time the application was recorded
+    """
+
+    issue: str
+    company_name: str = None
+    status: str = APPLIED
+    kitta: int = None
+    applied_at: float = None
+
+    @classmethod
+    def from_report(cls, data):
+        """Build an entry from an applicantForm/active/search entry."""
+        # Keyed like Issue.key so listing rows and report entries line up
+        return cls(
+            issue=str(data['companyShareId']),
+            company_name=data.get('companyName'),
+        )
+
+
+class Ledger:
+    """Record and look up applications per account.
+
+    One connection is shared by every thread of the run. WAL mode lets
+    concurrent runs on the same machine read while another one writes.
+
+    Args:
+        path (str): SQLite database file, ':memory:' for a throwaway ledger
+    """
+
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(SCHEMA)
+
+    def record(self, account, entry):
+        """Insert or update a single application."""
+        self.record_many(account, [entry])
+
+    def _upsert(self, account, entries):
+        self._db.executemany(
+            'INSERT INTO applications (account, issue, company_name, applied_at, status, kitta)'
+            ' VALUES (?, ?, ?, ?, ?, ?)'
+            ' ON CONFLICT (account, issue) DO UPDATE SET'
+            ' company_name = COALESCE(excluded.company_name, company_name),'
+            ' status = excluded.status,'
+            ' kitta = COALESCE(excluded.kitta, kitta)',
+            [
+                (account, entry.issue, entry.company_name, entry.applied_at or time.time(),
+                 entry.status, entry.kitta)
+                for entry in entries
+            ],
+        )
+
+    def record_many(self, account, entries):
+        """Insert or update several applications in one transaction."""
+        with self._lock, self._db:
+            self._upsert(account, entries)
+
+    def replace(self, account, entries):
+        """Make the ledger of one account match ``entries`` exactly.
+
+        Applications already in the ledger keep their time and kitta.
+        """
+        keys = [entry.issue for entry in entries]
+        with self._lock, self._db:
+            self._db.execute(
+                f'DELETE FROM applications WHERE account = ?'
+                f' AND issue NOT IN ({", ".join("?" * len(keys))})',
+                (account, *keys),
+            )
+            self._upsert(account, entries)
+
+    def entries(self, account):
+        """Return every LedgerEntry of an account, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT issue, company_name, status, kitta, applied_at FROM applications'
+                ' WHERE account = ? ORDER BY applied_at',
+                (account,),
+            ).fetchall()
+        return [LedgerEntry(*row) for row in rows]
+
+    def applied(self, account):
+        """Return the keys of every issue the account has applied for."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT issue FROM applications WHERE account = ? AND status = ?',
+                (account, APPLIED),
+            ).fetchall()
+        return {issue for (issue,) in rows}
+
+    def record_allotments(self, account, allotments):
+        """Store final allotment outcomes so they are never fetched again."""
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO allotments'
+                ' (account, issue, company_name, status, alloted_kitta, applied_kitta, checked_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (account, allotment.issue, allotment.company_name, allotment.status,
+                     allotment.alloted_kitta, allotment.applied_kitta, time.time())
+                    for allotment in allotments
+                ],
+            )
+
+    def allotments(self, account):
+        """Return the stored Allotment of every issue of an account, by issue key."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT issue, company_name, status, alloted_kitta, applied_kitta FROM allotments'
+                ' WHERE account = ?',
+                (account,),
+            ).fetchall()
+        return {row[0]: Allotment(*row) for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,307 @@
+"""
+Retries, backoff, deadlines and a circuit breaker for calls to Meroshare.
+
+During popular issue openings the site answers slowly or with 5xx errors
+for minutes at a time. Transient failures are retried with jittered
+exponential backoff, within a time budget per step (login, navigate,
+listing, apply). A circuit breaker shared by every account stops all of
+them from hammering the site while it is down.
+"""
+
+import contextvars
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from meroshare.errors import CircuitOpen, ServerBusy
+
+logger = logging.getLogger(__name__)
+
+# Statuses a busy server answers with that are worth retrying
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Statuses that mean the request was refused before being processed
+UNPROCESSED_STATUS = frozenset({429, 503})
+
+# Seconds each step may take, retries and backoff included
+STEP_DEADLINES = {'login': 180, 'navigate': 60, 'listing': 60, 'apply': 120}
+
+TRANSIENT_BROWSER_ERRORS = ('timeout', 'timed out', 'net::err_', 'disconnected', 'unload')
+
+
+def _status(error):
+    response = getattr(error, 'response', None)
+    return response.status_code if response is not None else None
+
+
+def _selenium_errors():
+    """Selenium's (TimeoutException, WebDriverException), or None before it is loaded.
+
+    Nothing can raise a selenium error before selenium is imported, so the
+    HTTP backend never has to load it just to classify failures.
+    """
+    exceptions = sys.modules.get('selenium.common.exceptions')
+    if exceptions is None:
+        return None
+    return exceptions.TimeoutException, exceptions.WebDriverException
+
+
+def is_retryable(error):
+    """Whether an error is transient, so the same call may succeed later."""
+    selenium = _selenium_errors()
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, TimeoutError)):
+        return True
+    if selenium and isinstance(error, selenium[0]):
+        return True
+    if isinstance(error, ServerBusy):
+        return error.status == 0 or error.status in RETRYABLE_STATUS
+    if isinstance(error, requests.HTTPError):
+        return _status(error) in RETRYABLE_STATUS
+    if selenium and isinstance(error, selenium[1]):
+        message = str(error).lower()
+        return any(marker in message for marker in TRANSIENT_BROWSER_ERRORS)
+    return False
+
+
+def is_safe_to_resend(error):
+    """Whether a non-idempotent request certainly was not processed.
+
+    A read timeout may hide a submitted application, so only refused
+    connections and explicit "try later" answers qualify.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError):
+        # An aborted connection may have delivered the request first
+        return 'Connection aborted' not in str(error)
+    if isinstance(error, requests.HTTPError):
+        return _status(error) in UNPROCESSED_STATUS
+    if isinstance(error, ServerBusy):
+        return error.status in UNPROCESSED_STATUS
+    return False
+
+
+class Backoff:
+    """Exponential backoff with full jitter.
+
+    Args:
+        base (float): Upper bound of the first delay, in seconds
+        cap (float): Upper bound of any delay, in seconds
+    """
+
+    def __init__(self, base=0.5, cap=15.0):
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt):
+        """Delay before retry number ``attempt`` (1 for the first retry)."""
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Stops calls after repeated failures and lets one through after a pause.
+
+    Closed: calls pass. After ``failure_threshold`` consecutive failures it
+    opens and every call fails fast with CircuitOpen. After
+    ``reset_timeout`` seconds one trial call is let through (half-open). Its
+    success closes the breaker, its failure opens it again. Calls arriving
+    during the trial may wait for its outcome instead of failing.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the breaker
+        reset_timeout (float): Seconds to stay open before a trial call
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, failure_threshold=8, reset_timeout=20.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._condition = threading.Condition()
+
+    def retry_after(self):
+        """Seconds until the breaker lets a call through, 0 if it would now."""
+        with self._condition:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self, timeout=0.0):
+        """Raise CircuitOpen unless a call may go ahead.
+
+        Args:
+            timeout (float): Seconds to wait for a running trial call to
+                succeed or fail, 0 to fail at once
+        """
+        give_up = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self.state == self.CLOSED:
+                    return
+                if self.state == self.OPEN:
+                    if time.monotonic() - self._opened_at < self.reset_timeout:
+                        raise CircuitOpen("Meroshare is failing, pausing requests")
+                    self.state = self.HALF_OPEN
+                    self._trial_running = False
+                if not self._trial_running:
+                    self._trial_running = True
+                    return
+                remaining = give_up - time.monotonic()
+                if remaining <= 0:
+                    raise CircuitOpen("Waiting for a trial request to Meroshare")
+                self._condition.wait(remaining)
+
+    def record_success(self):
+        with self._condition:
+            if self.state != self.CLOSED:
+                logger.info("Meroshare is answering again, resuming requests")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+            self._condition.notify_all()
+
+    def record_failure(self):
+        with self._condition:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        f"Pausing requests to Meroshare for {self.reset_timeout:g}s"
+                        f" after {self._failures} failure(s)")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+                self._condition.notify_all()
+
+
+class RetryPolicy:
+    """Run a step, retrying transient failures until its deadline.
+
+    One policy, and its breaker, can be shared by every client of a run.
+
+    Args:
+        attempts (int): Maximum tries per call, 1 disables retries
+        backoff (Backoff): Delay between tries
+        deadlines (dict): Seconds per step name, see STEP_DEADLINES
+        breaker (CircuitBreaker): Shared breaker, None to disable
+        admission (AdmissionController): Holds every try until it may go out, None to disable
+        sleep (callable): Used to wait between tries
+    """
+
+    def __init__(self, attempts=4, backoff=None, deadlines=None, breaker=None, admission=None,
+                 sleep=time.sleep):
+        self.attempts = attempts
+        self.backoff = backoff or Backoff()
+        self.deadlines = STEP_DEADLINES if deadlines is None else deadlines
+        self.breaker = breaker
+        self.admission = admission
+        self.sleep = sleep
+
+    def run(self, step, fn, *args, retryable=is_retryable, on_retry=None, host='', **kwargs):
+        """Call ``fn(*args, **kwargs)`` with retries.
+
+        Args:
+            step (str): Step name, selects the deadline and appears in logs
+            fn (callable): The call to make
+            retryable (callable): Decides whether an error is worth retrying
+            on_retry (callable): Called before every retry, e.g. to reload a page
+            host (str): Host the call goes to, for the admission controller
+
+        Returns:
+            Whatever ``fn`` returns
+        """
+        deadline = time.monotonic() + self.deadlines.get(step, float('inf'))
+        attempt = 1
+        while True:
+            if self.breaker:
+                wait_for = self.breaker.retry_after()
+                if wait_for and time.monotonic() + wait_for < deadline and attempt < self.attempts:
+                    self.sleep(wait_for)
+                # Wait for a running trial rather than fail, within the step's deadline
+                timeout = deadline - time.monotonic()
+                if timeout == float('inf'):
+                    timeout = self.breaker.reset_timeout
+                try:
+                    self.breaker.before_call(timeout=max(0.0, timeout))
+                except CircuitOpen:
+                    # The trial failed or outlasted the wait, try again once the breaker allows
+                    wait_for = self.breaker.retry_after()
+                    if attempt >= self.attempts or time.monotonic() + wait_for >= deadline:
+                        raise
+                    if wait_for:
+                        self.sleep(wait_for)
+                    attempt += 1
+                    continue
+            try:
+                with self.admission.admit(step, host) if self.admission else nullcontext():
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                if not retryable(e):
+                    # The site answered, it is just not what we hoped for
+                    if self.breaker:
+                        self.breaker.record_success()
+                    raise
+                if self.breaker:
+                    self.breaker.record_failure()
+                delay = self.backoff.delay(attempt)
+                if attempt >= self.attempts or time.monotonic() + delay >= deadline:
+                    raise
+                logger.warning(f"{step} failed ({e.__class__.__name__}: {e}), retry {attempt} in {delay:.1f}s")
+                self.sleep(delay)
+                attempt += 1
+                if on_retry:
+                    on_retry()
+                continue
+            if self.breaker:
+                self.breaker.record_success()
+            return result
+
+
+# Used when a client is given no policy: every call is made exactly once
+NO_RETRY = RetryPolicy(attempts=1, deadlines={})
+
+_hedge_pool = None
+_hedge_lock = threading.Lock()
+
+
+def _executor():
+    global _hedge_pool
+    with _hedge_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='hedge')
+        return _hedge_pool
+
+
+def hedge(fn, delay):
+    """Call ``fn`` and, if it has not returned after ``delay`` seconds, call it again.
+
+    Whichever call succeeds first wins, the other is left to finish in the
+    background. Only use it for idempotent reads.
+
+    Returns:
+        The first successful result. If both fail, the last error is raised.
+    """
+    # Each copy runs in the caller's context, so log fields and metric labels follow it
+    pending = {_executor().submit(contextvars.copy_context().run, fn)}
+    done, pending = wait(pending, timeout=delay)
+    if not done:
+        pending.add(_executor().submit(contextvars.copy_context().run, fn))
+    error = None
+    while True:
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+        if not pending:
+            raise error
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
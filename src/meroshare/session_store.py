@@ -0,0 +1,135 @@
+"""
+Encrypted on-disk cache of authenticated Meroshare sessions.
+
+Sessions are keyed by (dp_id, username) and encrypted with a key derived from
+the account password, so a stored session is useless without the password
+and a password change simply invalidates it.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+
+from cryptography.fernet import Fernet, InvalidToken
+
+logger = logging.getLogger(__name__)
+
+SESSION_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ipo_automate', 'sessions')
+SALT_SIZE = 16
+KDF_ITERATIONS = 200_000
+
+
+@dataclass
+class StoredSession:
+    """Authentication state captured after a successful login."""
+
+    token: str = None
+    cookies: list = field(default_factory=list)
+    local_storage: dict = field(default_factory=dict)
+    session_storage: dict = field(default_factory=dict)
+    saved_at: float = field(default_factory=time.time)
+
+
+def _fernet(password, salt):
+    key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, KDF_ITERATIONS)
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+class EncryptedStore:
+    """Encrypted JSON files, one per account, keyed by the account password.
+
+    Subclasses set the file ``suffix`` and what their entries are called in
+    logs, and turn the stored JSON into their own objects.
+
+    Args:
+        directory (str): Where the files are kept
+    """
+
+    suffix = '.json'
+    label = 'entry'
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, dp_id, username):
+        digest = hashlib.sha256(f"{dp_id}:{username}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}{self.suffix}")
+
+    def _read(self, dp_id, username, password, parse):
+        """Decrypt the file of an account and build an entry from its JSON.
+
+        Args:
+            parse (callable): Builds the entry from the decrypted JSON
+
+        Returns:
+            What ``parse`` returns, or None when the file is missing or
+            unreadable. An unreadable file is deleted.
+        """
+        path = self._path(dp_id, username)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        try:
+            salt, token = data[:SALT_SIZE], data[SALT_SIZE:]
+            return parse(json.loads(_fernet(password, salt).decrypt(token)))
+        except (InvalidToken, ValueError, TypeError, KeyError):
+            logger.warning(f"Discarding unreadable {self.label}")
+            self.delete(dp_id, username)
+            return None
+
+    def _write(self, dp_id, username, password, data):
+        """Encrypt and store JSON data, readable only by the current user."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        salt = os.urandom(SALT_SIZE)
+        token = _fernet(password, salt).encrypt(json.dumps(data).encode())
+
+        path = self._path(dp_id, username)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(salt + token)
+        os.replace(tmp_path, path)
+
+    def delete(self, dp_id, username):
+        """Forget the stored entry of an account."""
+        try:
+            os.remove(self._path(dp_id, username))
+        except OSError:
+            pass
+
+
+class SessionStore(EncryptedStore):
+    """Load and save encrypted sessions for Meroshare accounts.
+
+    Args:
+        directory (str): Where session files are kept
+        max_age (float): Sessions older than this many seconds are ignored
+    """
+
+    suffix = '.session'
+    label = 'stored session'
+
+    def __init__(self, directory=SESSION_DIR, max_age=12 * 3600):
+        super().__init__(directory)
+        self.max_age = max_age
+
+    def load(self, dp_id, username, password):
+        """Return the stored session for an account, or None if unusable."""
+        session = self._read(dp_id, username, password, lambda data: StoredSession(**data))
+        if session is None:
+            return None
+        if time.time() - session.saved_at > self.max_age:
+            self.delete(dp_id, username)
+            return None
+        return session
+
+    def save(self, dp_id, username, password, session):
+        """Encrypt and store a session, readable only by the current user."""
+        self._write(dp_id, username, password, asdict(session))
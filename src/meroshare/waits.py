@@ -0,0 +1,156 @@
+"""
+Waits that resolve from inside the page instead of sleeping or slow polling.
+
+``wait_for`` installs a MutationObserver through ``execute_async_script`` so
+the WebDriver call returns as soon as the DOM changes, rather than on the next
+500 ms WebDriverWait poll. If the async script cannot run (e.g. the page is
+unloading) it falls back to adaptive polling that starts at 10 ms.
+"""
+
+import time
+
+from selenium.common.exceptions import (
+    JavascriptException, NoSuchElementException, StaleElementReferenceException,
+    TimeoutException, WebDriverException,
+)
+from selenium.webdriver.common.by import By
+
+WAIT_FOR_ELEMENT_JS = """
+const [kind, expr, condition, timeoutMs, done] = arguments;
+const find = () => {
+    if (kind === 'xpath') {
+        return document.evaluate(
+            expr, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return document.querySelector(expr);
+};
+const ready = (element) => {
+    if (!element) {
+        return false;
+    }
+    if (condition === 'present') {
+        return true;
+    }
+    const visible = element.getClientRects().length > 0;
+    return condition === 'visible' ? visible : visible && !element.disabled;
+};
+const check = () => {
+    const element = find();
+    return ready(element) ? element : null;
+};
+
+const found = check();
+if (found) {
+    done(found);
+} else {
+    let observer = null;
+    let timer = null;
+    const finish = (value) => {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(value);
+    };
+    observer = new MutationObserver(() => {
+        const element = check();
+        if (element) {
+            finish(element);
+        }
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+    // The element may have appeared since the last mutation was handled
+    timer = setTimeout(() => finish(check()), timeoutMs);
+}
+"""
+
+CONDITIONS = ('present', 'visible', 'clickable')
+
+
+def _to_js_locator(locator):
+    """Translate a Selenium (By, value) locator into ('css'|'xpath', expression)."""
+    by, value = locator
+    if by == By.XPATH:
+        return 'xpath', value
+    if by == By.CSS_SELECTOR:
+        return 'css', value
+    if by == By.ID:
+        return 'css', f'[id="{value}"]'
+    if by == By.NAME:
+        return 'css', f'[name="{value}"]'
+    if by == By.CLASS_NAME:
+        return 'css', f'.{value}'
+    raise ValueError(f"Unsupported locator strategy: {by}")
+
+
+def poll_until(condition, timeout=10, initial_interval=0.01, max_interval=0.1, message=''):
+    """Poll ``condition()`` with a short, growing interval until it is truthy.
+
+    Args:
+        condition (callable): Returns a truthy value once ready
+        timeout (float): Seconds before giving up
+        initial_interval (float): First sleep between polls
+        max_interval (float): Upper bound for the sleep between polls
+        message (str): Included in the TimeoutException
+
+    Returns:
+        The first truthy value returned by ``condition``
+    """
+    deadline = time.monotonic() + timeout
+    interval = initial_interval
+    while True:
+        try:
+            value = condition()
+            if value:
+                return value
+        except (NoSuchElementException, StaleElementReferenceException):
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(message or "Timed out waiting for condition")
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+
+
+def _poll_for_element(driver, locator, timeout, condition):
+    def find():
+        for element in driver.find_elements(*locator):
+            if condition == 'present':
+                return element
+            if element.is_displayed() and (condition == 'visible' or element.is_enabled()):
+                return element
+        return None
+
+    return poll_until(find, timeout, message=f"Timed out waiting for {locator}")
+
+
+def wait_for(driver, locator, timeout=10, condition='present'):
+    """Wait for an element and return it as soon as it is ready.
+
+    Args:
+        driver: Selenium WebDriver
+        locator (tuple): Selenium (By, value) locator
+        timeout (float): Seconds before raising TimeoutException
+        condition (str): 'present', 'visible' or 'clickable'
+
+    Returns:
+        The matching WebElement
+    """
+    if condition not in CONDITIONS:
+        raise ValueError(f"Unknown wait condition: {condition}")
+
+    kind, expression = _to_js_locator(locator)
+    deadline = time.monotonic() + timeout
+    try:
+        element = driver.execute_async_script(
+            WAIT_FOR_ELEMENT_JS, kind, expression, condition, int(timeout * 1000))
+    except (JavascriptException, TimeoutException):
+        # Polling only gets the time the caller has left
+        return _poll_for_element(driver, locator, deadline - time.monotonic(), condition)
+    except WebDriverException as e:
+        # Navigation while the observer was installed
+        if 'unload' not in str(e).lower() and 'detached' not in str(e).lower():
+            raise
+        return _poll_for_element(driver, locator, deadline - time.monotonic(), condition)
+
+    if element is None:
+        raise TimeoutException(f"Timed out waiting for {locator}")
+    return element
@@ -0,0 +1,37 @@
+"""
+Meroshare account credentials.
+"""
+
+from dataclasses import asdict, dataclass
+
+
+@dataclass(frozen=True)
+class Account:
+    """Credentials for a single Meroshare account.
+
+    Attributes:
+        username (str): Meroshare username
+        password (str): Meroshare password
+        dp_id (str): DP ID number
+        crn (str): Customer Reference Number
+        transaction_pin (str): Transaction PIN used to confirm applications
+        name (str): Optional human-friendly label used in reports
+    """
+
+    username: str
+    password: str
+    dp_id: str
+    crn: str
+    transaction_pin: str = None
+    name: str = None
+
+    @property
+    def label(self):
+        """Name used to identify the account in logs and reports."""
+        return self.name or f"{self.dp_id}/{self.username}"
+
+    def credentials(self):
+        """Keyword arguments accepted by the Meroshare client constructors."""
+        credentials = asdict(self)
+        del credentials['name']
+        return credentials
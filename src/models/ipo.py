@@ -0,0 +1,223 @@
+"""
+Issues listed under My ASBA.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+
+# Meroshare shows issue dates in Nepal time without an offset
+NEPAL_TZ = timezone(timedelta(hours=5, minutes=45), 'NPT')
+ISSUE_DATE_FORMAT = '%b %d, %Y %I:%M:%S %p'
+
+
+def parse_issue_date(value):
+    """Parse an API date such as "Jan 1, 2026 10:00:00 AM" as Nepal time.
+
+    Returns:
+        An aware datetime, or None when the value is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, ISSUE_DATE_FORMAT).replace(tzinfo=NEPAL_TZ)
+    except ValueError:
+        return None
+
+
+class ApplyState(str, Enum):
+    """Whether an issue can still be applied for by the logged-in account."""
+
+    AVAILABLE = 'available'
+    APPLIED = 'applied'
+    UNAVAILABLE = 'unavailable'
+
+
+@dataclass(frozen=True, slots=True)
+class Issue:
+    """A single row of the applicable issue listing.
+
+    Attributes:
+        company_name (str): Name of the issuing company
+        share_type (str): e.g. "IPO", "FPO", "RIGHTS"
+        share_group (str): e.g. "Ordinary Shares", "Debentures"
+        issue_id (str): companyShareId when known, otherwise the scrip,
+            share group and sub group together
+        scrip (str): Trading symbol of the company, shared by its sibling
+            issues (e.g. general public and local quota), for display only
+        sub_group (str): e.g. "For General Public"
+        apply_state (ApplyState): State of the Apply button
+        index (int): Position of the row in the listing
+        opens_at (datetime): When applications open, if the listing says
+    """
+
+    company_name: str
+    share_type: str
+    share_group: str
+    issue_id: str = None
+    scrip: str = None
+    sub_group: str = None
+    apply_state: ApplyState = ApplyState.UNAVAILABLE
+    index: int = None
+    opens_at: datetime = None
+
+    @property
+    def is_ordinary_ipo(self):
+        return self.share_type == "IPO" and self.share_group == "Ordinary Shares"
+
+    @property
+    def can_apply(self):
+        return self.apply_state is ApplyState.AVAILABLE
+
+    @property
+    def key(self):
+        """Identifier that is stable across listings and backends."""
+        return self.issue_id
+
+    @property
+    def row_key(self):
+        """Scrip, share group and sub group, which find the issue's row in the page."""
+        return self.scrip, self.share_group, self.sub_group
+
+    @classmethod
+    def from_row(cls, row):
+        """Build an issue from a row extracted from the ASBA page DOM.
+
+        The page does not show the companyShareId, the row carries it when
+        it could be looked up.
+        """
+        label = (row.get('button') or '').strip().lower()
+        if label == 'apply':
+            state = ApplyState.AVAILABLE if row.get('enabled') else ApplyState.APPLIED
+        elif label == 'edit':
+            state = ApplyState.APPLIED
+        else:
+            state = ApplyState.UNAVAILABLE
+
+        return cls(
+            company_name=row.get('companyName') or '',
+            share_type=row.get('shareType') or '',
+            share_group=row.get('shareGroup') or '',
+            issue_id=row.get('companyShareId') or '/'.join(
+                row[field] for field in ('scrip', 'shareGroup', 'subGroup') if row.get(field)),
+            scrip=row.get('scrip'),
+            sub_group=row.get('subGroup'),
+            apply_state=state,
+            index=row.get('index'),
+        )
+
+    @classmethod
+    def from_api(cls, data, index=None):
+        """Build an issue from an applicableIssue API entry."""
+        # The API sets "action" to "edit" or "reapply" once an application exists
+        state = ApplyState.APPLIED if data.get('action') else ApplyState.AVAILABLE
+        return cls(
+            company_name=data.get('companyName', ''),
+            share_type=data.get('shareTypeName', ''),
+            share_group=data.get('shareGroupName', ''),
+            issue_id=str(data['companyShareId']),
+            scrip=data.get('scrip'),
+            sub_group=data.get('subGroup'),
+            apply_state=state,
+            index=index,
+            opens_at=parse_issue_date(data.get('issueOpenDate')),
+        )
+
+
+class ApplyStatus(str, Enum):
+    """Outcome of trying to apply for one issue."""
+
+    APPLIED = 'applied'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+
+
+@dataclass(frozen=True, slots=True)
+class ApplyResult:
+    """Outcome of an application attempt for a single issue."""
+
+    issue: Issue
+    status: ApplyStatus
+    message: str = ''
+
+
+def select_issues(issues, pattern=None):
+    """Return the ordinary-share IPOs whose name or scrip matches ``pattern``.
+
+    Args:
+        issues (list): Issues from the listing
+        pattern (str): Case-insensitive regular expression, None selects all
+
+    Returns:
+        List of matching issues in listing order
+    """
+    selected = [issue for issue in issues if issue.is_ordinary_ipo]
+    if pattern is None:
+        return selected
+
+    try:
+        regex = re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        # Plain company names may contain characters like "(" or "+"
+        regex = re.compile(re.escape(pattern), re.IGNORECASE)
+    return [
+        issue for issue in selected
+        if regex.search(issue.company_name) or (issue.scrip and regex.search(issue.scrip))
+    ]
+
+
+def summarize_results(results):
+    """Render apply results as a short one-line summary."""
+    counts = {status: 0 for status in ApplyStatus}
+    for result in results:
+        counts[result.status] += 1
+    return ", ".join(f"{status.value} {count}" for status, count in counts.items())
+
+
+# Allotment statuses that never change once shown, compared case-insensitively
+FINAL_ALLOTMENT_STATUSES = frozenset({'alloted', 'allotted', 'not alloted', 'not allotted', 'rejected'})
+
+
+@dataclass(frozen=True, slots=True)
+class Allotment:
+    """Allotment outcome of one application.
+
+    Attributes:
+        issue (str): Issue.key of the issue applied for
+        company_name (str): Name of the issuing company
+        status (str): Status as shown by Meroshare, e.g. "Alloted", "Not Alloted"
+        alloted_kitta (int): Shares received, None until allotted
+        applied_kitta (int): Shares applied for
+    """
+
+    issue: str
+    company_name: str = None
+    status: str = None
+    alloted_kitta: int = None
+    applied_kitta: int = None
+
+    @property
+    def final(self):
+        """Whether the status can no longer change."""
+        return (self.status or '').strip().lower() in FINAL_ALLOTMENT_STATUSES
+
+    @classmethod
+    def from_detail(cls, report_entry, detail):
+        """Build from an application report entry and its report/detail answer."""
+        return cls(
+            issue=str(report_entry['companyShareId']),
+            company_name=report_entry.get('companyName'),
+            status=detail.get('statusName'),
+            alloted_kitta=detail.get('receivedKitta'),
+            applied_kitta=detail.get('appliedKitta'),
+        )
+
+
+def listing_fingerprint(issues):
+    """Return a hash that changes whenever an issue or its state changes."""
+    digest = hashlib.sha256()
+    for key, state in sorted((issue.key or '', issue.apply_state.value) for issue in issues):
+        digest.update(f"{key}={state};".encode())
+    return digest.hexdigest()
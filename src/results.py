@@ -0,0 +1,200 @@
+"""
+Check the allotment results of many accounts at once over plain HTTP.
+
+Every account logs in over the JSON API and reads its application report,
+then the detail of each application is fetched. All requests share one
+connection pool and run on a bounded number of threads. Final outcomes
+("Alloted", "Not Alloted") are kept in the ledger and never fetched again.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from requests.adapters import HTTPAdapter
+
+from meroshare.api import API_URL, MeroshareAPIClient
+from meroshare.ledger import account_key
+from models.ipo import Allotment
+from utils.logs import log_context
+from utils.tables import read_rows
+
+logger = logging.getLogger(__name__)
+
+REPORT_FIELDS = (
+    'account', 'issue', 'company_name', 'status', 'alloted_kitta', 'applied_kitta', 'cached',
+    'error',
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ResultRow:
+    """One line of the allotment report.
+
+    Attributes:
+        account (str): Account.label of the account
+        allotment (Allotment): Outcome of the application, None if the account failed
+        cached (bool): Whether the outcome came from the ledger
+        error (str): Why the outcome could not be read
+    """
+
+    account: str
+    allotment: Allotment = None
+    cached: bool = False
+    error: str = None
+
+    def as_dict(self):
+        allotment = self.allotment or Allotment(issue=None)
+        return {
+            'account': self.account,
+            'issue': allotment.issue,
+            'company_name': allotment.company_name,
+            'status': allotment.status,
+            'alloted_kitta': allotment.alloted_kitta,
+            'applied_kitta': allotment.applied_kitta,
+            'cached': self.cached,
+            'error': self.error,
+        }
+
+
+def parse_issue_list(value):
+    """Read the issues to check from a comma-separated list or a YAML/CSV file.
+
+    Files list one issue per entry, by ``scrip`` or ``name``, optionally
+    under an ``issues`` key.
+
+    Returns:
+        List of scrips or company names
+    """
+    if not value:
+        return []
+    if os.path.isfile(value):
+        names = [row.get('scrip') or row.get('name') for row in read_rows(value, 'issues')]
+        return [str(name).strip() for name in names if name]
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def _matches(entry, wanted):
+    if not wanted:
+        return True
+    candidates = (entry.get('scrip'), entry.get('companyName'), entry.get('companyShareId'))
+    return any(str(candidate).lower() in wanted for candidate in candidates if candidate)
+
+
+class ResultChecker:
+    """Read allotment results for every account and selected issue.
+
+    Args:
+        accounts (list): Account instances to check
+        issues (list): Scrips or company names to report, empty for every application
+        base_url (str): Root of the Meroshare JSON API
+        max_workers (int): Upper bound on requests in flight, also the pool size
+        ledger (Ledger): Where final outcomes are cached
+        session_store (SessionStore): Reuse saved logins
+        retry_policy (RetryPolicy): Retries transient failures
+    """
+
+    def __init__(self, accounts, issues=None, base_url=API_URL, max_workers=16, ledger=None,
+                 session_store=None, retry_policy=None):
+        self.accounts = accounts
+        self.issues = {issue.lower() for issue in issues or []}
+        self.base_url = base_url
+        self.max_workers = max(1, max_workers)
+        self.ledger = ledger
+        self.session_store = session_store
+        self.retry_policy = retry_policy
+
+    def _client(self, account, adapter):
+        return MeroshareAPIClient(
+            base_url=self.base_url, session_store=self.session_store,
+            retry_policy=self.retry_policy, adapter=adapter, **account.credentials())
+
+    def _list(self, account, client):
+        """Log in and split the account's applications into cached and pending.
+
+        Returns:
+            (rows from the ledger, report entries still to fetch)
+        """
+        try:
+            with log_context(account=account.label):
+                client.login()
+                entries = [entry for entry in client.application_rows() if _matches(entry, self.issues)]
+        except Exception as e:
+            logger.error(f"[{account.label}] Could not read the application report: {e}")
+            return [ResultRow(account.label, error=str(e))], []
+
+        known = self.ledger.allotments(account_key(account.dp_id, account.username)) if self.ledger else {}
+        cached, pending = [], []
+        for entry in entries:
+            key = str(entry['companyShareId'])
+            if key in known and known[key].final:
+                cached.append(ResultRow(account.label, known[key], cached=True))
+            else:
+                pending.append(entry)
+        return cached, pending
+
+    def _fetch(self, account, client, entry):
+        issue = str(entry.get('companyShareId'))
+        try:
+            with log_context(account=account.label, issue=issue):
+                detail = client.allotment(entry['applicantFormId'])
+            return ResultRow(account.label, Allotment.from_detail(entry, detail))
+        except Exception as e:
+            logger.error(f"[{account.label}] Could not read the result of {issue}: {e}")
+            return ResultRow(account.label, Allotment(issue, entry.get('companyName')), error=str(e))
+
+    def run(self):
+        """Check every account.
+
+        Returns:
+            List of ResultRow, grouped by account in the order of ``accounts``
+        """
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        clients = [self._client(account, adapter) for account in self.accounts]
+        try:
+            with ThreadPoolExecutor(self.max_workers, thread_name_prefix='results') as pool:
+                listed = list(pool.map(self._list, self.accounts, clients))
+                jobs = [
+                    (index, pool.submit(self._fetch, self.accounts[index], clients[index], entry))
+                    for index, (_, pending) in enumerate(listed)
+                    for entry in pending
+                ]
+                fetched = [[] for _ in self.accounts]
+                for index, job in jobs:
+                    fetched[index].append(job.result())
+        finally:
+            for client in clients:
+                client.close()
+            adapter.close()
+
+        rows = []
+        for account, (cached, _), new in zip(self.accounts, listed, fetched):
+            final = [row.allotment for row in new if row.allotment and row.allotment.final]
+            if self.ledger and final:
+                self.ledger.record_allotments(account_key(account.dp_id, account.username), final)
+            rows.extend(cached + new)
+        logger.info(f"Checked {len(rows)} result(s) for {len(self.accounts)} account(s)")
+        return rows
+
+
+def format_report(rows, fmt='csv'):
+    """Render report rows as CSV or JSON text."""
+    records = [row.as_dict() for row in rows]
+    if fmt == 'json':
+        return json.dumps(records, indent=2)
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS, lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(records)
+    return out.getvalue()
+
+
+def write_report(rows, path):
+    """Write report rows to ``path``, as JSON when it ends in .json and CSV otherwise."""
+    fmt = 'json' if path.lower().endswith('.json') else 'csv'
+    with open(path, 'w', newline='') as f:
+        f.write(format_report(rows, fmt))
@@ -0,0 +1,80 @@
+"""
+Run an action for many Meroshare accounts on a bounded worker pool.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from utils.logs import log_context
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AccountResult:
+    """Outcome of running an action for one account."""
+
+    account: str
+    ok: bool
+    detail: str
+    elapsed: float
+
+
+def run_one(account, job):
+    """Run ``job(account)`` and turn its outcome, or its failure, into an AccountResult."""
+    # Name the worker after the account so logs and traces can tell them apart
+    threading.current_thread().name = account.label
+    start = time.perf_counter()
+    with log_context(account=account.label):
+        try:
+            detail = job(account)
+            ok = True
+        except Exception as e:
+            logger.error(f"[{account.label}] {e}")
+            detail = str(e) or type(e).__name__
+            ok = False
+    return AccountResult(
+        account=account.label,
+        ok=ok,
+        detail="" if detail is None else str(detail),
+        elapsed=time.perf_counter() - start,
+    )
+
+
+def run_accounts(accounts, job, max_workers=4):
+    """Run ``job(account)`` for every account with at most ``max_workers`` at once.
+
+    A failure in one account never stops the others. The job should build
+    its own client so that no browser or session is shared between workers.
+
+    Args:
+        accounts (list): Account instances to process
+        job (callable): Called with an Account, returns a short detail string
+        max_workers (int): Upper bound on accounts processed concurrently
+
+    Returns:
+        List of AccountResult in the same order as ``accounts``
+    """
+    workers = max(1, min(max_workers, len(accounts)))
+    logger.info(f"Running {len(accounts)} account(s) with {workers} worker(s)")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='account') as pool:
+        return list(pool.map(lambda account: run_one(account, job), accounts))
+
+
+def format_results(results):
+    """Render account results as a plain-text table."""
+    width = max([len("Account")] + [len(result.account) for result in results])
+    lines = [
+        f"{'Account':<{width}}  {'Status':<6}  {'Time':>7}  Detail",
+        f"{'-' * width}  {'-' * 6}  {'-' * 7}  {'-' * 6}",
+    ]
+    for result in results:
+        status = "OK" if result.ok else "FAILED"
+        lines.append(
+            f"{result.account:<{width}}  {status:<6}  {result.elapsed:>6.1f}s  {result.detail}")
+    succeeded = sum(result.ok for result in results)
+    lines.append(f"{succeeded}/{len(results)} account(s) succeeded")
+    return "\n".join(lines)
@@ -0,0 +1,133 @@
+"""
+Log in ahead of an issue opening and apply the moment it opens.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from meroshare.errors import SessionExpired
+from models.ipo import ApplyStatus, select_issues, summarize_results
+from runner import run_accounts
+from utils.profiling import span
+
+logger = logging.getLogger(__name__)
+
+
+def wait_until(moment, stop_event=None):
+    """Block until ``moment`` (an aware datetime) or until ``stop_event`` is set.
+
+    Returns:
+        False when the wait was cut short by ``stop_event``
+    """
+    stop_event = stop_event or threading.Event()
+    target = moment.timestamp()
+    while True:
+        remaining = target - time.time()
+        if remaining <= 0:
+            return True
+        # Re-check the wall clock now and then in case it is adjusted
+        if stop_event.wait(min(remaining, 30)):
+            return False
+
+
+class PrewarmScheduler:
+    """Have every account ready on the ASBA page before an issue opens.
+
+    ``lead`` seconds before the opening, one client per account is created,
+    logged in and sent to ASBA. At the opening instant each account polls
+    the listing until the issue shows up (for at most ``grace`` seconds) and
+    applies straight away. All accounts run at the same time so none of them
+    is still warming up when the issue opens.
+
+    Args:
+        accounts (list): Account instances to apply for
+        make_client (callable): Builds a fresh client for an Account
+        opening (Opening): When to apply and which issues to apply for
+        lead (float): Seconds before the opening to start logging in
+        grace (float): Seconds after the opening to wait for the listing
+        poll_interval (float): Seconds between listing polls after the opening
+        stop_event (threading.Event): Set it to abandon the schedule
+    """
+
+    def __init__(self, accounts, make_client, opening, lead=60, grace=30, poll_interval=0.2,
+                 stop_event=None):
+        self.accounts = accounts
+        self.make_client = make_client
+        self.opening = opening
+        self.lead = lead
+        self.grace = grace
+        self.poll_interval = poll_interval
+        self.stop_event = stop_event or threading.Event()
+
+    def _poll(self, client):
+        try:
+            return client.poll_issues()
+        except SessionExpired:
+            logger.info("Session expired while waiting, logging in again")
+            client.login()
+            return client.poll_issues()
+
+    def _await_issue(self, client):
+        """Poll the listing until a selected issue can be applied for.
+
+        Returns:
+            The selected issues that can be applied for, empty when none
+            opened within the grace period
+        """
+        deadline = time.monotonic() + self.grace
+        while True:
+            issues = self._poll(client)
+            opened = [issue for issue in select_issues(issues, self.opening.pattern)
+                      if issue.can_apply]
+            if opened:
+                return opened
+            if time.monotonic() >= deadline or self.stop_event.wait(self.poll_interval):
+                return []
+
+    def _job(self, account):
+        client = self.make_client(account)
+        try:
+            with span('prewarm.warm'):
+                client.login()
+                client.navigate("asba")
+            logger.info(f"Ready, waiting for {self.opening.opens_at:%Y-%m-%d %H:%M:%S %Z}")
+
+            if not wait_until(self.opening.opens_at, self.stop_event):
+                return "cancelled"
+
+            opened = self.opening.opens_at.timestamp()
+            with span('prewarm.fire'):
+                awaited = self._await_issue(client)
+                if not awaited:
+                    raise Exception(f"No issue matching '{self.opening.pattern}' opened")
+                # Loads the listing again, the one on the page is from before the opening
+                client.navigate("asba")
+                results = client.applyAvailableIPOS(self.opening.pattern)
+            latency = time.time() - opened
+
+            summary = summarize_results(results)
+            logger.info(f"Submitted {summary} {latency:.2f}s after the opening")
+            listed = {result.issue.key for result in results}
+            missing = [issue.company_name for issue in awaited if issue.key not in listed]
+            if missing:
+                raise Exception(f"Not in the listing applied from: {', '.join(missing)}")
+            if any(result.status is ApplyStatus.FAILED for result in results):
+                raise Exception(f"Some applications failed: {summary}")
+            return f"{summary}, {latency:.2f}s after open"
+        finally:
+            client.close()
+
+    def run(self):
+        """Sleep until the lead time, then warm up and apply for every account.
+
+        Returns:
+            List of AccountResult in the same order as the accounts
+        """
+        logger.info(
+            f"Issue(s) '{self.opening.pattern}' open at {self.opening.opens_at:%Y-%m-%d %H:%M:%S %Z},"
+            f" logging in {self.lead:g}s before")
+        if not wait_until(self.opening.opens_at - timedelta(seconds=self.lead), self.stop_event):
+            return []
+        return run_accounts(self.accounts, self._job, max_workers=len(self.accounts))
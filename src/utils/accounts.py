@@ -0,0 +1,58 @@
+"""
+Loading Meroshare accounts from the environment or an accounts file.
+"""
+
+import os
+
+from models.account import Account
+from utils.tables import read_rows
+
+ENV_VARS = {
+    'username': 'MEROSHARE_USERNAME',
+    'password': 'MEROSHARE_PASSWORD',
+    'dp_id': 'MEROSHARE_DP_ID',
+    'crn': 'MEROSHARE_CRN',
+    'transaction_pin': 'MEROSHARE_TRANSACTIONPIN',
+}
+
+REQUIRED_FIELDS = ('username', 'password', 'dp_id', 'crn')
+
+
+def account_from_env():
+    """Build an account from the MEROSHARE_* environment variables."""
+    return Account(**{field: os.getenv(var) for field, var in ENV_VARS.items()})
+
+
+def missing_env_vars():
+    """Return the required MEROSHARE_* variables that are not set."""
+    return [ENV_VARS[field] for field in REQUIRED_FIELDS if not os.getenv(ENV_VARS[field])]
+
+
+def load_accounts(path):
+    """Load accounts from a YAML or CSV file.
+
+    YAML files hold a list of mappings, optionally under an ``accounts`` key.
+    CSV files have a header row. Both use the Account field names
+    (username, password, dp_id, crn, transaction_pin, name).
+
+    Args:
+        path (str): Path to the accounts file
+
+    Returns:
+        List of Account instances
+    """
+    rows = read_rows(path, 'accounts')
+
+    accounts = []
+    for index, row in enumerate(rows, start=1):
+        values = {key: str(value).strip() for key, value in row.items()
+                  if key in Account.__dataclass_fields__ and value not in (None, '')}
+        missing = [field for field in REQUIRED_FIELDS if field not in values]
+        if missing:
+            raise ValueError(
+                f"Account #{index} in {path} is missing: {', '.join(missing)}")
+        accounts.append(Account(**values))
+
+    if not accounts:
+        raise ValueError(f"No accounts found in {path}")
+    return accounts
@@ -0,0 +1,98 @@
+"""
+Upcoming issue openings, read from the listing or from a calendar file.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from models.ipo import NEPAL_TZ
+from utils.tables import read_rows
+
+
+@dataclass(frozen=True)
+class Opening:
+    """A moment at which one or more issues open for applications.
+
+    Attributes:
+        opens_at (datetime): Timezone-aware opening time
+        pattern (str): Regular expression selecting the issues that open
+    """
+
+    opens_at: datetime
+    pattern: str
+
+
+def parse_open_time(value):
+    """Parse an ISO 8601 time, reading times without an offset as Nepal time."""
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        moment = datetime.fromisoformat(str(value).strip())
+    return moment if moment.tzinfo else moment.replace(tzinfo=NEPAL_TZ)
+
+
+def load_calendar(path):
+    """Load upcoming openings from a YAML or CSV file.
+
+    Each entry has ``name`` (a company name, scrip or regular expression) and
+    ``opens_at`` (ISO 8601, Nepal time unless an offset is given). YAML
+    entries may be nested under an ``issues`` key.
+
+    Args:
+        path (str): Path to the calendar file
+
+    Returns:
+        List of Opening sorted by time
+    """
+    openings = []
+    for index, row in enumerate(read_rows(path, 'issues'), start=1):
+        name, opens_at = row.get('name'), row.get('opens_at')
+        if not name or not opens_at:
+            raise ValueError(f"Entry #{index} in {path} needs both name and opens_at")
+        try:
+            openings.append(Opening(parse_open_time(opens_at), str(name).strip()))
+        except ValueError:
+            raise ValueError(f"Entry #{index} in {path} has an invalid opens_at: {opens_at}") from None
+
+    if not openings:
+        raise ValueError(f"No issues found in {path}")
+    return sorted(openings, key=lambda opening: opening.opens_at)
+
+
+def openings_from_issues(issues, now=None):
+    """Return the openings announced in a listing that are still in the future.
+
+    Args:
+        issues (list): Issues from poll_issues()
+        now (datetime): Reference time, defaults to the current time
+
+    Returns:
+        List of Opening sorted by time, one per ordinary-share IPO
+    """
+    now = now or datetime.now(NEPAL_TZ)
+    return sorted(
+        (Opening(issue.opens_at, re.escape(issue.scrip or issue.company_name))
+         for issue in issues
+         if issue.is_ordinary_ipo and issue.opens_at and issue.opens_at > now),
+        key=lambda opening: opening.opens_at,
+    )
+
+
+def _as_regex(pattern):
+    try:
+        re.compile(pattern)
+        return pattern
+    except re.error:
+        return re.escape(pattern)
+
+
+def group_openings(openings):
+    """Merge openings at the same instant into one with a combined pattern."""
+    grouped = {}
+    for opening in openings:
+        grouped.setdefault(opening.opens_at, []).append(_as_regex(opening.pattern))
+    return [
+        Opening(opens_at, "|".join(f"(?:{pattern})" for pattern in patterns))
+        for opens_at, patterns in sorted(grouped.items())
+    ]
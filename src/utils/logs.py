@@ -0,0 +1,205 @@
+"""
+Queue-backed logging tagged with the account, issue and phase of each record.
+
+Threads only put records on a queue; a single listener thread formats them
+and writes to the terminal and, optionally, to one JSON-lines file per
+account. Many accounts logging at once therefore neither interleave
+partial lines nor wait on a slow terminal.
+
+Context is kept in context variables and attached to each record on the
+thread that logs it:
+
+    with log_context(account="Mom"):
+        with log_context(phase="login"):
+            logger.info("Logged in")
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+from contextlib import contextmanager
+
+CONTEXT_FIELDS = ('account', 'issue', 'phase')
+
+_context = {field: contextvars.ContextVar(f'log_{field}', default=None) for field in CONTEXT_FIELDS}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(context)s%(message)s'
+
+# Name of the per-account file that collects records logged outside any account
+RUN_LOG = 'run'
+
+
+@contextmanager
+def log_context(**fields):
+    """Tag every record logged inside the block on this thread.
+
+    Args:
+        fields: Values for account, issue and/or phase. None leaves a field as is.
+    """
+    tokens = [(_context[name], _context[name].set(value))
+              for name, value in fields.items() if value is not None]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_context():
+    """Return the account, issue and phase set on this thread."""
+    return {field: var.get() for field, var in _context.items()}
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Puts records on the queue with their context and rendered message.
+
+    The message and traceback are rendered here, on the logging thread, so
+    the listener never touches arguments that may change afterwards.
+    """
+
+    def prepare(self, record):
+        for field, var in _context.items():
+            if not hasattr(record, field):
+                setattr(record, field, var.get())
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    """The classic one-line format, prefixed with ``[account/issue/phase]`` when set."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record):
+        tags = [getattr(record, field, None) for field in CONTEXT_FIELDS]
+        record.context = f"[{'/'.join(tag for tag in tags if tag)}] " if any(tags) else ''
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        elif record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class AccountFileHandler(logging.Handler):
+    """Writes JSON lines to ``<directory>/<account>.log``, one file per account.
+
+    Records logged outside any account go to ``run.log``. Files are opened
+    on first use and only ever written from the listener thread.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self.setFormatter(JsonFormatter())
+        self._files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _file(self, account):
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', account or RUN_LOG).strip('_') or RUN_LOG
+        if name not in self._files:
+            self._files[name] = open(os.path.join(self.directory, f"{name}.log"), 'a')
+        return self._files[name]
+
+    def emit(self, record):
+        try:
+            f = self._file(getattr(record, 'account', None))
+            f.write(self.format(record) + '\n')
+            f.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        super().close()
+
+
+class LogSetup:
+    """Handle on the configured logging, to flush and stop it."""
+
+    def __init__(self, listener, handler, replaced=()):
+        self.listener = listener
+        self.handler = handler
+        self.replaced = list(replaced)
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def stop(self):
+        """Write out every queued record and restore the handlers it replaced."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+        atexit.unregister(self.stop)
+        self.listener.stop()
+        root = logging.getLogger()
+        root.removeHandler(self.handler)
+        for handler in self.replaced:
+            root.addHandler(handler)
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+def setup_logging(level=logging.INFO, fmt='text', log_dir=None, stream=None):
+    """Send every log record through a queue to a background listener.
+
+    Args:
+        level (int): Minimum level logged
+        fmt (str): 'text' or 'json' for the terminal
+        log_dir (str): Also write one JSON-lines file per account here
+        stream: Where terminal output goes, stdout by default
+
+    Returns:
+        LogSetup, already registered to stop at exit
+    """
+    terminal = logging.StreamHandler(stream or sys.stdout)
+    terminal.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+    handlers = [terminal]
+    if log_dir:
+        handlers.append(AccountFileHandler(log_dir))
+
+    records = queue.SimpleQueue()
+    handler = ContextQueueHandler(records)
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    replaced = list(root.handlers)
+    for existing in replaced:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    listener.start()
+
+    setup = LogSetup(listener, handler, replaced)
+    atexit.register(setup.stop)
+    return setup
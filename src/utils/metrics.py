@@ -0,0 +1,258 @@
+"""
+In-process counters and histograms, exported in Prometheus text format.
+
+Every step decorated with ``traced`` is timed into ``meroshare_step_seconds``
+by step, account, backend and outcome, and every application outcome is
+counted in ``meroshare_applications_total``. Recording is a dictionary
+lookup and a few additions under a lock, so it stays on in every run.
+
+Long-running modes can serve the metrics over HTTP for Prometheus:
+
+    registry.serve(9108)    # GET http://localhost:9108/metrics
+
+Batch runs dump a snapshot at the end instead, see ``Registry.snapshot``.
+"""
+
+import bisect
+import json
+import threading
+
+from utils.logs import current_context
+
+# Upper bounds in seconds, from a quick API call to a slow browser login
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    """A count that only goes up, one per combination of label values."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    def series(self):
+        """Return the labels and value of every combination seen."""
+        with self._lock:
+            values = dict(self._values)
+        return [{'labels': dict(zip(self.labels, key)), 'value': value}
+                for key, value in sorted(values.items())]
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram:
+    """Counts of observations per bucket, with their sum and count."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # Per bucket counts, then +Inf, sum and count
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    def _cumulative(self):
+        with self._lock:
+            values = {key: list(series) for key, series in self._values.items()}
+        for key, series in sorted(values.items()):
+            running, cumulative = 0, []
+            for count in series[:-2]:
+                running += count
+                cumulative.append(running)
+            yield key, cumulative, series[-2], series[-1]
+
+    def series(self):
+        """Return the labels, count, sum and cumulative buckets of every combination seen."""
+        return [
+            {'labels': dict(zip(self.labels, key)), 'count': count, 'sum': round(total, 6),
+             'buckets': dict(zip([*map(str, self.buckets), '+Inf'], cumulative))}
+            for key, cumulative, total, count in self._cumulative()
+        ]
+
+    def render(self):
+        lines = []
+        bounds = [*map(str, self.buckets), '+Inf']
+        for key, cumulative, total, count in self._cumulative():
+            for bound, running in zip(bounds, cumulative):
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labels, key, [('le', bound)])} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Every metric of the process."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._server = None
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.clear()
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """Return every metric with at least one series as a JSON-friendly dict."""
+        return {
+            name: {'type': metric.kind, 'series': series}
+            for name, metric in self.metrics.items()
+            if (series := metric.series())
+        }
+
+    def serve(self, port, host=''):
+        """Serve ``/metrics`` from a background thread.
+
+        Returns:
+            The HTTP server, already running
+        """
+        # Only long-running modes serve, so the rest never import http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        return self._server
+
+
+registry = Registry()
+
+STEP_SECONDS = registry.histogram(
+    'meroshare_step_seconds', 'Duration of client steps such as login and fillApplyForm',
+    ('step', 'account', 'backend', 'outcome'))
+
+APPLICATIONS = registry.counter(
+    'meroshare_applications_total', 'Outcome of every selected issue',
+    ('account', 'backend', 'status'))
+
+
+def record_step(step, client, seconds, outcome):
+    """Time one call of a traced client method."""
+    STEP_SECONDS.observe(
+        seconds, step=step, account=current_context()['account'] or '',
+        backend=getattr(client, 'backend', '') or '', outcome=outcome)
+
+
+def record_applications(results, backend):
+    """Count the ApplyResult of a run of applyAvailableIPOS."""
+    account = current_context()['account'] or ''
+    for result in results:
+        APPLICATIONS.inc(account=account, backend=backend, status=result.status.value)
+
+
+def format_snapshot(snapshot):
+    """Render steps and application outcomes of a snapshot as a plain-text table."""
+    steps = {}
+    for series in snapshot.get(STEP_SECONDS.name, {}).get('series', []):
+        totals = steps.setdefault(series['labels']['step'], {'ok': 0, 'error': 0, 'sum': 0.0})
+        totals[series['labels']['outcome']] += series['count']
+        totals['sum'] += series['sum']
+
+    width = max([len("Step")] + [len(name) for name in steps])
+    lines = [
+        f"{'Step':<{width}}  {'OK':>5}  {'Failed':>6}  {'Mean (s)':>8}",
+        f"{'-' * width}  {'-' * 5}  {'-' * 6}  {'-' * 8}",
+    ]
+    for name in sorted(steps):
+        totals = steps[name]
+        mean = totals['sum'] / ((totals['ok'] + totals['error']) or 1)
+        lines.append(f"{name:<{width}}  {totals['ok']:>5}  {totals['error']:>6}  {mean:>8.3f}")
+
+    outcomes = {}
+    for series in snapshot.get(APPLICATIONS.name, {}).get('series', []):
+        status = series['labels']['status']
+        outcomes[status] = outcomes.get(status, 0) + series['value']
+    if outcomes:
+        lines.append("Applications: " + ", ".join(
+            f"{count} {status}" for status, count in sorted(outcomes.items())))
+    return "\n".join(lines)
+
+
+def write_snapshot(path, snapshot=None):
+    """Write a snapshot of every metric to ``path`` as JSON."""
+    with open(path, 'w') as f:
+        json.dump(snapshot or registry.snapshot(), f, indent=2)
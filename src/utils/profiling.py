@@ -0,0 +1,193 @@
+"""
+Lightweight per-phase timing with Chrome trace-event export.
+
+Spans are recorded only while the module-level tracer is enabled. When it is
+disabled, ``span`` returns a shared no-op context manager and ``traced``
+only tags log records with the phase and times the call into
+``utils.metrics``, so instrumentation can stay in hot paths.
+
+Traces open in chrome://tracing or https://ui.perfetto.dev. Several trace
+files can be summarised with:
+
+    python src/utils/profiling.py profiles/*.json
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+from utils.logs import log_context
+from utils.metrics import record_step
+
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Collects completed spans from every thread of a run."""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.threads = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+            self.threads = {}
+        self._origin = time.perf_counter()
+
+    def record(self, name, start, end, args=None):
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': round((start - self._origin) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': thread.ident,
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+            self.threads[thread.ident] = thread.name
+
+    def durations(self):
+        """Return span durations in seconds grouped by span name."""
+        return _durations(self.events)
+
+    def to_trace(self):
+        """Return the recorded spans in Chrome trace-event format."""
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+            for tid, name in self.threads.items()
+        ]
+        return {'traceEvents': metadata + list(self.events), 'displayTimeUnit': 'ms'}
+
+    def export(self, directory):
+        """Write the trace to a timestamped JSON file in ``directory``.
+
+        Returns:
+            Path of the written file
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"trace-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.json")
+        with open(path, 'w') as f:
+            json.dump(self.to_trace(), f)
+        return path
+
+
+tracer = Tracer()
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        args = self.args
+        if exc_type is not None:
+            args = dict(args or {}, error=exc_type.__name__)
+        tracer.record(self.name, self.start, time.perf_counter(), args)
+        return False
+
+
+def span(name, **args):
+    """Time a block of code as a named phase."""
+    if not tracer.enabled:
+        return _NULL_SPAN
+    return _Span(name, args or None)
+
+
+def traced(name):
+    """Decorator that records every call of a function as a span.
+
+    Records logged during the call are tagged with ``name`` as their phase,
+    and its duration and outcome are recorded in ``meroshare_step_seconds``,
+    labelled with the backend of the client it is called on.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with log_context(phase=name):
+                start = time.perf_counter()
+                outcome = 'error'
+                try:
+                    if tracer.enabled:
+                        with _Span(name, None):
+                            result = func(*args, **kwargs)
+                    else:
+                        result = func(*args, **kwargs)
+                    outcome = 'ok'
+                    return result
+                finally:
+                    record_step(name, args[0] if args else None,
+                                time.perf_counter() - start, outcome)
+        return wrapper
+    return decorator
+
+
+def _durations(events):
+    durations = {}
+    for event in events:
+        if event.get('ph') == 'X':
+            durations.setdefault(event['name'], []).append(event['dur'] / 1e6)
+    return durations
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def format_summary(durations):
+    """Render p50/p95 per phase as a plain-text table."""
+    width = max([len("Phase")] + [len(name) for name in durations])
+    lines = [
+        f"{'Phase':<{width}}  {'Count':>5}  {'p50 (s)':>8}  {'p95 (s)':>8}",
+        f"{'-' * width}  {'-' * 5}  {'-' * 8}  {'-' * 8}",
+    ]
+    for name in sorted(durations):
+        values = durations[name]
+        lines.append(
+            f"{name:<{width}}  {len(values):>5}  "
+            f"{_percentile(values, 0.5):>8.3f}  {_percentile(values, 0.95):>8.3f}")
+    return "\n".join(lines)
+
+
+def summarize_traces(paths):
+    """Merge the spans of several trace files into one summary table."""
+    events = []
+    for path in paths:
+        with open(path) as f:
+            events.extend(json.load(f)['traceEvents'])
+    return format_summary(_durations(events))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} TRACE.json [TRACE.json ...]")
+        sys.exit(1)
+    print(summarize_traces(sys.argv[1:]))
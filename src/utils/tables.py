@@ -0,0 +1,42 @@
+"""
+Reading lists of records from YAML or CSV files.
+"""
+
+import csv
+import os
+
+
+def _read_yaml(path, key):
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("PyYAML is required to read YAML files") from None
+
+    with open(path) as f:
+        data = yaml.safe_load(f) or []
+    if isinstance(data, dict):
+        data = data.get(key, [])
+    return data
+
+
+def _read_csv(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def read_rows(path, key):
+    """Read a list of mappings from a YAML or CSV file.
+
+    Args:
+        path (str): Path to a .yaml, .yml or .csv file
+        key (str): Top-level YAML key the list may be nested under
+
+    Returns:
+        List of dicts, one per record
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.yaml', '.yml'):
+        return _read_yaml(path, key)
+    if extension == '.csv':
+        return _read_csv(path)
+    raise ValueError(f"Unsupported file type: {path}")
@@ -0,0 +1,124 @@
+"""
+Keep one Meroshare session open and react when new issues are listed.
+"""
+
+import logging
+import threading
+
+from meroshare.errors import SessionExpired
+from models.ipo import ApplyStatus, listing_fingerprint, select_issues, summarize_results
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher:
+    """Poll the applicable issue listing and apply when an eligible issue appears.
+
+    Each poll is a single lightweight listing request made with the session
+    that is already open. The parsed listing is hashed, and only a changed
+    hash is looked at further. The apply path runs only when the change adds
+    an issue that can be applied for and that has not been handled yet.
+
+    Args:
+        client: A MeroshareClient or MeroshareAPIClient, not logged in yet
+        interval (float): Seconds to wait between polls
+        pattern (str): Only react to issues whose name or scrip matches
+        apply (bool): Apply for new issues, otherwise only log them
+        max_polls (int): Stop after this many polls, None runs until stopped
+        stop_event (threading.Event): Set it to stop the watcher between polls
+    """
+
+    def __init__(self, client, interval=300, pattern=None, apply=True, max_polls=None,
+                 stop_event=None):
+        self.client = client
+        self.interval = interval
+        self.pattern = pattern
+        self.apply = apply
+        self.max_polls = max_polls
+        self.stop_event = stop_event or threading.Event()
+        self.polls = 0
+        self.changes = 0
+        self.results = []
+        self._fingerprint = None
+        self._handled = set()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _poll(self):
+        try:
+            return self.client.poll_issues()
+        except SessionExpired:
+            logger.info("Session expired, logging in again")
+            self.client.login()
+            return self.client.poll_issues()
+
+    def _eligible(self, issues):
+        return [issue for issue in select_issues(issues, self.pattern) if issue.can_apply]
+
+    def _on_change(self, issues):
+        new = [issue for issue in self._eligible(issues) if issue.key not in self._handled]
+        if not new:
+            return
+
+        for issue in new:
+            logger.info(f"New issue open for application: {issue.company_name}")
+        if not self.apply:
+            self._handled.update(issue.key for issue in new)
+            return
+
+        self.client.navigate("asba")
+        results = self.client.applyAvailableIPOS(self.pattern)
+        self.results.extend(results)
+        logger.info(f"Applied for new issue(s): {summarize_results(results)}")
+        # An issue the apply path failed on or did not find is tried again
+        done = {result.issue.key for result in results if result.status is not ApplyStatus.FAILED}
+        self._handled.update(issue.key for issue in new if issue.key in done)
+        if any(issue.key not in done for issue in new):
+            # Forget the snapshot so the next poll retries them
+            self._fingerprint = None
+
+    def check(self):
+        """Poll once and act on the listing if it changed.
+
+        Returns:
+            True when the listing differs from the previous poll
+        """
+        self.polls += 1
+        issues = self._poll()
+        fingerprint = listing_fingerprint(issues)
+        if fingerprint == self._fingerprint:
+            return False
+
+        self._fingerprint = fingerprint
+        self.changes += 1
+        self._on_change(issues)
+        return True
+
+    def run(self):
+        """Log in and poll until stopped or ``max_polls`` is reached.
+
+        Returns:
+            A short description of what the watcher did
+        """
+        try:
+            self.client.login()
+            self.client.navigate("asba")
+            logger.info(f"Watching for new issues every {self.interval:g}s")
+            while True:
+                try:
+                    self.check()
+                except Exception as e:
+                    # A flaky poll should not end a long-running watch
+                    logger.error(f"Poll failed: {e}")
+                if self.max_polls is not None and self.polls >= self.max_polls:
+                    break
+                if self.stop_event.wait(self.interval):
+                    break
+        finally:
+            self.client.close()
+
+        summary = f"{self.polls} poll(s), {self.changes} change(s)"
+        if self.results:
+            summary += f", {summarize_results(self.results)}"
+        return summary
@@ -0,0 +1,569 @@
+"""
+Share the accounts of a run between worker processes on several machines.
+
+A coordinator (``main.py --publish``) puts one job per account in a shared
+store and waits for the results. Workers (``main.py --worker``) lease jobs
+one at a time, keep their leases alive with heartbeats while the job runs
+and write the outcome back. A job whose lease runs out, because its
+worker crashed or lost the network, is leased again by another worker.
+
+Jobs only name the account by its ledger key, never its credentials, so
+every node reads the same accounts file itself.
+
+Two stores are provided: a SQLite file, locked by SQLite itself, and any
+Redis-compatible server. Both rely on the nodes' clocks roughly agreeing.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from meroshare.ledger import account_key
+from runner import AccountResult, run_one
+
+logger = logging.getLogger(__name__)
+
+QUEUE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'ipo_automate', 'queue.sqlite3')
+
+# Seconds a lease lasts without a heartbeat
+LEASE_TTL = 60
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    batch TEXT NOT NULL,
+    account TEXT NOT NULL,
+    action TEXT NOT NULL,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    ok INTEGER,
+    detail TEXT,
+    elapsed REAL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state);
+CREATE INDEX IF NOT EXISTS jobs_by_batch ON jobs (batch);
+"""
+
+JOB_COLUMNS = 'id, batch, account, action, state, worker, attempts, ok, detail, elapsed'
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    """Running one action for one account.
+
+    Attributes:
+        id (str): Unique id, ``<batch>-<index>``
+        batch (str): Jobs published together, see publish
+        account (str): account_key of the account to run for
+        action (dict): Command-line options selecting the action, e.g. {'apply_all': True}
+        state (str): 'queued', 'leased' or 'done'
+        worker (str): Name of the worker that holds or held the lease
+        attempts (int): How often the job was leased
+        ok (bool): Whether the action succeeded, None until done
+        detail (str): Short description of the outcome
+        elapsed (float): Seconds the action took
+    """
+
+    id: str
+    batch: str
+    account: str
+    action: dict
+    state: str = QUEUED
+    worker: str = None
+    attempts: int = 0
+    ok: bool = None
+    detail: str = None
+    elapsed: float = None
+
+
+def _gave_up(attempts):
+    return f"Gave up after {attempts} expired lease(s)"
+
+
+class SQLiteQueue:
+    """Job queue in a SQLite file shared by every worker.
+
+    A lease is taken in an immediate transaction, so SQLite's file lock
+    hands each job to exactly one worker. Workers on several machines need
+    the file on a network filesystem with working POSIX locks.
+
+    Args:
+        path (str): Database file
+        max_attempts (int): A job whose lease expired this often is given up
+        clock (callable): Returns the current Unix time
+    """
+
+    def __init__(self, path=QUEUE_PATH, max_attempts=3, clock=time.time):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.clock = clock
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Transactions are opened explicitly, see _transaction. No WAL: it
+        # needs memory shared between processes, which separate nodes lack.
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    @staticmethod
+    def _job(row):
+        job_id, batch, account, action, state, worker, attempts, ok, detail, elapsed = row
+        return Job(job_id, batch, account, json.loads(action), state, worker, attempts,
+                   None if ok is None else bool(ok), detail, elapsed)
+
+    def put(self, jobs):
+        """Queue new jobs."""
+        now = self.clock()
+        with self._transaction() as db:
+            db.executemany(
+                'INSERT INTO jobs (id, batch, account, action, state, created_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                [(job.id, job.batch, job.account, json.dumps(job.action), QUEUED, now)
+                 for job in jobs],
+            )
+
+    def lease(self, worker, ttl=LEASE_TTL):
+        """Take the oldest queued job, or one whose lease expired.
+
+        Returns:
+            The leased Job, None when there is nothing to run
+        """
+        now = self.clock()
+        with self._transaction() as db:
+            while True:
+                row = db.execute(
+                    'SELECT id, account, state, worker, attempts FROM jobs'
+                    ' WHERE state = ? OR (state = ? AND lease_until < ?)'
+                    ' ORDER BY rowid LIMIT 1',
+                    (QUEUED, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                job_id, account, state, holder, attempts = row
+                if state == LEASED and attempts >= self.max_attempts:
+                    logger.error(f"Job {job_id} for {account} expired {attempts} time(s), giving up")
+                    db.execute(
+                        'UPDATE jobs SET state = ?, ok = 0, detail = ?, lease_until = NULL'
+                        ' WHERE id = ?',
+                        (DONE, _gave_up(attempts), job_id),
+                    )
+                    continue
+                if state == LEASED:
+                    logger.warning(f"Lease of job {job_id} by {holder} expired, running it again")
+                db.execute(
+                    'UPDATE jobs SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1'
+                    ' WHERE id = ?',
+                    (LEASED, worker, now + ttl, job_id),
+                )
+                return self._job(db.execute(
+                    f'SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?', (job_id,)).fetchone())
+
+    def heartbeat(self, job_id, worker, ttl=LEASE_TTL):
+        """Extend a lease.
+
+        Returns:
+            False when the worker no longer holds the lease
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                'UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND state = ?',
+                (self.clock() + ttl, job_id, worker, LEASED),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, ok, detail='', elapsed=0.0):
+        """Store the outcome of a leased job.
+
+        Returns:
+            False when the worker no longer held the lease and the outcome was dropped
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                'UPDATE jobs SET state = ?, ok = ?, detail = ?, elapsed = ?, lease_until = NULL'
+                ' WHERE id = ? AND worker = ? AND state = ?',
+                (DONE, int(ok), detail, elapsed, job_id, worker, LEASED),
+            )
+        return cursor.rowcount == 1
+
+    def jobs(self, batch):
+        """Return every Job of a batch in publishing order."""
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT {JOB_COLUMNS} FROM jobs WHERE batch = ? ORDER BY rowid', (batch,)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def open_jobs(self):
+        """Number of jobs queued or leased, in any batch."""
+        with self._lock:
+            (count,) = self._db.execute(
+                'SELECT COUNT(*) FROM jobs WHERE state != ?', (DONE,)).fetchone()
+        return count
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# Requeue expired leases (or give up on them), then lease the next job
+LEASE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    local key = ARGV[5] .. id
+    local attempts = tonumber(redis.call('HGET', key, 'attempts'))
+    if attempts >= tonumber(ARGV[4]) then
+        redis.call('HSET', key, 'state', 'done', 'ok', '0',
+                   'detail', 'Gave up after ' .. attempts .. ' expired lease(s)')
+    else
+        redis.call('HSET', key, 'state', 'queued')
+        redis.call('LPUSH', KEYS[1], id)
+    end
+end
+local id = redis.call('LPOP', KEYS[1])
+if not id then
+    return false
+end
+local key = ARGV[5] .. id
+redis.call('HSET', key, 'state', 'leased', 'worker', ARGV[3])
+redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), id)
+return id
+"""
+
+HEARTBEAT_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'state') ~= 'leased'
+        or redis.call('HGET', KEYS[2], 'worker') ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
+COMPLETE_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'state') ~= 'leased'
+        or redis.call('HGET', KEYS[2], 'worker') ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HSET', KEYS[2], 'state', 'done', 'ok', ARGV[3], 'detail', ARGV[4], 'elapsed', ARGV[5])
+return 1
+"""
+
+
+class RedisQueue:
+    """Job queue in a Redis-compatible server, such as Redis, Valkey or KeyDB.
+
+    Every state change is a single Lua script, so leases are atomic on the
+    server. Queued ids are kept in a list, leases in a sorted set by expiry
+    and each job in a hash.
+
+    Args:
+        client: redis.Redis created with decode_responses=True, or a client
+            with the same API
+        prefix (str): Namespace of every key
+        max_attempts (int): A job whose lease expired this often is given up
+        clock (callable): Returns the current Unix time
+    """
+
+    def __init__(self, client, prefix='ipo_automate', max_attempts=3, clock=time.time):
+        self.client = client
+        self.prefix = prefix
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._queue = f"{prefix}:queue"
+        self._leases = f"{prefix}:leases"
+        self._lease = client.register_script(LEASE_SCRIPT)
+        self._heartbeat = client.register_script(HEARTBEAT_SCRIPT)
+        self._complete = client.register_script(COMPLETE_SCRIPT)
+
+    def _key(self, job_id):
+        return f"{self.prefix}:job:{job_id}"
+
+    def _job(self, job_id, data):
+        ok = data.get('ok')
+        elapsed = data.get('elapsed')
+        return Job(
+            job_id, data['batch'], data['account'], json.loads(data['action']), data['state'],
+            data.get('worker'), int(data.get('attempts', 0)),
+            None if ok in (None, '') else ok == '1', data.get('detail'),
+            None if elapsed in (None, '') else float(elapsed),
+        )
+
+    def put(self, jobs):
+        """Queue new jobs."""
+        pipe = self.client.pipeline()
+        for job in jobs:
+            pipe.hset(self._key(job.id), mapping={
+                'batch': job.batch, 'account': job.account, 'action': json.dumps(job.action),
+                'state': QUEUED, 'attempts': 0,
+            })
+            pipe.rpush(f"{self.prefix}:batch:{job.batch}", job.id)
+            pipe.rpush(self._queue, job.id)
+        pipe.execute()
+
+    def lease(self, worker, ttl=LEASE_TTL):
+        """Take the oldest queued job, or one whose lease expired.
+
+        Returns:
+            The leased Job, None when there is nothing to run
+        """
+        job_id = self._lease(
+            keys=[self._queue, self._leases],
+            args=[self.clock(), ttl, worker, self.max_attempts, f"{self.prefix}:job:"],
+        )
+        if not job_id:
+            return None
+        return self._job(job_id, self.client.hgetall(self._key(job_id)))
+
+    def heartbeat(self, job_id, worker, ttl=LEASE_TTL):
+        """Extend a lease.
+
+        Returns:
+            False when the worker no longer holds the lease
+        """
+        return bool(self._heartbeat(
+            keys=[self._leases, self._key(job_id)], args=[job_id, worker, self.clock() + ttl]))
+
+    def complete(self, job_id, worker, ok, detail='', elapsed=0.0):
+        """Store the outcome of a leased job.
+
+        Returns:
+            False when the worker no longer held the lease and the outcome was dropped
+        """
+        return bool(self._complete(
+            keys=[self._leases, self._key(job_id)],
+            args=[job_id, worker, '1' if ok else '0', detail, elapsed]))
+
+    def jobs(self, batch):
+        """Return every Job of a batch in publishing order."""
+        ids = self.client.lrange(f"{self.prefix}:batch:{batch}", 0, -1)
+        pipe = self.client.pipeline()
+        for job_id in ids:
+            pipe.hgetall(self._key(job_id))
+        return [self._job(job_id, data) for job_id, data in zip(ids, pipe.execute())]
+
+    def open_jobs(self):
+        """Number of jobs queued or leased, in any batch."""
+        return self.client.llen(self._queue) + self.client.zcard(self._leases)
+
+    def close(self):
+        self.client.close()
+
+
+def open_queue(url=QUEUE_PATH, **options):
+    """Open the queue at ``url``.
+
+    Args:
+        url (str): ``redis://`` (or ``rediss://``, ``unix://``) for a Redis-compatible
+            server, otherwise a SQLite file path, optionally as ``sqlite:///path``
+        options: Passed on to SQLiteQueue or RedisQueue
+
+    Returns:
+        SQLiteQueue or RedisQueue
+    """
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("A redis:// queue needs the redis package: pip install redis")
+        return RedisQueue(redis.Redis.from_url(url, decode_responses=True), **options)
+    if url.startswith('sqlite:///'):
+        url = url[len('sqlite:///'):]
+    return SQLiteQueue(url, **options)
+
+
+def publish(queue, accounts, action, batch=None):
+    """Queue one job per account.
+
+    Args:
+        queue: SQLiteQueue or RedisQueue
+        accounts (list): Account instances to run for
+        action (dict): Command-line options selecting the action
+        batch (str): Batch id, a random one by default
+
+    Returns:
+        The batch id to wait for
+    """
+    batch = batch or uuid.uuid4().hex[:12]
+    queue.put([
+        Job(f"{batch}-{index:04d}", batch, account_key(account.dp_id, account.username), action)
+        for index, account in enumerate(accounts)
+    ])
+    logger.info(f"Queued {len(accounts)} job(s) as batch {batch}")
+    return batch
+
+
+def wait(queue, batch, poll_interval=1.0, timeout=None):
+    """Block until every job of a batch is done.
+
+    Returns:
+        List of Job in publishing order
+
+    Raises:
+        TimeoutError: When ``timeout`` seconds pass first
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    reported = None
+    while True:
+        jobs = queue.jobs(batch)
+        done = sum(job.state == DONE for job in jobs)
+        if done != reported:
+            logger.info(f"{done}/{len(jobs)} job(s) of batch {batch} done")
+            reported = done
+        if done == len(jobs):
+            return jobs
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"{len(jobs) - done} job(s) of batch {batch} still open")
+        time.sleep(poll_interval)
+
+
+def job_results(jobs, accounts):
+    """Turn finished jobs into AccountResult, labelled like local runs."""
+    labels = {account_key(account.dp_id, account.username): account.label for account in accounts}
+    return [
+        AccountResult(labels.get(job.account, job.account), bool(job.ok), job.detail or "",
+                      job.elapsed or 0.0)
+        for job in jobs
+    ]
+
+
+class Worker:
+    """Lease jobs from a queue and run them, several at a time.
+
+    Args:
+        queue: SQLiteQueue or RedisQueue shared with the coordinator
+        accounts (list): Accounts this worker can run, matched by account_key
+        run (callable): Called with (Account, action dict), returns a short detail string
+        name (str): Identifies the worker in leases, ``<host>:<pid>`` by default
+        concurrency (int): Jobs run at the same time
+        lease_ttl (float): Seconds a lease lasts without a heartbeat
+        idle_exit (float): Stop once no job was open anywhere for this long, None to never stop
+        poll_interval (float): Seconds between polls of an empty queue
+    """
+
+    def __init__(self, queue, accounts, run, name=None, concurrency=4, lease_ttl=LEASE_TTL,
+                 idle_exit=60, poll_interval=1.0):
+        self.queue = queue
+        self.accounts = {account_key(account.dp_id, account.username): account for account in accounts}
+        self.run_job = run
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = max(1, concurrency)
+        self.lease_ttl = lease_ttl
+        self.idle_exit = idle_exit
+        self.poll_interval = poll_interval
+        self._held = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._idle_since = None
+
+    def stop(self):
+        """Finish the running jobs, then return from run."""
+        self._stop.set()
+
+    def run(self):
+        """Process jobs until stopped or idle for ``idle_exit`` seconds.
+
+        Returns:
+            List of AccountResult of the jobs this worker completed
+        """
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(finished,), name='lease-heartbeat', daemon=True)
+        heartbeat.start()
+        logger.info(f"Worker {self.name} running up to {self.concurrency} job(s) at a time")
+        try:
+            with ThreadPoolExecutor(self.concurrency, thread_name_prefix='worker') as pool:
+                loops = [pool.submit(self._loop) for _ in range(self.concurrency)]
+                return [result for loop in loops for result in loop.result()]
+        finally:
+            finished.set()
+            heartbeat.join()
+
+    def _heartbeat(self, finished):
+        while not finished.wait(self.lease_ttl / 3):
+            with self._lock:
+                held = list(self._held)
+            for job_id in held:
+                try:
+                    if not self.queue.heartbeat(job_id, self.name, self.lease_ttl):
+                        logger.warning(f"Lost the lease of job {job_id}")
+                except Exception as e:
+                    logger.warning(f"Could not renew the lease of job {job_id}: {e}")
+
+    def _idle(self):
+        """Whether the worker has been without open jobs long enough to stop."""
+        if self.idle_exit is None:
+            return False
+        now = time.monotonic()
+        open_jobs = self.queue.open_jobs()
+        with self._lock:
+            if open_jobs or self._held:
+                self._idle_since = None
+                return False
+            if self._idle_since is None:
+                self._idle_since = now
+            return now - self._idle_since >= self.idle_exit
+
+    def _loop(self):
+        results = []
+        while not self._stop.is_set():
+            try:
+                job = self.queue.lease(self.name, self.lease_ttl)
+                if job is None:
+                    if self._idle():
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+            except Exception as e:
+                logger.error(f"Could not lease a job: {e}")
+                self._stop.wait(self.poll_interval)
+                continue
+            results.append(self._process(job))
+        return results
+
+    def _process(self, job):
+        with self._lock:
+            self._held.add(job.id)
+        try:
+            account = self.accounts.get(job.account)
+            if account is None:
+                result = AccountResult(
+                    job.account, False, f"Account is not configured on {self.name}", 0.0)
+            else:
+                result = run_one(account, lambda account: self.run_job(account, job.action))
+        finally:
+            with self._lock:
+                self._held.discard(job.id)
+        try:
+            if not self.queue.complete(job.id, self.name, result.ok, result.detail, result.elapsed):
+                logger.warning(f"Lease of job {job.id} was lost, another worker runs it again")
+        except Exception as e:
+            logger.error(f"Could not store the result of job {job.id}: {e}")
+        return result
@@ -8,4 +8,29 @@ import pytest
 
 # Add the project root directory to Python path to make imports work
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# main.py imports its packages the way `python src/main.py` sees them
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+from meroshare.api import MeroshareAPIClient  # noqa: E402
+from tests.fake_meroshare import (  # noqa: E402
+    CRN, DP_ID, PASSWORD, TRANSACTION_PIN, USERNAME, FakeMeroshare,
+)
+
+
+@pytest.fixture
+def fake():
+    """A stand-in Meroshare API listing the default issues."""
+    with FakeMeroshare() as server:
+        yield server
+
+
+def make_api_client(fake, **kwargs):
+    """An http backend client of the test account on ``fake``.
+
+    Args:
+        kwargs: Constructor arguments, e.g. a ledger, or to override the credentials
+    """
+    options = dict(username=USERNAME, password=PASSWORD, dp_id=DP_ID, crn=CRN,
+                   transaction_pin=TRANSACTION_PIN, base_url=fake.url)
+    options.update(kwargs)
+    return MeroshareAPIClient(**options)
@@ -0,0 +1,134 @@
+"""
+Stand-in for the Meroshare web app as the browser client drives it.
+"""
+
+from meroshare import client as browser_client
+from meroshare.api import WEB_ORIGIN
+from meroshare.waits import WAIT_FOR_ELEMENT_JS
+from tests.fake_meroshare import DEFAULT_ISSUES
+
+
+class FakeElement:
+    """A page element whose click runs ``on_click``."""
+
+    def __init__(self, on_click=None):
+        self._on_click = on_click
+
+    def click(self):
+        if self._on_click:
+            self._on_click()
+
+    def clear(self):
+        pass
+
+    def send_keys(self, *keys):
+        pass
+
+
+class FakeBrowser:
+    """A stand-in WebDriver for the Meroshare web app.
+
+    A page is rendered when it is routed to. Like the real app, a link to the
+    page already open routes nowhere, so the ASBA listing shows the issues
+    listed when it was rendered until the page is loaded again. After an
+    application is submitted the page is still on ASBA, without the listing.
+
+    Args:
+        issues (list): Applicable issues as the API lists them, changed in place
+    """
+
+    def __init__(self, issues=None):
+        self.issues = [dict(issue) for issue in (issues or DEFAULT_ISSUES)]
+        self.applications = []
+        self.refreshes = 0
+        self.logged_in = False
+        self.route = ''
+        # Rows of the rendered listing, None while no listing is shown
+        self.rows = None
+        self.form = None
+
+    @property
+    def current_url(self):
+        return f'{WEB_ORIGIN}/{self.route}'
+
+    def _go(self, route):
+        self.route = route if self.logged_in or route == '#/login' else '#/login'
+        self.form = None
+        self.rows = [self._row(index, issue) for index, issue in enumerate(self.issues)] \
+            if self.route == '#/asba' else None
+
+    @staticmethod
+    def _row(index, issue):
+        return {
+            'index': index, 'companyName': issue['companyName'], 'subGroup': issue['subGroup'],
+            'scrip': issue['scrip'], 'shareType': issue['shareTypeName'],
+            'shareGroup': issue['shareGroupName'],
+            'button': "Edit" if issue.get('action') == 'edit' else "Apply", 'enabled': True,
+        }
+
+    def get(self, url):
+        route = '#' + url.split('#', 1)[1] if '#' in url else ''
+        if route != self.route:
+            self._go(route)
+
+    def refresh(self):
+        self.refreshes += 1
+        self._go(self.route)
+
+    def quit(self):
+        pass
+
+    def _log_in(self):
+        self.logged_in = True
+        self._go('#/dashboard')
+
+    def _open_asba(self):
+        if self.route != '#/asba':
+            self._go('#/asba')
+
+    def _submit(self):
+        self.form['action'] = 'edit'
+        self.applications.append(str(self.form['companyShareId']))
+        self.form = None
+
+    def _find(self, expression):
+        if expression == "//button[contains(text(), 'Login')]":
+            return FakeElement(self._log_in)
+        if expression == "i.msi.msi-logout.header-menu__icon":
+            return FakeElement() if self.logged_in else None
+        if expression == "//a[@href='#/asba']":
+            return FakeElement(self._open_asba) if self.logged_in else None
+        if expression == "div.company-list":
+            return FakeElement() if self.rows else None
+        if expression == '[id="transactionPIN"]':
+            return FakeElement() if self.form else None
+        if expression == "//button[span[text()='Apply ']]":
+            return FakeElement(self._submit) if self.form else None
+        # The fields of the login form
+        return FakeElement() if self.route == '#/login' else None
+
+    def execute_script(self, script, *args):
+        if script == browser_client.EXTRACT_ISSUES_JS:
+            return list(self.rows or [])
+        if script == browser_client.CLICK_APPLY_JS:
+            index, row_key = args
+            row = self.rows[index] if self.rows and index < len(self.rows) else None
+            if not row or [row['scrip'], row['shareGroup'], row['subGroup']] != row_key \
+                    or row['button'] != "Apply":
+                return False
+            self.form, self.rows = self.issues[index], None
+            return True
+        return None
+
+    def execute_async_script(self, script, *args):
+        if script == WAIT_FOR_ELEMENT_JS:
+            return self._find(args[1])
+        if script == browser_client.SEARCH_JS:
+            if not self.logged_in:
+                return {'status': 0, 'object': None}
+            return {'status': 200, 'object': [dict(issue) for issue in self.issues]}
+        if script == browser_client.API_GET_JS:
+            return {'status': 0, 'body': None}
+        if script == browser_client.FILL_FORM_JS:
+            return None if self.form else "The application form is not open"
+        return None
@@ -0,0 +1,264 @@
+"""
+Local stand-in for the Meroshare JSON backend used by the HTTP client tests.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DP_ID = "13700"
+USERNAME = "user"
+PASSWORD = "pass"
+CRN = "CRN123"
+TRANSACTION_PIN = "1234"
+DEMAT = "1301370000012345"
+FORM_ID_OFFSET = 5000
+
+
+def make_issue(company_share_id, company_name, share_type="IPO",
+               share_group="Ordinary Shares", action=None):
+    """Build an applicable-issue entry shaped like the real API response."""
+    issue = {
+        'companyShareId': company_share_id,
+        'subGroup': "For General Public",
+        'scrip': company_name.split()[0].upper()[:6],
+        'companyName': company_name,
+        'shareTypeName': share_type,
+        'shareGroupName': share_group,
+        'statusName': "CREATE_APPROVE",
+        'issueOpenDate': "Jan 1, 2026 10:00:00 AM",
+        'issueCloseDate': "Jan 5, 2026 5:00:00 PM",
+    }
+    if action:
+        issue['action'] = action
+    return issue
+
+
+DEFAULT_ISSUES = [
+    make_issue(101, "Alpha Hydropower Limited"),
+    make_issue(102, "Beta Bank Limited", share_group="Debentures"),
+    make_issue(103, "Gamma Microfinance Limited", action="edit"),
+    make_issue(104, "Delta Capital Limited", share_type="FPO"),
+    make_issue(105, "Epsilon Insurance Limited"),
+]
+
+
+class FakeMeroshare:
+    """A threaded HTTP server that mimics the Meroshare JSON API.
+
+    Args:
+        issues (list): Applicable issues to serve, defaults to DEFAULT_ISSUES
+        latency (float): Seconds to sleep before answering every request
+        error_rate (float): Share of requests answered with a 503, at random
+        seed (int): Seed for the random errors, for repeatable runs
+        users (set): Usernames that may log in with PASSWORD, defaults to USERNAME
+    """
+
+    def __init__(self, issues=None, latency=0.0, error_rate=0.0, seed=None, users=None):
+        self.issues = [dict(issue) for issue in (issues or DEFAULT_ISSUES)]
+        self.users = set(users or {USERNAME})
+        # companyShareId -> (statusName, receivedKitta) shown in application details
+        self.allotments = {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.faults = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.applications = []
+        self.requests = []
+        self.tokens = set()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/meroShare/"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def expire_sessions(self):
+        """Invalidate every token handed out so far."""
+        self.tokens.clear()
+
+    def fail(self, path, times=1, status=503, after=False):
+        """Answer the next ``times`` requests to ``path`` with ``status``.
+
+        With ``after`` the request is handled first, as if only the
+        response got lost on the way back.
+        """
+        self.faults.setdefault(path, []).extend([(status, after)] * times)
+
+    def _fault(self, path):
+        with self._lock:
+            if self.faults.get(path):
+                return self.faults[path].pop(0)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 503, False
+        return None
+
+    # Route handlers return (status, body, headers)
+
+    def _capital(self, body):
+        return 200, [{'id': 128, 'code': DP_ID, 'name': "FAKE CAPITAL LIMITED (13700)"}], {}
+
+    def _auth(self, body):
+        if (body.get('clientId') != 128 or body.get('username') not in self.users
+                or body.get('password') != PASSWORD):
+            return 401, {'message': "Invalid credentials"}, {}
+        token = f"fake-token-{len(self.requests)}"
+        self.tokens.add(token)
+        return 200, {'statusCode': 200, 'message': "Log in successful."}, {'Authorization': token}
+
+    def _own_detail(self, body):
+        return 200, {'demat': DEMAT, 'boid': DEMAT[-8:], 'clientCode': "13700", 'name': "Test User"}, {}
+
+    def _applicable_issue(self, body):
+        return 200, {'object': self.issues, 'totalCount': len(self.issues)}, {}
+
+    def _banks(self, body):
+        return 200, [{'code': "0301", 'id': 37, 'name': "Fake Bank Limited"}], {}
+
+    def _bank_accounts(self, body):
+        return 200, [{
+            'accountBranchId': 201,
+            'accountNumber': "00112233445566",
+            'accountTypeId': 1,
+            'branchName': "Main Branch",
+            'id': 9001,
+        }], {}
+
+    def _apply(self, body):
+        if body.get('transactionPIN') != TRANSACTION_PIN:
+            return 400, {'message': "Invalid transaction PIN"}, {}
+        self.applications.append(body)
+        for issue in self.issues:
+            if str(issue['companyShareId']) == str(body.get('companyShareId')):
+                issue['action'] = "edit"
+        return 201, {'status': "CREATED", 'message': "Share has been applied successfully."}, {}
+
+    def _application_report(self, body):
+        applied = {str(app['companyShareId']) for app in self.applications}
+        report = [
+            {
+                'applicantFormId': FORM_ID_OFFSET + int(issue['companyShareId']),
+                'companyShareId': issue['companyShareId'],
+                'scrip': issue['scrip'],
+                'companyName': issue['companyName'],
+                'shareTypeName': issue['shareTypeName'],
+                'statusName': "TRANSACTION_SUCCESS",
+            }
+            for issue in self.issues
+            if issue.get('action') or str(issue['companyShareId']) in applied
+        ]
+        return 200, {'object': report, 'totalCount': len(report)}, {}
+
+    def _application_detail(self, body, form_id):
+        share_id = str(int(form_id) - FORM_ID_OFFSET)
+        status, received = self.allotments.get(share_id, ("Verified", None))
+        return 200, {
+            'applicantFormId': int(form_id),
+            'appliedKitta': 10,
+            'receivedKitta': received,
+            'statusName': status,
+        }, {}
+
+    def _routes(self):
+        return {
+            ('GET', 'capital/'): (self._capital, False),
+            ('POST', 'auth/'): (self._auth, False),
+            ('GET', 'ownDetail/'): (self._own_detail, True),
+            ('POST', 'companyShare/applicableIssue/'): (self._applicable_issue, True),
+            ('GET', 'bank/'): (self._banks, True),
+            ('GET', 'bank/37'): (self._bank_accounts, True),
+            ('POST', 'applicantForm/share/apply'): (self._apply, True),
+            ('POST', 'applicantForm/active/search/'): (self._application_report, True),
+        }
+
+    def _prefix_routes(self):
+        # Routes ending in an id, the handler receives the last path segment
+        return {
+            ('GET', 'applicantForm/report/detail/'): (self._application_detail, True),
+        }
+
+    def _route(self, method, path):
+        route = self._routes().get((method, path))
+        if route:
+            return route[0], route[1], ()
+        prefix, _, tail = path.rpartition('/')
+        route = self._prefix_routes().get((method, prefix + '/'))
+        if route:
+            return route[0], route[1], (tail,)
+        return None
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _dispatch(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                body = json.loads(raw) if raw else {}
+                path = self.path.split('/api/meroShare/', 1)[-1]
+                fake.requests.append((method, path))
+
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                fault = fake._fault(path)
+                route = fake._route(method, path)
+                if fault and not fault[1]:
+                    status, payload, headers = fault[0], {'message': "Service Unavailable"}, {}
+                elif route is None:
+                    status, payload, headers = 404, {'message': "Not found"}, {}
+                else:
+                    handler, needs_auth, args = route
+                    if needs_auth and self.headers.get('Authorization') not in fake.tokens:
+                        status, payload, headers = 401, {'message': "Unauthorized"}, {}
+                    else:
+                        status, payload, headers = handler(body, *args)
+                    if fault:
+                        status, payload, headers = fault[0], {'message': "Gateway Timeout"}, {}
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+        return Handler
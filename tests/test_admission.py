@@ -0,0 +1,139 @@
+"""
+Tests for rate limits and adaptive concurrency of calls to Meroshare.
+"""
+
+import logging
+import threading
+
+import pytest
+
+from meroshare.admission import SOURCE, AdmissionController, AIMDLimit, TokenBucket
+from meroshare.errors import ServerBusy
+from meroshare.resilience import RetryPolicy
+
+
+class Clock:
+    """A clock that only moves when told to, or when something sleeps."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+    """Tests for the per-host and per-address rate limits."""
+
+    def test_burst_then_rate(self):
+        clock = Clock()
+        bucket = TokenBucket(2, burst=3, clock=clock, sleep=clock.sleep)
+        assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+        assert bucket.acquire() == pytest.approx(0.5)
+        assert bucket.acquire() == pytest.approx(0.5)
+
+        clock.now += 10
+        assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+
+    def test_hosts_have_their_own_bucket_under_the_address_bucket(self):
+        clock = Clock()
+        admission = AdmissionController(host_rate=1, source_rate=10, clock=clock, sleep=clock.sleep)
+        for host in ("web", "api", "web"):
+            with admission.admit('listing', host):
+                pass
+        assert clock.now == pytest.approx(101.0)
+        assert set(admission._buckets) == {SOURCE, "web", "api"}
+
+
+class TestAIMDLimit:
+    """Tests for adapting the number of calls in flight."""
+
+    def call(self, limit, clock, latency, overloaded=False, step='listing'):
+        started = limit.acquire()
+        clock.now += latency
+        return limit.release(step, started, overloaded)
+
+    def test_grows_while_calls_are_quick(self):
+        clock = Clock()
+        limit = AIMDLimit(initial=2, maximum=4, clock=clock)
+        for _ in range(20):
+            self.call(limit, clock, 0.1)
+        assert limit.limit == 4
+
+    def test_cut_once_per_congestion(self):
+        """Test slow calls sent before a cut do not cut the limit again."""
+        clock = Clock()
+        limit = AIMDLimit(initial=10, clock=clock)
+        self.call(limit, clock, 0.1)
+
+        started = [limit.acquire() for _ in range(3)]
+        clock.now += 1.0
+        reasons = [limit.release('listing', start) for start in started]
+        assert reasons[0] == "listing took 1.00s against 0.10s"
+        assert reasons[1:] == [None, None]
+        assert int(limit.limit) == 7
+
+        clock.now += 0.1
+        assert self.call(limit, clock, 0, overloaded=True) == "busy server"
+        assert int(limit.limit) == 4
+
+    def test_slow_steps_are_judged_against_themselves(self):
+        clock = Clock()
+        limit = AIMDLimit(initial=4, clock=clock)
+        self.call(limit, clock, 0.1, step='listing')
+        assert self.call(limit, clock, 2.0, step='login') is None
+        assert self.call(limit, clock, 2.5, step='login') is None
+        assert limit.limit > 4
+
+    def test_waits_for_a_free_slot(self):
+        limit = AIMDLimit(initial=1)
+        started = limit.acquire()
+        entered = threading.Event()
+
+        def second():
+            limit.release('apply', limit.acquire())
+            entered.set()
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        assert not entered.wait(0.05)
+        limit.release('apply', started)
+        assert entered.wait(1)
+        thread.join()
+
+
+class TestAdmission:
+    """Tests for admitting the calls of the retry policy."""
+
+    def test_busy_errors_cut_the_limit_and_are_logged(self, caplog):
+        admission = AdmissionController(limit=AIMDLimit(initial=8))
+        policy = RetryPolicy(attempts=3, admission=admission, sleep=lambda seconds: None)
+        answers = iter([ServerBusy(503), ServerBusy(503), "ok"])
+
+        def call():
+            answer = next(answers)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        with caplog.at_level(logging.INFO, logger='meroshare.admission'):
+            assert policy.run('apply', call, host='api') == "ok"
+        assert "Admission limit 8 -> 5 after busy server: 5 in flight (1-64)" in caplog.text
+        assert "Admission limit 5 -> 3 after busy server" in caplog.text
+        assert "Admission limit 3 -> 4: 4 in flight (1-64)" in caplog.text
+        assert admission.limit.in_flight == 0
+
+    def test_nested_calls_are_let_through(self):
+        """Test a call inside an admitted call does not wait for a second slot."""
+        admission = AdmissionController(limit=AIMDLimit(initial=1))
+        policy = RetryPolicy(attempts=1, admission=admission)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(
+            policy.run('apply', lambda: policy.run('apply', lambda: "inner"))), daemon=True)
+        thread.start()
+        thread.join(1)
+        assert results == ["inner"]
+        assert admission.limit.in_flight == 0
@@ -0,0 +1,91 @@
+"""
+Tests for the HTTP Meroshare backend against a local stand-in server.
+"""
+
+import pytest
+import requests
+
+from models.ipo import ApplyStatus
+from tests.conftest import make_api_client
+from tests.fake_meroshare import CRN
+
+
+class TestMeroshareAPIClient:
+    """Tests for the pure-HTTP client."""
+
+    def test_login_sets_authorization(self, fake):
+        """Test a successful login stores the token on the session."""
+        client = make_api_client(fake)
+        client.login()
+        assert client.session.headers['Authorization'] == client.token
+        assert client.token in fake.tokens
+        client.close()
+        assert client.session is None
+
+    def test_login_failure_closes_session(self, fake):
+        """Test a rejected login raises and releases the session."""
+        client = make_api_client(fake, password="wrong")
+        with pytest.raises(requests.HTTPError):
+            client.login()
+        assert client.session is None
+
+    def test_requires_login(self, fake):
+        """Test listing without logging in is rejected."""
+        client = make_api_client(fake)
+        with pytest.raises(Exception, match="login first"):
+            client.getAvailableIPOS()
+
+    def test_get_available_ipos_filters_ordinary_ipos(self, fake):
+        """Test only ordinary-share IPOs are returned."""
+        client = make_api_client(fake)
+        client.login()
+        client.navigate("asba")
+        names = [issue.company_name for issue in client.getAvailableIPOS()]
+        assert names == [
+            "Alpha Hydropower Limited",
+            "Gamma Microfinance Limited",
+            "Epsilon Insurance Limited",
+        ]
+
+    def test_apply_submits_every_open_issue(self, fake):
+        """Test applying submits one application per open IPO in one session."""
+        client = make_api_client(fake)
+        client.login()
+        client.navigate("asba")
+        results = client.applyAvailableIPOS()
+
+        assert [(result.issue.issue_id, result.status) for result in results] == [
+            ("101", ApplyStatus.APPLIED),
+            ("103", ApplyStatus.SKIPPED),
+            ("105", ApplyStatus.APPLIED),
+        ]
+        assert [application['companyShareId'] for application in fake.applications] == ["101", "105"]
+        application = fake.applications[0]
+        assert application['crnNumber'] == CRN
+        assert application['appliedKitta'] == "10"
+        assert application['bankId'] == "37"
+        assert fake.requests.count(('POST', 'auth/')) == 1
+
+    def test_apply_by_name(self, fake):
+        """Test a name pattern restricts which IPOs are applied for."""
+        client = make_api_client(fake)
+        client.login()
+        results = client.applyAvailableIPOS("epsilon")
+        assert [result.issue.company_name for result in results] == ["Epsilon Insurance Limited"]
+        assert [application['companyShareId'] for application in fake.applications] == ["105"]
+
+    def test_apply_reports_failures(self, fake):
+        """Test a rejected application is reported without stopping the batch."""
+        client = make_api_client(fake)
+        client.transaction_pin = "0000"
+        client.login()
+        results = client.applyAvailableIPOS()
+        assert [result.status for result in results] == [
+            ApplyStatus.FAILED, ApplyStatus.SKIPPED, ApplyStatus.FAILED]
+
+    def test_unknown_navigation_element(self, fake):
+        """Test navigating to an unknown section raises ValueError."""
+        client = make_api_client(fake)
+        client.login()
+        with pytest.raises(ValueError):
+            client.navigate("portfolio")
@@ -0,0 +1,168 @@
+"""
+Tests for caching the bank account used to fill application forms.
+"""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from meroshare import client as client_module
+from meroshare.bank_cache import BankAccount, BankCache, discover_bank_account
+from meroshare.client import MeroshareClient
+from models.ipo import Issue
+from tests.conftest import make_api_client
+from tests.fake_meroshare import CRN, DP_ID, PASSWORD, TRANSACTION_PIN, USERNAME, make_issue
+
+ACCOUNT = BankAccount(
+    bank_id=52, bank_name="Other Bank Limited", account_number="99887766",
+    customer_id=9002, branch_id=301, account_type_id=1)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BankCache(directory=str(tmp_path / "banks"))
+
+
+class TestBankCache:
+    """Tests for storing bank accounts at rest."""
+
+    def test_round_trip(self, cache):
+        """Test a saved account is loaded back, encrypted on disk."""
+        cache.save(DP_ID, USERNAME, PASSWORD, ACCOUNT)
+        assert cache.load(DP_ID, USERNAME, PASSWORD) == ACCOUNT
+
+        (name,) = os.listdir(cache.directory)
+        with open(os.path.join(cache.directory, name), 'rb') as f:
+            assert b"99887766" not in f.read()
+
+    def test_expired_entry_is_dropped(self, cache):
+        """Test entries older than the TTL are looked up again."""
+        cache.save(DP_ID, USERNAME, PASSWORD, ACCOUNT)
+        cache.ttl = 60
+        with patch('time.time', return_value=time.time() + 120):
+            assert cache.load(DP_ID, USERNAME, PASSWORD) is None
+        assert os.listdir(cache.directory) == []
+
+    def test_wrong_password_is_unreadable(self, cache):
+        """Test a changed password invalidates the entry."""
+        cache.save(DP_ID, USERNAME, PASSWORD, ACCOUNT)
+        assert cache.load(DP_ID, USERNAME, "changed") is None
+
+
+class TestDiscoverBankAccount:
+    """Tests for choosing the account to pay from."""
+
+    BANKS = [{'id': 37, 'name': "Fake Bank Limited"}, {'id': 52, 'name': "Other Bank Limited"}]
+    ACCOUNTS = {37: [{'accountNumber': "00112233445566", 'id': 9001}],
+                52: [{'accountNumber': "99887766", 'id': 9002}]}
+
+    def test_configured_account_is_matched(self):
+        account = discover_bank_account(self.BANKS, self.ACCOUNTS.get, wanted="99887766")
+        assert (account.bank_id, account.customer_id) == (52, 9002)
+
+    def test_single_account_needs_no_match(self):
+        account = discover_bank_account(self.BANKS[:1], self.ACCOUNTS.get, wanted="unknown")
+        assert account.account_number == "00112233445566"
+
+    def test_ambiguous_choice_fails(self):
+        """Test several accounts and no match never silently pick the first."""
+        with pytest.raises(Exception, match="2 bank accounts are linked"):
+            discover_bank_account(self.BANKS, self.ACCOUNTS.get, wanted="unknown")
+
+
+def bank_requests(fake):
+    return [request for request in fake.requests if request[1].startswith('bank/')]
+
+
+class TestAPIClientBankAccount:
+    """Tests for looking up the bank account once per account."""
+
+    def test_many_issues_one_lookup(self, fake, cache):
+        """Test applying for several issues looks the bank up only once."""
+        client = make_api_client(fake, bank_cache=cache)
+        client.login()
+        client.applyAvailableIPOS()
+        client.close()
+
+        assert len(fake.applications) == 2
+        assert bank_requests(fake) == [('GET', 'bank/'), ('GET', 'bank/37')]
+        assert {app['bankId'] for app in fake.applications} == {"37"}
+
+    def test_later_runs_use_the_cache(self, fake, cache):
+        """Test a cached account is used without any bank request."""
+        cache.save(DP_ID, USERNAME, PASSWORD, BankAccount(37, "Fake Bank Limited", "00112233445566",
+                                                          9001, 201, 1))
+        client = make_api_client(fake, bank_cache=cache)
+        client.login()
+        client.applyAvailableIPOS()
+        client.close()
+
+        assert len(fake.applications) == 2
+        assert bank_requests(fake) == []
+
+    def test_failed_application_invalidates_cache(self, fake, cache):
+        """Test a rejected application forgets the cached account."""
+        cache.save(DP_ID, USERNAME, PASSWORD, ACCOUNT)
+        client = make_api_client(fake, bank_cache=cache)
+        client.transaction_pin = "0000"
+        client.login()
+        with pytest.raises(Exception):
+            client.fillApplyForm(Issue.from_api(make_issue(101, "Alpha Hydropower Limited")))
+        client.close()
+
+        assert cache.load(DP_ID, USERNAME, PASSWORD) is None
+        assert client.bank_account is None
+
+
+class TestBrowserFormFill:
+    """Tests for filling the form in a single script call."""
+
+    @pytest.fixture
+    def client(self, cache):
+        client = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN, bank_cache=cache)
+        client.driver = MagicMock()
+        return client
+
+    def test_form_is_one_script_with_cached_account(self, client, cache):
+        """Test the cached bank and account are set directly, with no dropdown clicks."""
+        cache.save(DP_ID, USERNAME, PASSWORD, ACCOUNT)
+        client.driver.execute_async_script.return_value = None
+        with patch.object(client_module, 'wait_for') as wait:
+            client.fillApplyForm()
+
+        call, confirm = client.driver.execute_async_script.call_args_list
+        assert call.args[0] == client_module.FILL_FORM_JS
+        assert confirm.args[0] == client_module.CONFIRMATION_JS
+        assert call.args[1:5] == ([52, "Other Bank Limited"], ["99887766"], "10", CRN)
+        # Only the PIN step still waits for elements
+        assert [c.args[1][1] for c in wait.call_args_list] == [
+            "transactionPIN", "//button[span[text()='Apply ']]"]
+
+    def test_account_is_discovered_in_page_once(self, client):
+        """Test the bank lookup runs in the page and is reused for the next form."""
+        def execute_async_script(script, *args):
+            if script == client_module.API_GET_JS:
+                if args[0].endswith('bank/'):
+                    return {'status': 200, 'body': [{'id': 37, 'name': "Fake Bank Limited"}]}
+                return {'status': 200, 'body': [{'accountNumber': "00112233445566", 'id': 9001}]}
+            return None
+
+        client.driver.execute_async_script.side_effect = execute_async_script
+        with patch.object(client_module, 'wait_for'):
+            client.fillApplyForm()
+            client.fillApplyForm()
+
+        scripts = [c.args[0] for c in client.driver.execute_async_script.call_args_list]
+        assert scripts.count(client_module.API_GET_JS) == 2
+        assert scripts.count(client_module.FILL_FORM_JS) == 2
+        assert client.bank_account.bank_id == 37
+
+    def test_form_error_invalidates_cache(self, client, cache):
+        """Test a missing option forgets the cached account and fails the form."""
+        cache.save(DP_ID, USERNAME, PASSWORD, ACCOUNT)
+        client.driver.execute_async_script.return_value = "Timed out waiting for the bank option"
+        with pytest.raises(Exception, match="bank option"):
+            client.fillApplyForm()
+        assert cache.load(DP_ID, USERNAME, PASSWORD) is None
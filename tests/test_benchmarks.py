@@ -0,0 +1,39 @@
+"""
+Tests for the offline benchmark suite helpers.
+"""
+
+import requests
+
+from benchmarks.fake_site import FakeSite, server
+from benchmarks.run import compare
+
+
+class TestCompare:
+    """Tests for regression detection against a baseline."""
+
+    baseline = {'wall_s': 2.0, 'round_trips': 100, 'peak_rss_mb': 300.0, 'steps': {'login': 1.0}}
+
+    def test_within_tolerance(self):
+        """Test small slowdowns inside the tolerance pass."""
+        current = {'wall_s': 2.3, 'round_trips': 110, 'peak_rss_mb': 320.0, 'steps': {'login': 1.1}}
+        assert compare(current, self.baseline, 0.2) == []
+
+    def test_regressions_reported(self):
+        """Test metrics beyond the tolerance are reported."""
+        current = {'wall_s': 3.0, 'round_trips': 300, 'peak_rss_mb': 300.0, 'steps': {'login': 2.0}}
+        assert [metric for metric, _, _ in compare(current, self.baseline, 0.2)] == [
+            'wall_s', 'round_trips', 'steps.login']
+
+
+def test_fake_site_serves_app_and_api():
+    """Test the replica serves the page and its JSON API behind a login."""
+    with FakeSite(rows=8) as site:
+        assert 'company-list' in requests.get(f"{site.url}/").text
+        assert requests.get(f"{site.url}/api/issues").status_code == 401
+
+        token = requests.post(f"{site.url}/api/auth", json={
+            'dp': server.DP_ID, 'username': server.USERNAME, 'password': server.PASSWORD,
+        }).json()['token']
+        issues = requests.get(f"{site.url}/api/issues", headers={'Authorization': token}).json()
+        assert len(issues) == 8
+        assert sum(issue['shareGroupName'] == "Debentures" for issue in issues) == 2
@@ -0,0 +1,291 @@
+"""
+Tests for the Selenium client using a stand-in WebDriver.
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from meroshare import client as client_module
+from meroshare.client import MeroshareClient
+from meroshare.errors import SessionExpired
+from models.ipo import ApplyStatus
+from tests.fake_browser import FakeBrowser
+from tests.fake_meroshare import make_issue
+
+ROWS = [
+    {'index': 0, 'companyName': "Alpha Hydropower Limited", 'scrip': "ALPHA",
+     'shareType': "IPO", 'shareGroup': "Ordinary Shares", 'button': "Edit", 'enabled': True},
+    {'index': 1, 'companyName': "Beta Bank Limited", 'scrip': "BETA",
+     'shareType': "IPO", 'shareGroup': "Debentures", 'button': "Apply", 'enabled': True},
+    {'index': 2, 'companyName': "Gamma Microfinance Limited", 'scrip': "GAMMA",
+     'shareType': "IPO", 'shareGroup': "Ordinary Shares", 'button': "Apply", 'enabled': True},
+]
+
+
+@pytest.fixture
+def driver():
+    driver = MagicMock()
+
+    def execute_script(script, *args):
+        if script == client_module.EXTRACT_ISSUES_JS:
+            return ROWS
+        if script == client_module.CLICK_APPLY_JS:
+            return True
+        return None
+
+    driver.execute_script.side_effect = execute_script
+    driver.current_url = "https://meroshare.cdsc.com.np/#/dashboard"
+    return driver
+
+
+@pytest.fixture
+def client(driver):
+    client = MeroshareClient("user", "pass", "13700", "CRN", "1234")
+    client.driver = driver
+    return client
+
+
+def script_calls(driver, script):
+    return [call for call in driver.execute_script.call_args_list if call.args[0] == script]
+
+
+class TestListing:
+    """Tests for reading the ASBA listing."""
+
+    def test_listing_is_one_round_trip(self, client, driver):
+        """Test every row is read with a single script call."""
+        issues = client.getAvailableIPOS()
+        assert [issue.scrip for issue in issues] == ["ALPHA", "GAMMA"]
+        assert len(script_calls(driver, client_module.EXTRACT_ISSUES_JS)) == 1
+        driver.execute_async_script.assert_called_once()  # the readiness wait only
+        driver.find_element.assert_not_called()
+
+    def test_apply_reuses_snapshot(self, client, driver):
+        """Test applying after listing does not read the DOM again."""
+        client.getAvailableIPOS()
+        with patch.object(MeroshareClient, 'fillApplyForm') as fill:
+            client.applyAvailableIPOS()
+
+        fill.assert_called_once()
+        assert len(script_calls(driver, client_module.EXTRACT_ISSUES_JS)) == 1
+        (click,) = script_calls(driver, client_module.CLICK_APPLY_JS)
+        assert click.args[1] == 2
+
+
+class TestApply:
+    """Tests for applying to several issues in one session."""
+
+    def test_apply_all_reloads_listing_between_issues(self):
+        """Test every open IPO is applied for, loading ASBA again after each submission."""
+        browser = FakeBrowser([make_issue(101, "Alpha Hydropower Limited"),
+                               make_issue(105, "Epsilon Insurance Limited")])
+        client = MeroshareClient("user", "pass", "13700", "CRN", "1234")
+        client.driver = browser
+        client.login()
+        client.navigate("asba")
+
+        results = client.applyAvailableIPOS()
+
+        assert [(result.issue.key, result.status) for result in results] == [
+            ("101", ApplyStatus.APPLIED), ("105", ApplyStatus.APPLIED)]
+        assert browser.applications == ["101", "105"]
+        assert browser.refreshes == 1
+
+    def test_sibling_row_is_found_by_sub_group(self, client, driver):
+        """Test the Apply click lands on the row of the issue, not a sibling sharing its scrip."""
+        rows = [dict(ROWS[2], index=0, subGroup="For General Public"),
+                dict(ROWS[2], index=1, subGroup="For Local People")]
+        driver.execute_script.side_effect = lambda script, *args: (
+            rows if script == client_module.EXTRACT_ISSUES_JS else True)
+        client.getAvailableIPOS()
+
+        with patch.object(MeroshareClient, 'fillApplyForm') as fill:
+            client._apply_one(client.issues[1])
+
+        (click,) = script_calls(driver, client_module.CLICK_APPLY_JS)
+        assert click.args[1:] == (1, ["GAMMA", "Ordinary Shares", "For Local People"])
+        assert fill.call_args.args[0].sub_group == "For Local People"
+
+    def test_apply_isolates_failures(self, client):
+        """Test a failing form does not stop the remaining issues."""
+        client.issues = None
+        with patch.object(MeroshareClient, 'fillApplyForm', side_effect=Exception("timeout")), \
+                patch.object(MeroshareClient, 'navigate'):
+            results = client.applyAvailableIPOS()
+        assert [(result.issue.scrip, result.status) for result in results] == [
+            ("ALPHA", ApplyStatus.SKIPPED), ("GAMMA", ApplyStatus.FAILED)]
+        assert results[1].message == "timeout"
+
+
+class TestPoll:
+    """Tests for the cheap in-page listing poll used by --watch."""
+
+    def test_poll_is_one_in_page_request(self, client, driver):
+        """Test a poll reuses the page's token and does not navigate."""
+        driver.execute_async_script.return_value = {
+            'status': 200, 'object': [make_issue(101, "Alpha Hydropower Limited")]}
+        issues = client.poll_issues()
+
+        assert [issue.issue_id for issue in issues] == ["101"]
+        driver.execute_async_script.assert_called_once()
+        driver.get.assert_not_called()
+        assert script_calls(driver, client_module.EXTRACT_ISSUES_JS) == []
+
+    def test_poll_reports_expired_session(self, client, driver):
+        """Test a 401 from the API surfaces as SessionExpired."""
+        driver.execute_async_script.return_value = {'status': 401, 'object': None}
+        with pytest.raises(SessionExpired):
+            client.poll_issues()
+
+    def test_poll_falls_back_to_dom(self, client, driver):
+        """Test the listing is read from the page when no token is stored."""
+        driver.execute_async_script.return_value = {'status': 0, 'object': None}
+        with patch.object(MeroshareClient, 'navigate') as navigate:
+            issues = client.poll_issues()
+        navigate.assert_called_once_with("asba")
+        assert [issue.scrip for issue in issues] == ["ALPHA", "BETA", "GAMMA"]
+
+
+class TabDriver:
+    """A stand-in WebDriver whose tabs each finish an application after a delay."""
+
+    def __init__(self, rows, delays, errors=()):
+        self.rows = rows
+        self.delays = delays
+        self.errors = set(errors)
+        self.handles = ["main"]
+        self.current_window_handle = "main"
+        self.started = {}
+        self.opened = []
+        self.switch_to = MagicMock()
+        self.switch_to.new_window.side_effect = self._new_window
+        self.switch_to.window.side_effect = self._window
+
+    @property
+    def window_handles(self):
+        return list(self.handles)
+
+    def _new_window(self, kind):
+        handle = f"tab{len(self.opened) + 1}"
+        self.opened.append(handle)
+        self.handles.append(handle)
+        self.current_window_handle = handle
+
+    def _window(self, handle):
+        assert handle in self.handles
+        self.current_window_handle = handle
+
+    def execute_script(self, script, *args):
+        if script == client_module.EXTRACT_ISSUES_JS:
+            return self.rows
+        if script == client_module.READ_STORAGE_JS:
+            return [{}, {'Authorization': "token"}]
+        if script == client_module.PIPELINE_APPLY_JS:
+            self.started[self.current_window_handle] = (args[0], time.monotonic())
+            return None
+        if script == client_module.READ_OUTCOME_JS:
+            scrip, started = self.started[self.current_window_handle]
+            if time.monotonic() - started < self.delays[scrip]:
+                return {'done': False}
+            if scrip in self.errors:
+                return {'done': True, 'error': "Invalid transaction PIN"}
+            return {'done': True, 'error': None, 'message': "Share has been applied successfully."}
+        return None
+
+    def execute_async_script(self, script, *args):
+        return True
+
+    def get(self, url):
+        pass
+
+    def refresh(self):
+        pass
+
+    def close(self):
+        self.handles.remove(self.current_window_handle)
+
+
+class TestTabs:
+    """Tests for applying to several issues at once in separate tabs."""
+
+    ROWS = [dict(ROWS[2], index=index, scrip=scrip, companyName=f"{scrip} Limited")
+            for index, scrip in enumerate(["GAMMA", "DELTA", "EPSILON", "ZETA"])]
+
+    def make_client(self, driver, tabs):
+        client = MeroshareClient("user", "pass", "13700", "CRN", "1234", tabs=tabs)
+        client.driver = driver
+        client.POLL_INTERVAL = 0.01
+        return client
+
+    def test_submissions_overlap(self):
+        """Test N issues take about the slowest submission, not the sum."""
+        driver = TabDriver(self.ROWS, {"GAMMA": 0.3, "DELTA": 0.1, "EPSILON": 0.2, "ZETA": 0.3})
+        client = self.make_client(driver, tabs=4)
+        with patch.object(MeroshareClient, '_bank_account', return_value=None):
+            start = time.monotonic()
+            results = client.applyAvailableIPOS()
+            elapsed = time.monotonic() - start
+
+        assert [result.issue.scrip for result in results] == ["GAMMA", "DELTA", "EPSILON", "ZETA"]
+        assert all(result.status is ApplyStatus.APPLIED for result in results)
+        assert elapsed < 0.6
+        assert driver.handles == ["main"] and driver.current_window_handle == "main"
+        assert client.issues is None
+
+    def test_failure_only_fails_its_issue(self):
+        """Test a rejected tab is reported and captured while the others apply."""
+        driver = TabDriver(self.ROWS, dict.fromkeys(["GAMMA", "DELTA", "EPSILON", "ZETA"], 0.05),
+                           errors=["DELTA"])
+        client = self.make_client(driver, tabs=2)
+        client.diagnostics = MagicMock()
+        with patch.object(MeroshareClient, '_bank_account', return_value=None):
+            results = client.applyAvailableIPOS()
+
+        assert [(result.issue.scrip, result.status) for result in results] == [
+            ("GAMMA", ApplyStatus.APPLIED), ("DELTA", ApplyStatus.FAILED),
+            ("EPSILON", ApplyStatus.APPLIED), ("ZETA", ApplyStatus.APPLIED)]
+        assert results[1].message == "Invalid transaction PIN"
+        assert client.diagnostics.capture.call_args.args[2] == 'apply_tab'
+        assert driver.opened == ["tab1", "tab2", "tab3", "tab4"]
+        assert driver.handles == ["main"]
+
+    def test_at_most_tabs_at_once(self):
+        """Test no more than ``tabs`` applications run at the same time."""
+        driver = TabDriver(self.ROWS, dict.fromkeys(["GAMMA", "DELTA", "EPSILON", "ZETA"], 0.05))
+        client = self.make_client(driver, tabs=2)
+        peak = 0
+        new_window = driver.switch_to.new_window.side_effect
+
+        def counting(kind):
+            nonlocal peak
+            new_window(kind)
+            peak = max(peak, len(driver.handles) - 1)
+
+        driver.switch_to.new_window.side_effect = counting
+        with patch.object(MeroshareClient, '_bank_account', return_value=None):
+            client.applyAvailableIPOS()
+        assert peak == 2
+
+    def test_failed_start_only_closes_its_own_tab(self):
+        """Test tabs the client did not open, e.g. another account's, stay open."""
+        driver = TabDriver(self.ROWS[:2], dict.fromkeys(["GAMMA", "DELTA"], 0.05))
+        driver.handles.append("other")
+        client = self.make_client(driver, tabs=2)
+        logins = []
+
+        def get(url):
+            if url.endswith('#/login'):
+                logins.append(url)
+                if len(logins) == 2:
+                    raise Exception("tab crashed")
+
+        driver.get = get
+        with patch.object(MeroshareClient, '_bank_account', return_value=None):
+            results = client.applyAvailableIPOS()
+
+        assert [(result.issue.scrip, result.status) for result in results] == [
+            ("GAMMA", ApplyStatus.APPLIED), ("DELTA", ApplyStatus.FAILED)]
+        assert driver.handles == ["main", "other"]
+        assert client._tabs == set()
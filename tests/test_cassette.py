@@ -0,0 +1,130 @@
+"""
+Tests for recording a run into a cassette and replaying it offline.
+"""
+
+import gzip
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from meroshare.api import MeroshareAPIClient
+from meroshare.cassette import REDACTED, Player, Recorder
+from main import open_cassette
+from meroshare.errors import ReplayMismatch
+from tests.fake_meroshare import (
+    CRN, DEMAT, DP_ID, PASSWORD, TRANSACTION_PIN, USERNAME, FakeMeroshare,
+)
+
+
+def run_flow(base_url, adapter):
+    client = MeroshareAPIClient(
+        username=USERNAME, password=PASSWORD, dp_id=DP_ID, crn=CRN,
+        transaction_pin=TRANSACTION_PIN, base_url=base_url, adapter=adapter)
+    try:
+        client.login()
+        client.navigate("asba")
+        client.getAvailableIPOS()
+        return [(result.issue.scrip, result.status) for result in client.applyAvailableIPOS()]
+    finally:
+        client.close()
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """A cassette of a full run against the fake server, with its results and tokens."""
+    path = str(tmp_path / "run.jsonl.gz")
+    recorder = Recorder(path, secrets=(USERNAME, PASSWORD, CRN, TRANSACTION_PIN))
+    with FakeMeroshare(latency=0.01) as fake:
+        results = run_flow(fake.url, recorder.adapter())
+        url, tokens, applications = fake.url, set(fake.tokens), len(fake.applications)
+    recorder.close()
+    assert applications > 0
+    return path, url, results, tokens
+
+
+class TestHTTP:
+    """Tests for the http backend."""
+
+    def test_replay_gives_the_same_results_offline(self, recorded):
+        path, url, results, _ = recorded
+        player = Player(path, timing='fast')
+        assert run_flow(url, player.adapter()) == results
+        assert player.remaining() == 0
+
+    def test_cassette_is_redacted(self, recorded):
+        path, _, _, tokens = recorded
+        with gzip.open(path, 'rt') as f:
+            text = f.read()
+        assert REDACTED in text
+        for secret in (PASSWORD, CRN, TRANSACTION_PIN, DEMAT, *tokens):
+            assert f'"{secret}"' not in text
+        assert not any(secret in text for secret in (DEMAT, *tokens))
+
+    def test_recorded_timing(self, recorded):
+        path, url, _, _ = recorded
+        waits = []
+        run_flow(url, Player(path, timing='recorded', sleep=waits.append).adapter())
+        assert len(waits) > 3 and all(wait >= 0.01 for wait in waits)
+
+    def test_unrecorded_request(self, recorded):
+        path, url, _, _ = recorded
+        client = MeroshareAPIClient(
+            username=USERNAME, password=PASSWORD, dp_id=DP_ID, crn=CRN,
+            transaction_pin=TRANSACTION_PIN, base_url=url,
+            adapter=Player(path, timing='fast').adapter())
+        client.login()
+        with pytest.raises(ReplayMismatch, match="GET /api/meroShare/unknown/"):
+            client._request('GET', 'unknown/')
+
+
+class TestWebDriver:
+    """Tests for the browser backend's WebDriver commands."""
+
+    def test_commands_replay_without_a_browser(self, tmp_path):
+        path = str(tmp_path / "browser.jsonl")
+        answers = {
+            'w3cExecuteScript': {'value': [{}, {'Authorization': "secret-token"}]},
+            'sendKeysToElement': {'value': None},
+            'getCurrentUrl': {'value': "https://meroshare.cdsc.com.np/#/asba"},
+        }
+        driver = MagicMock()
+        driver.command_executor.execute.side_effect = lambda command, params: answers[command]
+        recorder = Recorder(path, secrets=(PASSWORD,))
+        recorder.attach(driver)
+        driver.command_executor.execute('w3cExecuteScript', {'script': "return 1", 'args': []})
+        driver.command_executor.execute(
+            'sendKeysToElement', {'id': "e1", 'text': PASSWORD, 'value': list(PASSWORD)})
+        driver.command_executor.execute('getCurrentUrl', {})
+        recorder.detach(driver)
+        recorder.close()
+
+        with open(path) as f:
+            text = f.read()
+        assert "secret-token" not in text and f'"{PASSWORD[0]}"' not in text
+
+        replayed = Player(path, timing='fast').driver()
+        assert replayed.execute_script("return 1") == [{}, {'Authorization': REDACTED}]
+        assert replayed.current_url == "https://meroshare.cdsc.com.np/#/asba"
+        with pytest.raises(ReplayMismatch):
+            replayed.current_url
+        replayed.quit()
+
+
+class TestOpenCassette:
+    """Tests for the cassettes opened by main.py --record."""
+
+    def test_clients_of_an_account_share_one_recorder(self, tmp_path):
+        """Test the prewarm and scheduled clients do not interleave two writers in a file."""
+        args = SimpleNamespace(record=str(tmp_path), replay=None)
+        account = SimpleNamespace(label="13700 user", username=USERNAME, password=PASSWORD,
+                                  crn=CRN, transaction_pin=TRANSACTION_PIN)
+        first, second = open_cassette(args, account), open_cassette(args, account)
+        assert first is second
+
+        first.record('http', 'GET /a', {}, {'status': 200}, 0.1)
+        first.close()
+        second.record('http', 'GET /b', {}, {'status': 200}, 0.1)
+        second.close()
+        player = Player(str(tmp_path / "13700_user.jsonl.gz"), timing='fast')
+        assert player.next('http', 'GET /a') and player.next('http', 'GET /b')
@@ -0,0 +1,132 @@
+"""
+Tests for hosting many accounts in isolated contexts of one browser.
+"""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from meroshare import contexts
+from meroshare.contexts import BrowserContextPool
+
+
+class FakeCDP:
+    """Records browser-level CDP commands and hands out ids."""
+
+    def __init__(self, debugger_address):
+        self.commands = []
+        self.contexts = set()
+
+    def send(self, method, params=None):
+        self.commands.append((method, params))
+        if method == 'Target.createBrowserContext':
+            context_id = f"ctx{len(self.commands)}"
+            self.contexts.add(context_id)
+            return {'browserContextId': context_id}
+        if method == 'Target.createTarget':
+            return {'targetId': f"target-{params['browserContextId']}"}
+        if method == 'Target.disposeBrowserContext':
+            self.contexts.discard(params['browserContextId'])
+        return {}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def pool(tmp_path):
+    host = MagicMock(name="host")
+    host.capabilities = {'goog:chromeOptions': {'debuggerAddress': "localhost:9222"}}
+    profile = tmp_path / "profile"
+    profile.mkdir()
+
+    with patch.object(contexts, 'resolve_driver_path', return_value="chromedriver"), \
+            patch.object(contexts, 'reap_stale_profiles'), \
+            patch.object(contexts, 'launch_driver', return_value=(host, str(profile))) as launch, \
+            patch.object(contexts, 'BrowserCDP', FakeCDP), \
+            patch.object(contexts.webdriver, 'Chrome', side_effect=lambda **kw: MagicMock()) as chrome:
+        pool = BrowserContextPool(max_contexts=2).start()
+        pool.host, pool.profile, pool.launch, pool.chrome = host, profile, launch, chrome
+        yield pool
+        pool.close()
+
+
+class TestBrowserContextPool:
+    """Tests for binding drivers to browser contexts."""
+
+    def test_one_browser_for_many_accounts(self, pool):
+        """Test every driver attaches to the one launched browser."""
+        first, second = pool.acquire(), pool.acquire()
+
+        assert first is not second
+        assert pool._contexts[first] != pool._contexts[second]
+        assert pool.launch.call_count == 1
+        assert pool.active == 2
+        for call in pool.chrome.call_args_list:
+            assert call.kwargs['options'].debugger_address == "localhost:9222"
+        assert len(pool._cdp.contexts) == 2
+
+    def test_driver_is_bound_to_its_context(self, pool):
+        """Test each driver switches to the tab created in its own context."""
+        driver = pool.acquire()
+        context_id = pool._contexts[driver]
+        driver.switch_to.window.assert_called_once_with(f"target-{context_id}")
+
+    def test_release_disposes_context(self, pool):
+        """Test releasing ends the session and drops the context's data."""
+        driver = pool.acquire()
+        pool.release(driver)
+
+        driver.quit.assert_called_once()
+        assert pool._cdp.contexts == set()
+        assert pool.active == 0
+        pool.host.quit.assert_not_called()
+
+    def test_max_contexts_is_enforced(self, pool):
+        """Test acquiring beyond max_contexts waits and then times out."""
+        pool.acquire()
+        pool.acquire()
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.01)
+
+    def test_failed_attach_disposes_context(self, pool):
+        """Test a context is not leaked when the session cannot attach."""
+        pool.chrome.side_effect = Exception("chromedriver crashed")
+        with pytest.raises(Exception, match="crashed"):
+            pool.acquire()
+        assert pool._cdp.contexts == set()
+        pool.chrome.side_effect = lambda **kw: MagicMock()
+        pool.acquire()
+        pool.acquire()
+
+    def test_close_quits_browser(self, pool):
+        """Test closing disposes open contexts and removes the profile."""
+        driver = pool.acquire()
+        cdp = pool._cdp
+        pool.close()
+
+        driver.quit.assert_called_once()
+        assert cdp.contexts == set()
+        pool.host.quit.assert_called_once()
+        assert not pool.profile.exists()
+        with pytest.raises(Exception, match="closed"):
+            pool.acquire()
+
+    def test_close_fails_waiting_acquire(self, pool):
+        """Test a thread waiting for a context gets an error instead of a closed browser."""
+        pool.acquire()
+        pool.acquire()
+        errors = []
+
+        def acquire():
+            try:
+                pool.acquire()
+            except Exception as e:
+                errors.append(str(e))
+
+        thread = threading.Thread(target=acquire, daemon=True)
+        thread.start()
+        pool.close()
+        thread.join(1)
+        assert errors == ["Browser context pool is closed"]
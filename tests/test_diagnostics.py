@@ -0,0 +1,137 @@
+"""
+Tests for capturing failure artifacts of the browser client.
+"""
+
+import base64
+import json
+import os
+import time
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from meroshare import client as client_module
+from meroshare.client import MeroshareClient
+from meroshare.diagnostics import FailureCapture
+
+PNG = b"\x89PNG\r\n\x1a\nfake"
+
+
+def make_driver():
+    driver = MagicMock()
+    driver.current_url = "https://meroshare.cdsc.com.np/#/login"
+    driver.title = "Meroshare"
+    driver.page_source = "<html><body>Login</body></html>"
+    driver.get_screenshot_as_base64.return_value = base64.b64encode(PNG).decode()
+    driver.get_log.return_value = [{'level': 'SEVERE', 'message': "net::ERR_TIMED_OUT"}]
+    return driver
+
+
+@pytest.fixture
+def capture(tmp_path):
+    return FailureCapture(str(tmp_path / "artifacts"), run_id="run-1")
+
+
+def artifacts(capture):
+    found = []
+    for root, _, filenames in os.walk(capture.directory):
+        found.extend(os.path.join(root, filename) for filename in filenames)
+    return sorted(found)
+
+
+class TestFailureCapture:
+    """Tests for storing artifacts."""
+
+    def test_artifact_holds_browser_state(self, capture):
+        """Test screenshot, page, console and URL land in one zip per failure."""
+        path = capture.capture(make_driver(), "13700:user", "login", ValueError("boom"))
+        capture.flush()
+
+        assert os.path.dirname(path) == os.path.join(capture.directory, "run-1", "13700_user")
+        with zipfile.ZipFile(path) as archive:
+            assert sorted(archive.namelist()) == [
+                'console.json', 'meta.json', 'page.html', 'screenshot.png']
+            assert archive.read('screenshot.png') == PNG
+            meta = json.loads(archive.read('meta.json'))
+        assert meta['url'].endswith('#/login')
+        assert meta['phase'] == "login"
+        assert meta['error'] == "ValueError: boom"
+
+    def test_dead_browser_still_records_the_error(self, capture):
+        class DeadDriver:
+            def __getattr__(self, name):
+                raise Exception("browser is gone")
+
+        path = capture.capture(DeadDriver(), "13700:user", "navigate", TimeoutException())
+        capture.flush()
+
+        with zipfile.ZipFile(path) as archive:
+            assert archive.namelist() == ['meta.json']
+
+    def test_writes_happen_off_the_calling_thread(self, capture):
+        """Test capture returns before the artifact is on disk."""
+        with patch.object(FailureCapture, '_write', side_effect=lambda *args: time.sleep(0.3)):
+            start = time.perf_counter()
+            capture.capture(make_driver(), "13700:user", "login")
+            assert time.perf_counter() - start < 0.2
+            capture.flush()
+
+    def test_retention_by_age_and_size(self, capture):
+        old = os.path.join(capture.directory, "run-0", "13700_user", "old.zip")
+        os.makedirs(os.path.dirname(old))
+        with open(old, 'wb') as f:
+            f.write(b"x" * 10)
+        os.utime(old, (time.time() - 30 * 24 * 3600,) * 2)
+
+        for phase in ("first", "second", "third"):
+            capture.capture(make_driver(), "13700:user", phase)
+            capture.flush()
+        assert not os.path.exists(os.path.dirname(old))
+        assert len(artifacts(capture)) == 3
+
+        size = os.path.getsize(artifacts(capture)[0])
+        capture.max_bytes = 2 * size + size // 2
+        capture.prune()
+        remaining = artifacts(capture)
+        assert [os.path.basename(path).split('-', 2)[2] for path in remaining] == [
+            "second.zip", "third.zip"]
+
+
+class TestClientCapture:
+    """Tests for the browser client capturing failed steps."""
+
+    @pytest.fixture
+    def client(self, capture):
+        client = MeroshareClient("user", "pass", "13700", "CRN", "1234", diagnostics=capture)
+        client.driver = make_driver()
+        return client
+
+    def test_login_failure_is_captured_once(self, client, capture):
+        """Test a failed login stores one artifact and takes no screenshot file."""
+        with patch.object(client_module, 'wait_for', side_effect=TimeoutException("slow")):
+            with pytest.raises(TimeoutException):
+                client.login()
+        capture.flush()
+
+        (path,) = artifacts(capture)
+        assert path.endswith("-login.zip")
+        client.driver.save_screenshot.assert_not_called()
+
+    def test_nested_failure_is_captured_by_inner_step(self, client, capture):
+        client.driver.execute_async_script.return_value = "Timed out waiting for the bank option"
+        with pytest.raises(Exception):
+            client.fillApplyForm()
+        capture.flush()
+
+        (path,) = artifacts(capture)
+        assert path.endswith("-fillApplyForm.zip")
+
+    def test_listing_failure_is_captured(self, client, capture):
+        with patch.object(MeroshareClient, '_snapshot_issues', side_effect=TimeoutException()):
+            with pytest.raises(TimeoutException):
+                client.getAvailableIPOS()
+        capture.flush()
+        (path,) = artifacts(capture)
+        assert path.endswith("-getAvailableIPOS.zip")
@@ -0,0 +1,205 @@
+"""
+Tests for cached driver resolution and the warm driver pool.
+"""
+
+import os
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from meroshare import driver_pool
+from meroshare.driver_pool import DriverPool, reap_stale_profiles, resolve_driver_path
+
+
+@pytest.fixture
+def downloaded(tmp_path):
+    path = tmp_path / "download" / "chromedriver"
+    path.parent.mkdir()
+    path.write_text("#!/bin/sh\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+class TestResolveDriverPath:
+    """Tests for the versioned chromedriver cache."""
+
+    def test_downloads_once_per_browser_version(self, tmp_path, downloaded):
+        """Test the second resolution is served from the cache."""
+        cache_dir = str(tmp_path / "cache")
+        manager = MagicMock()
+        manager.return_value.install.return_value = downloaded
+
+        with patch.object(driver_pool, 'browser_major_version', return_value="120"), \
+                patch('webdriver_manager.chrome.ChromeDriverManager', manager):
+            first = resolve_driver_path(cache_dir)
+            second = resolve_driver_path(cache_dir)
+
+        assert first == second == os.path.join(cache_dir, "120", "chromedriver")
+        assert manager.return_value.install.call_count == 1
+
+    def test_new_browser_version_resolves_again(self, tmp_path, downloaded):
+        """Test a browser upgrade triggers a fresh download."""
+        cache_dir = str(tmp_path / "cache")
+        manager = MagicMock()
+        manager.return_value.install.return_value = downloaded
+
+        with patch('webdriver_manager.chrome.ChromeDriverManager', manager):
+            with patch.object(driver_pool, 'browser_major_version', return_value="120"):
+                resolve_driver_path(cache_dir)
+            with patch.object(driver_pool, 'browser_major_version', return_value="121"):
+                resolve_driver_path(cache_dir)
+
+        assert manager.return_value.install.call_count == 2
+
+
+def test_reap_stale_profiles(tmp_path):
+    """Test only old meroshare profiles are removed."""
+    stale = tmp_path / (driver_pool.PROFILE_PREFIX + "old")
+    fresh = tmp_path / (driver_pool.PROFILE_PREFIX + "new")
+    other = tmp_path / "something-else"
+    for path in (stale, fresh, other):
+        path.mkdir()
+    old = time.time() - 7200
+    os.utime(stale, (old, old))
+    os.utime(other, (old, old))
+
+    with patch('tempfile.gettempdir', return_value=str(tmp_path)):
+        assert reap_stale_profiles(max_age=3600) == 1
+
+    assert not stale.exists()
+    assert fresh.exists() and other.exists()
+
+
+class TestDriverPool:
+    """Tests for handing out and resetting pooled browsers."""
+
+    @pytest.fixture
+    def pool(self, tmp_path):
+        launched = []
+
+        def fake_launch(headless, driver_path, lean=False):
+            driver = MagicMock(name=f"driver{len(launched)}")
+            launched.append(driver)
+            profile = tmp_path / f"profile{len(launched)}"
+            profile.mkdir()
+            return driver, str(profile)
+
+        with patch.object(driver_pool, 'resolve_driver_path', return_value="chromedriver"), \
+                patch.object(driver_pool, 'launch_driver', side_effect=fake_launch):
+            pool = DriverPool(size=2).start()
+            pool.launched = launched
+            yield pool
+            pool.close()
+
+    def test_release_resets_instead_of_relaunching(self, pool):
+        """Test a released browser is cleaned and handed out again."""
+        driver = pool.acquire(timeout=1)
+        pool.release(driver)
+        driver.execute_cdp_cmd.assert_any_call('Network.clearBrowserCookies', {})
+        driver.get.assert_called_with('about:blank')
+        assert len(pool.launched) == 2
+
+    def test_failed_reset_replaces_browser(self, pool):
+        """Test a browser that cannot be reset is quit and replaced."""
+        driver = pool.acquire(timeout=1)
+        driver.execute_cdp_cmd.side_effect = Exception("browser crashed")
+        pool.release(driver)
+        driver.quit.assert_called_once()
+        assert len(pool.launched) == 3
+
+    def test_release_clears_the_site_used(self, pool):
+        """Test storage of a custom site, session storage included, is cleared too."""
+        driver = pool.acquire(timeout=1)
+        pool.release(driver, origin="http://127.0.0.1:8000")
+        cleared = [(call.args[0], call.args[1].get('origin') or call.args[1]['storageId'])
+                   for call in driver.execute_cdp_cmd.call_args_list
+                   if call.args[0] in ('Storage.clearDataForOrigin', 'DOMStorage.clear')]
+        assert cleared == [
+            ('Storage.clearDataForOrigin', driver_pool.MEROSHARE_ORIGIN),
+            ('DOMStorage.clear', {'securityOrigin': driver_pool.MEROSHARE_ORIGIN, 'isLocalStorage': False}),
+            ('Storage.clearDataForOrigin', "http://127.0.0.1:8000"),
+            ('DOMStorage.clear', {'securityOrigin': "http://127.0.0.1:8000", 'isLocalStorage': False}),
+        ]
+
+    def test_failed_replacement_shrinks_the_pool(self, pool, caplog):
+        """Test a browser that cannot be replaced does not fail the releasing account."""
+        driver = pool.acquire(timeout=1)
+        driver.execute_cdp_cmd.side_effect = Exception("browser crashed")
+        with patch.object(driver_pool, 'launch_driver', side_effect=Exception("no memory")):
+            pool.release(driver)
+        assert pool.size == 1
+        assert "Could not replace the browser, 1 left in the pool: no memory" in caplog.text
+        assert pool.acquire(timeout=1) is not driver
+
+    def test_acquire_times_out_when_exhausted(self, pool):
+        """Test acquiring from an exhausted pool times out."""
+        pool.acquire(timeout=1)
+        pool.acquire(timeout=1)
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.01)
+
+    def waiting_acquire(self, pool):
+        """Start a thread blocked in acquire, return the list its error lands in."""
+        errors = []
+
+        def acquire():
+            try:
+                pool.acquire()
+            except Exception as e:
+                errors.append(str(e))
+
+        thread = threading.Thread(target=acquire, daemon=True)
+        thread.start()
+        time.sleep(0.05)
+        assert thread.is_alive()
+        return thread, errors
+
+    def test_waiters_fail_once_no_browser_is_left(self, pool):
+        """Test threads waiting for a browser are woken when the last one cannot be replaced."""
+        drivers = [pool.acquire(timeout=1), pool.acquire(timeout=1)]
+        threads = [self.waiting_acquire(pool) for _ in range(2)]
+        with patch.object(driver_pool, 'launch_driver', side_effect=Exception("no memory")):
+            for driver in drivers:
+                driver.execute_cdp_cmd.side_effect = Exception("browser crashed")
+                pool.release(driver)
+
+        for thread, errors in threads:
+            thread.join(1)
+            assert errors == ["Driver pool has no browsers left"]
+
+    def test_close_wakes_waiters(self, pool):
+        """Test closing the pool ends the wait of threads blocked in acquire."""
+        pool.acquire(timeout=1)
+        pool.acquire(timeout=1)
+        thread, errors = self.waiting_acquire(pool)
+        pool.close()
+        thread.join(1)
+        assert errors == ["Driver pool is closed"]
+
+    def test_close_removes_profiles(self, pool):
+        """Test closing the pool quits browsers and deletes their profiles."""
+        profiles = list(pool._profiles.values())
+        pool.close()
+        assert all(not os.path.exists(profile) for profile in profiles)
+        assert all(driver.quit.called for driver in pool.launched)
+
+
+def test_lean_options():
+    """Test the lean profile disables images and leaves the default alone."""
+    lean = driver_pool.chrome_options("/tmp/profile", lean=True)
+    default = driver_pool.chrome_options("/tmp/profile")
+    assert '--blink-settings=imagesEnabled=false' in lean.arguments
+    assert lean.experimental_options['prefs'] == driver_pool.LEAN_PREFS
+    assert '--blink-settings=imagesEnabled=false' not in default.arguments
+    assert 'prefs' not in default.experimental_options
+
+
+def test_enable_lean_mode_blocks_heavy_resources():
+    """Test heavy resources and trackers are blocked over CDP."""
+    driver = MagicMock()
+    driver_pool.enable_lean_mode(driver)
+    driver.execute_cdp_cmd.assert_called_with(
+        'Network.setBlockedURLs', {'urls': driver_pool.LEAN_BLOCKED_URLS})
+    assert '*.woff2' in driver_pool.LEAN_BLOCKED_URLS
@@ -0,0 +1,164 @@
+"""
+Tests for the local ledger of applied issues.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from meroshare import client as client_module
+from meroshare.client import MeroshareClient
+from meroshare.ledger import Ledger, LedgerEntry, account_key
+from models.ipo import ApplyStatus, Issue
+from tests.conftest import make_api_client
+from tests.fake_meroshare import CRN, DP_ID, PASSWORD, TRANSACTION_PIN, USERNAME, make_issue
+
+ACCOUNT = account_key(DP_ID, USERNAME)
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = Ledger(str(tmp_path / "ledger.sqlite3"))
+    yield ledger
+    ledger.close()
+
+
+class TestLedger:
+    """Tests for storing applications."""
+
+    def test_record_and_lookup(self, ledger):
+        """Test recorded applications are found for their account only."""
+        ledger.record(ACCOUNT, LedgerEntry("ALPHA", "Alpha Hydropower Limited", kitta=10))
+        assert ledger.applied(ACCOUNT) == {"ALPHA"}
+        assert ledger.applied("13700:other") == set()
+        (entry,) = ledger.entries(ACCOUNT)
+        assert entry.kitta == 10 and entry.applied_at
+
+    def test_persists_across_connections(self, ledger):
+        """Test a new run sees what an earlier run recorded."""
+        ledger.record(ACCOUNT, LedgerEntry("ALPHA"))
+        again = Ledger(ledger.path)
+        assert again.applied(ACCOUNT) == {"ALPHA"}
+        again.close()
+
+    def test_bare_file_name(self, tmp_path, monkeypatch):
+        """Test a ledger path without a directory is created in the working directory."""
+        monkeypatch.chdir(tmp_path)
+        ledger = Ledger("ledger.sqlite3")
+        ledger.record(ACCOUNT, LedgerEntry("ALPHA", "Alpha Hydropower Limited"))
+        ledger.close()
+        assert (tmp_path / "ledger.sqlite3").exists()
+
+    def test_replace_keeps_known_details(self, ledger):
+        """Test reconciling drops stale entries but keeps kitta and time."""
+        ledger.record(ACCOUNT, LedgerEntry("ALPHA", kitta=10, applied_at=1000.0))
+        ledger.record(ACCOUNT, LedgerEntry("STALE"))
+        ledger.replace(ACCOUNT, [LedgerEntry("ALPHA", "Alpha"), LedgerEntry("BETA", "Beta")])
+
+        entries = {entry.issue: entry for entry in ledger.entries(ACCOUNT)}
+        assert set(entries) == {"ALPHA", "BETA"}
+        assert entries["ALPHA"].kitta == 10
+        assert entries["ALPHA"].applied_at == 1000.0
+        assert entries["ALPHA"].company_name == "Alpha"
+
+
+class TestAPIClientLedger:
+    """Tests for the HTTP backend consulting and updating the ledger."""
+
+    def test_submission_is_recorded(self, fake, ledger):
+        """Test every submitted application lands in the ledger."""
+        client = make_api_client(fake, ledger=ledger)
+        client.login()
+        client.applyAvailableIPOS()
+        client.close()
+
+        assert ledger.applied(ACCOUNT) == {"101", "105"}
+        assert {entry.kitta for entry in ledger.entries(ACCOUNT)} == {10}
+
+    def test_known_issues_skip_the_form(self, fake, ledger):
+        """Test issues in the ledger are skipped without any form request."""
+        ledger.record(ACCOUNT, LedgerEntry("101"))
+        client = make_api_client(fake, ledger=ledger)
+        client.login()
+        results = client.applyAvailableIPOS()
+        client.close()
+
+        assert [(result.issue.key, result.status) for result in results] == [
+            ("101", ApplyStatus.SKIPPED), ("103", ApplyStatus.SKIPPED),
+            ("105", ApplyStatus.APPLIED)]
+        assert [app['companyShareId'] for app in fake.applications] == ["105"]
+
+    def test_reconcile_mirrors_application_report(self, fake, ledger):
+        """Test --reconcile replaces the ledger with the site's report."""
+        ledger.record(ACCOUNT, LedgerEntry("STALE"))
+        client = make_api_client(fake, ledger=ledger)
+        client.login()
+        entries = client.reconcile()
+        client.close()
+
+        assert [entry.issue for entry in entries] == ["103"]
+        assert ledger.applied(ACCOUNT) == {"103"}
+        assert fake.requests.count(('POST', 'applicantForm/active/search/')) == 1
+
+
+class TestBrowserClientLedger:
+    """Tests for the browser backend consulting the ledger."""
+
+    def test_known_issue_is_never_clicked(self, ledger):
+        """Test a ledger hit skips the issue without touching the page."""
+        rows = [{'index': 0, 'companyName': "Gamma Microfinance Limited", 'scrip': "GAMMA",
+                 'shareType': "IPO", 'shareGroup': "Ordinary Shares", 'button': "Apply",
+                 'enabled': True}]
+        ledger.record(ACCOUNT, LedgerEntry("103"))
+        client = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN, ledger=ledger)
+        client.driver = MagicMock()
+        client.driver.execute_async_script.return_value = {
+            'status': 200, 'object': [make_issue(103, "Gamma Microfinance Limited")]}
+        client.issues = [Issue.from_row(row) for row in rows]
+        with patch.object(MeroshareClient, 'fillApplyForm') as fill:
+            (result,) = client.applyAvailableIPOS()
+
+        assert result.status is ApplyStatus.SKIPPED
+        assert result.message == "Already applied (ledger)"
+        fill.assert_not_called()
+        client.driver.execute_script.assert_not_called()
+
+    def test_applied_sibling_does_not_skip_the_other(self, ledger):
+        """Test an application to one issue of a scrip leaves its sibling open."""
+        row = {'companyName': "Gamma Microfinance Limited", 'scrip': "GAMMA", 'shareType': "IPO",
+               'shareGroup': "Ordinary Shares", 'button': "Apply", 'enabled': True}
+        rows = [dict(row, index=0, subGroup="For General Public"),
+                dict(row, index=1, subGroup="For Local People")]
+        local = dict(make_issue(106, "Gamma Microfinance Limited"), subGroup="For Local People")
+        ledger.record(ACCOUNT, LedgerEntry("103"))
+        client = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN, ledger=ledger)
+        client.driver = MagicMock()
+        client.driver.execute_script.return_value = True
+        client.driver.execute_async_script.return_value = {
+            'status': 200, 'object': [make_issue(103, "Gamma Microfinance Limited"), local]}
+        client.issues = [Issue.from_row(row) for row in rows]
+        with patch.object(MeroshareClient, 'fillApplyForm'):
+            results = client.applyAvailableIPOS()
+
+        assert [(result.issue.key, result.status) for result in results] == [
+            ("103", ApplyStatus.SKIPPED), ("106", ApplyStatus.APPLIED)]
+
+    def test_refused_pin_is_not_recorded(self, ledger):
+        """Test only a confirmed application lands in the ledger."""
+        client = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN, ledger=ledger)
+        client.driver = MagicMock()
+        client.driver.execute_async_script.side_effect = lambda script, *args: (
+            "Invalid transaction PIN" if script == client_module.CONFIRMATION_JS else None)
+        issue = Issue.from_api(make_issue(101, "Alpha Hydropower Limited"))
+        with patch.object(MeroshareClient, '_bank_account', return_value=None), \
+                patch.object(client_module, 'wait_for'):
+            with pytest.raises(Exception, match="Invalid transaction PIN"):
+                client.fillApplyForm(issue)
+        assert ledger.applied(ACCOUNT) == set()
+
+        client.driver.execute_async_script.side_effect = None
+        client.driver.execute_async_script.return_value = None
+        with patch.object(MeroshareClient, '_bank_account', return_value=None), \
+                patch.object(client_module, 'wait_for'):
+            client.fillApplyForm(issue)
+        assert ledger.applied(ACCOUNT) == {"101"}
@@ -0,0 +1,134 @@
+"""
+Tests for queued, context-tagged logging.
+"""
+
+import io
+import json
+import logging
+import logging.handlers
+import time
+
+import pytest
+
+from models.account import Account
+from runner import run_accounts
+from utils.logs import current_context, log_context, setup_logging
+from utils.profiling import traced
+
+logger = logging.getLogger("tests.logs")
+
+
+class SlowStream(io.StringIO):
+    """A terminal that takes a while to accept every write."""
+
+    def write(self, text):
+        time.sleep(0.05)
+        return super().write(text)
+
+
+@pytest.fixture
+def stream():
+    return io.StringIO()
+
+
+@pytest.fixture
+def json_logs(stream):
+    setup = setup_logging(fmt='json', stream=stream)
+    yield setup
+    setup.stop()
+
+
+def records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestContext:
+    """Tests for tagging records with account, issue and phase."""
+
+    def test_nested_context_is_restored(self):
+        with log_context(account="Mom"):
+            with log_context(issue="ALPHA", phase=None):
+                assert current_context() == {'account': "Mom", 'issue': "ALPHA", 'phase': None}
+            assert current_context()['issue'] is None
+        assert current_context() == {'account': None, 'issue': None, 'phase': None}
+
+    def test_json_records_carry_context(self, json_logs, stream):
+        @traced('login')
+        def login():
+            logger.info("Logged in as %s", "user")
+
+        with log_context(account="Mom", issue="ALPHA"):
+            login()
+        logger.warning("Done")
+        json_logs.stop()
+
+        first, second = records(stream)
+        assert first['message'] == "Logged in as user"
+        assert (first['account'], first['issue'], first['phase']) == ("Mom", "ALPHA", "login")
+        assert second['level'] == "WARNING" and 'account' not in second
+
+    def test_runner_tags_each_account(self, json_logs, stream):
+        """Test concurrent accounts never see each other's context."""
+        def job(account):
+            time.sleep(0.01)
+            logger.info(account.label)
+
+        accounts = [Account(f"user{i}", "pass", "13700", "CRN", name=f"acct{i}") for i in range(8)]
+        run_accounts(accounts, job, max_workers=4)
+        json_logs.stop()
+
+        tagged = [record for record in records(stream) if record['logger'] == "tests.logs"]
+        assert len(tagged) == 8
+        assert all(record['account'] == record['message'] for record in tagged)
+
+
+class TestOutput:
+    """Tests for where and how records are written."""
+
+    def test_text_prefix(self, stream):
+        setup = setup_logging(stream=stream)
+        with log_context(account="Mom", phase="apply"):
+            logger.info("Applied")
+        setup.stop()
+        assert "INFO - [Mom/apply] Applied" in stream.getvalue()
+
+    def test_exception_is_rendered(self, json_logs, stream):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Failed")
+        json_logs.stop()
+
+        (record,) = records(stream)
+        assert record['exception'].endswith("ValueError: boom")
+
+    def test_per_account_files(self, stream, tmp_path):
+        setup = setup_logging(stream=stream, log_dir=str(tmp_path))
+        with log_context(account="13700:Mom"):
+            logger.info("for mom")
+        logger.info("for the run")
+        setup.stop()
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["13700_Mom.log", "run.log"]
+        (record,) = [json.loads(line) for line in (tmp_path / "13700_Mom.log").read_text().splitlines()]
+        assert record['message'] == "for mom"
+
+    def test_slow_terminal_does_not_block_callers(self):
+        """Test logging returns before a slow terminal has written anything."""
+        stream = SlowStream()
+        setup = setup_logging(stream=stream)
+        start = time.perf_counter()
+        for i in range(10):
+            logger.info("line %d", i)
+        elapsed = time.perf_counter() - start
+        setup.stop()
+
+        assert elapsed < 0.25
+        assert stream.getvalue().count("line ") == 10
+
+    def test_stop_is_idempotent(self, stream):
+        setup = setup_logging(stream=stream)
+        setup.stop()
+        setup.stop()
+        assert not any(isinstance(handler, logging.handlers.QueueHandler)
+                       for handler in logging.getLogger().handlers)
@@ -0,0 +1,108 @@
+"""
+Tests for the metrics registry and its Prometheus endpoint.
+"""
+
+import json
+
+import pytest
+import requests
+
+from utils.logs import log_context
+from utils.metrics import (
+    APPLICATIONS, STEP_SECONDS, Registry, format_snapshot, registry, write_snapshot,
+)
+from tests.conftest import make_api_client
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def step_counts(step):
+    return {
+        (series['labels']['account'], series['labels']['backend'], series['labels']['outcome']):
+            series['count']
+        for series in STEP_SECONDS.series() if series['labels']['step'] == step
+    }
+
+
+class TestRegistry:
+    """Tests for counting and rendering."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics = Registry()
+        latency = metrics.histogram('latency_seconds', 'Latency', ('step',), buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.7, 3):
+            latency.observe(value, step="login")
+
+        (series,) = latency.series()
+        assert series['buckets'] == {'0.1': 1, '1': 3, '+Inf': 4}
+        assert series['count'] == 4 and series['sum'] == pytest.approx(4.25)
+
+    def test_prometheus_text(self):
+        metrics = Registry()
+        metrics.counter('applications_total', 'Applications', ('account', 'status')).inc(
+            account='Mom "A"', status="applied")
+        metrics.histogram('step_seconds', 'Steps', ('step',), buckets=(1,)).observe(0.5, step="login")
+
+        text = metrics.render()
+        assert '# TYPE applications_total counter' in text
+        assert 'applications_total{account="Mom \\"A\\"",status="applied"} 1' in text
+        assert 'step_seconds_bucket{step="login",le="1"} 1' in text
+        assert 'step_seconds_bucket{step="login",le="+Inf"} 1' in text
+        assert 'step_seconds_count{step="login"} 1' in text
+
+    def test_endpoint(self):
+        metrics = Registry()
+        metrics.counter('runs_total', 'Runs').inc()
+        server = metrics.serve(0, host='127.0.0.1')
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            response = requests.get(f"{base}/metrics")
+            assert response.status_code == 200
+            assert "runs_total 1" in response.text
+            assert requests.get(f"{base}/other").status_code == 404
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestClientMetrics:
+    """Tests for metrics recorded by the clients."""
+
+    def test_steps_and_applications_are_labelled(self, fake):
+        client = make_api_client(fake)
+        with log_context(account="Mom"):
+            client.login()
+            client.getAvailableIPOS()
+            results = client.applyAvailableIPOS()
+        client.close()
+
+        assert step_counts('login') == {("Mom", "http", "ok"): 1}
+        assert step_counts('fillApplyForm') == {("Mom", "http", "ok"): len(
+            [result for result in results if result.status.value == "applied"])}
+        statuses = {series['labels']['status']: series['value'] for series in APPLICATIONS.series()}
+        assert sum(statuses.values()) == len(results)
+
+    def test_failed_login_is_counted(self, fake):
+        client = make_api_client(fake, password="wrong")
+        with pytest.raises(Exception):
+            client.login()
+        assert step_counts('login') == {("", "http", "error"): 1}
+
+
+def test_snapshot_summary_and_file(tmp_path):
+    STEP_SECONDS.observe(2.0, step="login", account="Mom", backend="browser", outcome="ok")
+    STEP_SECONDS.observe(4.0, step="login", account="Dad", backend="browser", outcome="error")
+    APPLICATIONS.inc(account="Mom", backend="browser", status="applied")
+
+    summary = format_snapshot(registry.snapshot())
+    assert summary.splitlines()[2].split() == ["login", "1", "1", "3.000"]
+    assert summary.splitlines()[-1] == "Applications: 1 applied"
+
+    path = tmp_path / "metrics.json"
+    write_snapshot(str(path))
+    assert set(json.loads(path.read_text())) == {STEP_SECONDS.name, APPLICATIONS.name}
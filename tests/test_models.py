@@ -0,0 +1,75 @@
+"""
+Tests for the issue models.
+"""
+
+from models.ipo import ApplyState, Issue, select_issues
+
+
+class TestIssue:
+    """Tests for building issues from page rows and API entries."""
+
+    def test_from_row(self):
+        """Test a DOM row with an enabled Apply button is applicable."""
+        issue = Issue.from_row({
+            'index': 2, 'companyName': "Alpha Hydropower Limited", 'scrip': "ALPHA",
+            'shareType': "IPO", 'shareGroup': "Ordinary Shares", 'button': "Apply", 'enabled': True,
+        })
+        assert issue.is_ordinary_ipo
+        assert issue.can_apply
+        assert issue.issue_id == "ALPHA/Ordinary Shares"
+        assert issue.index == 2
+
+    def test_siblings_have_their_own_key(self):
+        """Test issues sharing a scrip are told apart by their companyShareId."""
+        row = {'companyName': "Alpha Hydropower Limited", 'scrip': "ALPHA",
+               'shareType': "IPO", 'shareGroup': "Ordinary Shares"}
+        public = Issue.from_row(dict(row, subGroup="For General Public", companyShareId="101"))
+        local = Issue.from_row(dict(row, subGroup="For Local People"))
+        assert public.key == "101"
+        assert local.key == "ALPHA/Ordinary Shares/For Local People"
+
+    def test_from_row_button_states(self):
+        """Test Edit and disabled Apply buttons mean already applied."""
+        base = {'companyName': "X", 'shareType': "IPO", 'shareGroup': "Ordinary Shares"}
+        assert Issue.from_row({**base, 'button': "Edit"}).apply_state is ApplyState.APPLIED
+        assert Issue.from_row({**base, 'button': "Apply", 'enabled': False}).apply_state is ApplyState.APPLIED
+        assert Issue.from_row({**base, 'button': None}).apply_state is ApplyState.UNAVAILABLE
+
+    def test_from_api(self):
+        """Test an API entry with an action is already applied."""
+        issue = Issue.from_api({
+            'companyShareId': 101, 'companyName': "Beta Bank Limited",
+            'shareTypeName': "IPO", 'shareGroupName': "Debentures", 'action': "edit",
+        })
+        assert issue.issue_id == "101"
+        assert not issue.is_ordinary_ipo
+        assert issue.apply_state is ApplyState.APPLIED
+
+    def test_slots(self):
+        """Test issues do not carry a per-instance __dict__."""
+        assert not hasattr(Issue(company_name="X", share_type="IPO", share_group="G"), '__dict__')
+
+
+class TestSelectIssues:
+    """Tests for choosing which issues to apply for."""
+
+    issues = [
+        Issue(company_name="Alpha Hydropower Limited", share_type="IPO",
+              share_group="Ordinary Shares", scrip="ALPHA"),
+        Issue(company_name="Beta Bank (Pvt) Limited", share_type="IPO",
+              share_group="Ordinary Shares", scrip="BETA"),
+        Issue(company_name="Gamma Debenture", share_type="IPO",
+              share_group="Debentures", scrip="GAMMA"),
+    ]
+
+    def test_select_all(self):
+        """Test no pattern selects every ordinary IPO."""
+        assert [issue.scrip for issue in select_issues(self.issues)] == ["ALPHA", "BETA"]
+
+    def test_select_by_regex(self):
+        """Test patterns match company name or scrip case-insensitively."""
+        assert [issue.scrip for issue in select_issues(self.issues, "hydro|^beta$")] == ["ALPHA", "BETA"]
+
+    def test_select_by_literal_name(self):
+        """Test names that are not valid regular expressions still match."""
+        assert [issue.scrip for issue in select_issues(self.issues, "Bank (Pvt")] == ["BETA"]
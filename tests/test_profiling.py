@@ -0,0 +1,68 @@
+"""
+Tests for span timing and trace export.
+"""
+
+import json
+
+import pytest
+
+from utils import profiling
+from utils.profiling import format_summary, span, summarize_traces, traced, tracer
+
+
+@pytest.fixture
+def enabled():
+    tracer.clear()
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+    tracer.clear()
+
+
+@traced('work')
+def work(fail=False):
+    if fail:
+        raise ValueError("boom")
+    return 42
+
+
+class TestTracer:
+    """Tests for recording spans."""
+
+    def test_disabled_records_nothing(self):
+        """Test spans are shared no-ops while the tracer is disabled."""
+        tracer.clear()
+        assert span('login') is profiling._NULL_SPAN
+        assert work() == 42
+        assert tracer.events == []
+
+    def test_records_nested_spans(self, enabled):
+        """Test decorated calls and sub-steps are both recorded."""
+        with span('login.page_load', url="x"):
+            work()
+        names = [event['name'] for event in enabled.events]
+        assert names == ['work', 'login.page_load']
+        assert enabled.events[1]['args'] == {'url': "x"}
+        assert enabled.events[1]['cat'] == 'login'
+
+    def test_marks_errors(self, enabled):
+        """Test a span that raised is tagged with the exception type."""
+        with pytest.raises(ValueError):
+            work(fail=True)
+        assert enabled.events[0]['args'] == {'error': 'ValueError'}
+
+    def test_export_chrome_trace(self, enabled, tmp_path):
+        """Test the exported file is in trace-event format with thread names."""
+        work()
+        path = enabled.export(str(tmp_path))
+        with open(path) as f:
+            trace = json.load(f)
+        phases = {event['ph'] for event in trace['traceEvents']}
+        assert phases == {'M', 'X'}
+        assert "work" in summarize_traces([path])
+
+
+def test_format_summary():
+    """Test p50 and p95 are reported per phase."""
+    summary = format_summary({'login': [1.0, 2.0, 3.0, 4.0, 10.0]})
+    assert summary.splitlines()[-1].split() == ['login', '5', '3.000', '10.000']
@@ -0,0 +1,296 @@
+"""
+Tests for retries, backoff, the circuit breaker and hedged reads.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from selenium.common.exceptions import TimeoutException
+
+from meroshare import client as client_module
+from meroshare import resilience
+from meroshare.client import MeroshareClient
+from meroshare.errors import CircuitOpen, ServerBusy
+from meroshare.resilience import (
+    Backoff, CircuitBreaker, RetryPolicy, hedge, is_retryable, is_safe_to_resend,
+)
+from models.ipo import ApplyStatus
+from utils.logs import current_context, log_context
+from tests.conftest import make_api_client
+from tests.fake_meroshare import CRN, DP_ID, PASSWORD, TRANSACTION_PIN, USERNAME
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def policy(**kwargs):
+    kwargs.setdefault('attempts', 4)
+    return RetryPolicy(sleep=lambda seconds: None, **kwargs)
+
+
+class TestClassification:
+    """Tests for telling transient errors from final ones."""
+
+    @pytest.mark.parametrize('error', [
+        requests.ConnectionError(), requests.ReadTimeout(), http_error(503), http_error(429),
+        TimeoutException(), ServerBusy(502), TimeoutError(),
+    ])
+    def test_retryable(self, error):
+        assert is_retryable(error)
+
+    @pytest.mark.parametrize('error', [
+        http_error(400), http_error(401), ValueError("Unknown DP ID"), Exception("No bank"),
+    ])
+    def test_final(self, error):
+        assert not is_retryable(error)
+
+    def test_only_unprocessed_requests_are_resent(self):
+        """Test a read timeout may hide a submission, a refusal does not."""
+        assert is_safe_to_resend(requests.ConnectTimeout())
+        assert is_safe_to_resend(http_error(503))
+        assert not is_safe_to_resend(requests.ReadTimeout())
+        assert not is_safe_to_resend(http_error(504))
+
+
+class TestRetryPolicy:
+    """Tests for retrying a step."""
+
+    def test_retries_until_success(self):
+        """Test transient failures are retried and on_retry runs before each retry."""
+        fn = MagicMock(side_effect=[http_error(503), requests.ConnectionError(), "ok"])
+        on_retry = MagicMock()
+        assert policy().run('listing', fn, on_retry=on_retry) == "ok"
+        assert fn.call_count == 3
+        assert on_retry.call_count == 2
+
+    def test_final_errors_are_not_retried(self):
+        fn = MagicMock(side_effect=http_error(400))
+        with pytest.raises(requests.HTTPError):
+            policy().run('apply', fn)
+        fn.assert_called_once()
+
+    def test_gives_up_after_attempts(self):
+        fn = MagicMock(side_effect=http_error(503))
+        with pytest.raises(requests.HTTPError):
+            policy(attempts=3).run('listing', fn)
+        assert fn.call_count == 3
+
+    def test_gives_up_at_deadline(self):
+        """Test no retry is made when its backoff would pass the step's deadline."""
+        fn = MagicMock(side_effect=http_error(503))
+        slow = policy(attempts=10, backoff=Backoff(base=5, cap=5), deadlines={'login': 1})
+        with patch('random.uniform', return_value=5):
+            with pytest.raises(requests.HTTPError):
+                slow.run('login', fn)
+        fn.assert_called_once()
+
+    def test_backoff_grows_and_is_capped(self):
+        backoff = Backoff(base=1, cap=6)
+        with patch('random.uniform', side_effect=lambda low, high: high):
+            assert [backoff.delay(attempt) for attempt in range(1, 5)] == [1, 2, 4, 6]
+
+
+class TestCircuitBreaker:
+    """Tests for pausing every account while the site is down."""
+
+    def test_opens_then_lets_one_trial_through(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        now = [100.0]
+        with patch('time.monotonic', side_effect=lambda: now[0]):
+            breaker.record_failure()
+            breaker.before_call()
+            breaker.record_failure()
+            with pytest.raises(CircuitOpen):
+                breaker.before_call()
+
+            now[0] += 11
+            breaker.before_call()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            with pytest.raises(CircuitOpen):
+                breaker.before_call()  # only one trial at a time
+
+            breaker.record_success()
+            assert breaker.state == CircuitBreaker.CLOSED
+            breaker.before_call()
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        now = [100.0]
+        with patch('time.monotonic', side_effect=lambda: now[0]):
+            breaker.record_failure()
+            now[0] += 11
+            breaker.before_call()
+            breaker.record_failure()
+            with pytest.raises(CircuitOpen):
+                breaker.before_call()
+
+    def test_shared_across_policies(self):
+        """Test failures of one account pause the others."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        first, second = policy(attempts=1, breaker=breaker), policy(attempts=1, breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                first.run('listing', MagicMock(side_effect=http_error(503)))
+        fn = MagicMock()
+        with pytest.raises(CircuitOpen):
+            second.run('listing', fn)
+        fn.assert_not_called()
+
+    def test_calls_during_a_trial_wait_for_it(self):
+        """Test accounts arriving while the trial runs go ahead once it succeeds."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        results = []
+
+        def listing():
+            time.sleep(0.2)
+            return "ok"
+
+        threads = [threading.Thread(target=lambda: results.append(
+            RetryPolicy(attempts=1, breaker=breaker).run('listing', listing))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert results == ["ok"] * 5
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_trial_sends_waiting_calls_back_to_the_pause(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        breaker._opened_at -= 11
+        breaker.before_call()
+        threading.Timer(0.05, breaker.record_failure).start()
+        with pytest.raises(CircuitOpen, match="pausing"):
+            breaker.before_call(timeout=5)
+
+
+def test_hedge_returns_the_faster_copy():
+    """Test a stalled read is overtaken by its second copy."""
+    release = threading.Event()
+    calls = []
+
+    def read():
+        calls.append(None)
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    started = time.monotonic()
+    assert hedge(read, 0.05) == "fast"
+    assert time.monotonic() - started < 1
+    release.set()
+
+
+def test_hedge_keeps_the_log_context():
+    """Test both copies log with the caller's account."""
+    seen = []
+
+    def read():
+        seen.append(current_context()['account'])
+        if len(seen) == 1:
+            time.sleep(0.2)
+        return "ok"
+
+    with log_context(account="Mom"):
+        assert hedge(read, 0.05) == "ok"
+    assert seen == ["Mom", "Mom"]
+
+
+class TestAPIClientRetries:
+    """Tests for the HTTP backend against injected failures."""
+
+    def test_busy_listing_is_retried(self, fake):
+        fake.fail('capital/', times=1)
+        fake.fail('companyShare/applicableIssue/', times=2, status=502)
+        client = make_api_client(fake, retry_policy=policy())
+        client.login()
+        assert [issue.scrip for issue in client.getAvailableIPOS()] == ["ALPHA", "GAMMA", "EPSILO"]
+        client.close()
+
+    def test_no_retries_by_default(self, fake):
+        fake.fail('capital/', times=1)
+        with pytest.raises(requests.HTTPError):
+            make_api_client(fake).login()
+
+    def test_refused_application_is_resent(self, fake):
+        fake.fail('applicantForm/share/apply', times=1, status=503)
+        client = make_api_client(fake, retry_policy=policy())
+        client.login()
+        results = client.applyAvailableIPOS()
+        client.close()
+
+        assert [result.status for result in results] == [
+            ApplyStatus.APPLIED, ApplyStatus.SKIPPED, ApplyStatus.APPLIED]
+        assert len(fake.applications) == 2
+
+    def test_lost_response_is_confirmed_not_resent(self, fake):
+        """Test an application whose response got lost is found in the listing."""
+        fake.fail('applicantForm/share/apply', times=1, status=504, after=True)
+        client = make_api_client(fake, retry_policy=policy())
+        client.login()
+        results = client.applyAvailableIPOS()
+        client.close()
+
+        assert results[0].status is ApplyStatus.APPLIED
+        assert [app['companyShareId'] for app in fake.applications] == ["101", "105"]
+
+    def test_hedged_reads(self, fake):
+        client = make_api_client(fake, hedge_after=0.5)
+        client.login()
+        assert len(client.getAvailableIPOS()) == 3
+        client.close()
+
+
+class TestBrowserClientRetries:
+    """Tests for the browser backend retrying page steps."""
+
+    def test_login_failure_keeps_the_browser(self):
+        """Test a failed login leaves closing to the caller."""
+        client = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN)
+        client.driver = driver = MagicMock()
+        with patch.object(client_module, 'wait_for', side_effect=TimeoutException()):
+            with pytest.raises(TimeoutException):
+                client.login()
+        assert client.driver is driver
+        driver.quit.assert_not_called()
+
+    def test_login_is_retried_from_a_fresh_page(self):
+        client = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN,
+                                 retry_policy=policy())
+        client.driver = driver = MagicMock()
+        waits = iter([TimeoutException()])
+
+        def wait_for(*args):
+            error = next(waits, None)
+            if error:
+                raise error
+            return MagicMock()
+
+        with patch.object(client_module, 'wait_for', side_effect=wait_for):
+            client.login()
+        assert driver.get.call_count == 2
+
+    def test_busy_in_page_search_falls_back(self):
+        """Test a search the site keeps refusing falls back to the DOM."""
+        client = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN,
+                                 retry_policy=policy(attempts=2))
+        client.driver = MagicMock()
+        client.driver.execute_async_script.return_value = {'status': 503, 'object': None}
+        assert client._search('companyShare/applicableIssue/', {}) is None
+        assert client.driver.execute_async_script.call_count == 2
+
+
+def test_no_retry_policy_makes_one_call():
+    fn = MagicMock(side_effect=http_error(503))
+    with pytest.raises(requests.HTTPError):
+        resilience.NO_RETRY.run('listing', fn)
+    fn.assert_called_once()
@@ -0,0 +1,132 @@
+"""
+Tests for checking allotment results of many accounts over HTTP.
+"""
+
+import csv
+import json
+import time
+
+import pytest
+
+from meroshare.ledger import Ledger, account_key
+from models.account import Account
+from models.ipo import Allotment
+from results import ResultChecker, ResultRow, format_report, parse_issue_list, write_report
+from tests.fake_meroshare import CRN, DP_ID, PASSWORD, USERNAME, FakeMeroshare
+
+
+def make_account(username):
+    return Account(username=username, password=PASSWORD, dp_id=DP_ID, crn=CRN, name=username)
+
+
+@pytest.fixture
+def fake():
+    users = {USERNAME} | {f"user{i}" for i in range(100)}
+    with FakeMeroshare(users=users) as server:
+        # GAMMA is already applied for in the default listing
+        server.allotments["103"] = ("Alloted", 10)
+        yield server
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = Ledger(str(tmp_path / "ledger.sqlite3"))
+    yield ledger
+    ledger.close()
+
+
+def detail_requests(fake):
+    return [path for _, path in fake.requests if path.startswith('applicantForm/report/detail/')]
+
+
+class TestResultChecker:
+    """Tests for reading allotment results."""
+
+    def test_reports_every_application(self, fake):
+        checker = ResultChecker([make_account(USERNAME)], base_url=fake.url)
+        (row,) = checker.run()
+        assert row.account == USERNAME
+        assert row.allotment == Allotment("103", "Gamma Microfinance Limited", "Alloted", 10, 10)
+        assert row.allotment.final and not row.cached and row.error is None
+
+    def test_final_results_are_cached(self, fake, ledger):
+        """Test a final outcome is read from the ledger on the next run."""
+        accounts = [make_account(USERNAME)]
+        ResultChecker(accounts, base_url=fake.url, ledger=ledger).run()
+        (row,) = ResultChecker(accounts, base_url=fake.url, ledger=ledger).run()
+
+        assert row.cached
+        assert row.allotment.status == "Alloted"
+        assert len(detail_requests(fake)) == 1
+
+    def test_pending_results_are_fetched_again(self, fake, ledger):
+        fake.allotments.clear()
+        accounts = [make_account(USERNAME)]
+        ResultChecker(accounts, base_url=fake.url, ledger=ledger).run()
+        (row,) = ResultChecker(accounts, base_url=fake.url, ledger=ledger).run()
+
+        assert row.allotment.status == "Verified" and not row.cached
+        assert len(detail_requests(fake)) == 2
+        assert ledger.allotments(account_key(DP_ID, USERNAME)) == {}
+
+    def test_issue_filter(self, fake):
+        checker = ResultChecker([make_account(USERNAME)], issues=["alpha"], base_url=fake.url)
+        assert checker.run() == []
+
+    def test_failed_account_is_reported(self, fake):
+        """Test an account that cannot log in gets an error row and the others still run."""
+        bad = Account(username="nobody", password=PASSWORD, dp_id=DP_ID, crn=CRN, name="nobody")
+        rows = ResultChecker([bad, make_account(USERNAME)], base_url=fake.url).run()
+
+        assert [row.account for row in rows] == ["nobody", USERNAME]
+        assert rows[0].error and rows[0].allotment is None
+        assert rows[1].allotment.status == "Alloted"
+
+    def test_many_accounts_share_a_bounded_pool(self, fake):
+        """Test a hundred accounts finish quickly with requests in parallel."""
+        fake.latency = 0.01
+        accounts = [make_account(f"user{i}") for i in range(100)]
+        start = time.perf_counter()
+        rows = ResultChecker(accounts, base_url=fake.url, max_workers=32).run()
+
+        # 4 requests per account, sequentially that would take 4 seconds
+        assert time.perf_counter() - start < 2.5
+        assert len(rows) == 100
+        assert all(row.allotment.status == "Alloted" for row in rows)
+
+
+class TestReport:
+    """Tests for writing the report."""
+
+    rows = [
+        ResultRow("mom", Allotment("ALPHA", "Alpha Hydropower Limited", "Not Alloted", None, 10)),
+        ResultRow("dad", error="Invalid credentials"),
+    ]
+
+    def test_csv(self, tmp_path):
+        path = tmp_path / "results.csv"
+        write_report(self.rows, str(path))
+        with open(path, newline='') as f:
+            records = list(csv.DictReader(f))
+        assert records[0]['status'] == "Not Alloted"
+        assert records[1]['error'] == "Invalid credentials"
+
+    def test_json(self, tmp_path):
+        path = tmp_path / "results.json"
+        write_report(self.rows, str(path))
+        records = json.loads(path.read_text())
+        assert records[0]['issue'] == "ALPHA" and records[0]['alloted_kitta'] is None
+        assert format_report(self.rows, 'json') == path.read_text()
+
+
+class TestIssueList:
+    """Tests for reading the issues to check."""
+
+    def test_comma_separated(self):
+        assert parse_issue_list("ALPHA, Gamma Microfinance Limited,") == [
+            "ALPHA", "Gamma Microfinance Limited"]
+
+    def test_csv_file(self, tmp_path):
+        path = tmp_path / "issues.csv"
+        path.write_text("scrip,name\nALPHA,\n,Gamma Microfinance Limited\n")
+        assert parse_issue_list(str(path)) == ["ALPHA", "Gamma Microfinance Limited"]
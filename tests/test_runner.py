@@ -0,0 +1,85 @@
+"""
+Tests for loading accounts and running them on the worker pool.
+"""
+
+import threading
+import time
+
+import pytest
+
+from models.account import Account
+from runner import format_results, run_accounts
+from utils.accounts import load_accounts
+
+
+def make_account(username):
+    return Account(username=username, password="pass", dp_id="13700", crn="CRN")
+
+
+class TestLoadAccounts:
+    """Tests for reading accounts files."""
+
+    def test_load_csv(self, tmp_path):
+        """Test accounts are read from a CSV file with a header row."""
+        path = tmp_path / "accounts.csv"
+        path.write_text(
+            "name,username,password,dp_id,crn,transaction_pin\n"
+            "Mom,mom,secret,13700,CRN1,1111\n"
+            ",dad,secret,13700,CRN2,\n"
+        )
+        accounts = load_accounts(str(path))
+        assert [account.label for account in accounts] == ["Mom", "13700/dad"]
+        assert accounts[1].transaction_pin is None
+
+    def test_load_yaml(self, tmp_path):
+        """Test accounts are read from an ``accounts`` list in YAML."""
+        path = tmp_path / "accounts.yaml"
+        path.write_text(
+            "accounts:\n"
+            "  - username: mom\n"
+            "    password: secret\n"
+            "    dp_id: 13700\n"
+            "    crn: CRN1\n"
+        )
+        accounts = load_accounts(str(path))
+        assert accounts == [Account(username="mom", password="secret", dp_id="13700", crn="CRN1")]
+
+    def test_missing_field(self, tmp_path):
+        """Test an account without a required field is rejected."""
+        path = tmp_path / "accounts.csv"
+        path.write_text("username,password,dp_id\nmom,secret,13700\n")
+        with pytest.raises(ValueError, match="crn"):
+            load_accounts(str(path))
+
+
+class TestRunAccounts:
+    """Tests for the bounded account runner."""
+
+    def test_failures_are_isolated(self):
+        """Test one failing account does not affect the others."""
+        def job(account):
+            if account.username == "bad":
+                raise RuntimeError("login failed")
+            return "ok"
+
+        results = run_accounts([make_account("a"), make_account("bad"), make_account("b")], job)
+        assert [result.ok for result in results] == [True, False, True]
+        assert results[1].detail == "login failed"
+        assert "2/3 account(s) succeeded" in format_results(results)
+
+    def test_max_workers_bounds_concurrency(self):
+        """Test no more than max_workers jobs run at once."""
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def job(account):
+            with lock:
+                running.append(account)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(account)
+
+        run_accounts([make_account(str(i)) for i in range(8)], job, max_workers=3)
+        assert max(peak) == 3
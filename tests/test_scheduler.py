@@ -0,0 +1,182 @@
+"""
+Tests for the issue calendar and the pre-warm scheduler.
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from meroshare.api import MeroshareAPIClient
+from meroshare.client import MeroshareClient
+from models.account import Account
+from models.ipo import NEPAL_TZ, Issue, parse_issue_date
+from scheduler import PrewarmScheduler, wait_until
+from tests.fake_browser import FakeBrowser
+from tests.fake_meroshare import (
+    CRN, DP_ID, PASSWORD, TRANSACTION_PIN, USERNAME, FakeMeroshare, make_issue,
+)
+from utils.issue_calendar import Opening, group_openings, load_calendar, openings_from_issues
+
+
+class TestCalendar:
+    """Tests for reading upcoming openings."""
+
+    def test_parse_issue_date_is_nepal_time(self):
+        """Test API dates are read as Nepal time."""
+        moment = parse_issue_date("Jan 1, 2026 10:00:00 AM")
+        assert moment == datetime(2026, 1, 1, 4, 15, tzinfo=timezone.utc)
+        assert parse_issue_date("soon") is None
+
+    def test_load_csv_calendar(self, tmp_path):
+        """Test CSV entries are parsed and sorted by opening time."""
+        path = tmp_path / "calendar.csv"
+        path.write_text(
+            "name,opens_at\n"
+            "Beta Hydro,2026-02-01T10:00:00\n"
+            "ALPHA,2026-01-15T10:00:00+05:45\n"
+        )
+        openings = load_calendar(str(path))
+        assert [opening.pattern for opening in openings] == ["ALPHA", "Beta Hydro"]
+        assert openings[1].opens_at.utcoffset() == timedelta(hours=5, minutes=45)
+
+    def test_load_yaml_calendar(self, tmp_path):
+        """Test YAML entries may be nested under an issues key."""
+        pytest.importorskip("yaml")
+        path = tmp_path / "calendar.yaml"
+        path.write_text("issues:\n  - name: ALPHA\n    opens_at: '2026-01-15 10:00'\n")
+        (opening,) = load_calendar(str(path))
+        assert opening.opens_at == datetime(2026, 1, 15, 10, 0, tzinfo=NEPAL_TZ)
+
+    def test_calendar_entry_needs_time(self, tmp_path):
+        """Test an entry without opens_at is rejected."""
+        path = tmp_path / "calendar.csv"
+        path.write_text("name,opens_at\nALPHA,\n")
+        with pytest.raises(ValueError, match="#1"):
+            load_calendar(str(path))
+
+    def test_openings_from_listing(self):
+        """Test only future ordinary IPO openings are taken from the listing."""
+        now = datetime(2026, 1, 1, 9, 0, tzinfo=NEPAL_TZ)
+        issues = [
+            Issue.from_api(make_issue(101, "Alpha Hydro") | {'issueOpenDate': "Jan 2, 2026 10:00:00 AM"}),
+            Issue.from_api(make_issue(102, "Beta Bank") | {'issueOpenDate': "Dec 30, 2025 10:00:00 AM"}),
+            Issue.from_api(make_issue(103, "Gamma Debenture", share_group="Debentures")
+                           | {'issueOpenDate': "Jan 2, 2026 10:00:00 AM"}),
+        ]
+        (opening,) = openings_from_issues(issues, now)
+        assert opening.pattern == "ALPHA"
+
+    def test_group_openings_merges_same_time(self):
+        """Test issues opening together are applied for in one go."""
+        moment = datetime(2026, 1, 2, 10, 0, tzinfo=NEPAL_TZ)
+        (opening,) = group_openings([Opening(moment, "ALPHA"), Opening(moment, "Beta (Hydro")])
+        assert opening.pattern == r"(?:ALPHA)|(?:Beta\ \(Hydro)"
+
+
+@pytest.fixture
+def fake():
+    with FakeMeroshare(issues=[make_issue(103, "Gamma Microfinance Limited", action="edit")]) as server:
+        yield server
+
+
+def make_client(fake):
+    return lambda account: MeroshareAPIClient(base_url=fake.url, **account.credentials())
+
+
+ACCOUNT = Account(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN)
+
+
+class TestPrewarmScheduler:
+    """Tests for logging in early and applying at the opening."""
+
+    def test_wait_until_can_be_cancelled(self):
+        """Test a set stop event ends the wait early."""
+        stop = threading.Event()
+        stop.set()
+        assert wait_until(datetime.now(timezone.utc) + timedelta(hours=1), stop) is False
+
+    def test_logs_in_before_and_applies_at_opening(self, fake):
+        """Test login happens in the lead time and the application right after opening."""
+        opens_at = datetime.now(timezone.utc) + timedelta(seconds=0.3)
+        requests_at_open = []
+
+        def open_issue():
+            requests_at_open.extend(fake.requests)
+            fake.issues.append(make_issue(106, "Zeta Hydro Limited"))
+
+        timer = threading.Timer(0.3, open_issue)
+        timer.start()
+        try:
+            (result,) = PrewarmScheduler(
+                [ACCOUNT], make_client(fake), Opening(opens_at, "ZETA"),
+                lead=0.2, poll_interval=0.01).run()
+        finally:
+            timer.cancel()
+
+        assert result.ok, result.detail
+        assert "after open" in result.detail
+        assert ('POST', 'auth/') in requests_at_open
+        assert ('POST', 'applicantForm/share/apply') not in requests_at_open
+        assert [app['companyShareId'] for app in fake.applications] == ["106"]
+
+    def test_every_account_applies(self, fake):
+        """Test all accounts are warmed up and fired together."""
+        opens_at = datetime.now(timezone.utc) + timedelta(seconds=0.1)
+        fake.issues.append(make_issue(106, "Zeta Hydro Limited"))
+        accounts = [ACCOUNT, Account(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN, name="second")]
+
+        results = PrewarmScheduler(accounts, make_client(fake), Opening(opens_at, "ZETA"), lead=1).run()
+
+        assert [result.ok for result in results] == [True, True]
+        # The fake marks the issue applied after the first account, as the account is shared
+        assert len(fake.applications) >= 1
+
+    def test_missing_issue_is_reported(self, fake):
+        """Test an issue that never shows up fails the account, with nothing applied."""
+        opens_at = datetime.now(timezone.utc)
+        (result,) = PrewarmScheduler(
+            [ACCOUNT], make_client(fake), Opening(opens_at, "ZETA"),
+            lead=0, grace=0.05, poll_interval=0.01).run()
+        assert not result.ok
+        assert "No issue matching 'ZETA' opened" in result.detail
+        assert fake.applications == []
+
+    def run_browser(self, browser):
+        """Open Zeta on ``browser`` at an opening 0.3s away and run the schedule."""
+        opens_at = datetime.now(timezone.utc) + timedelta(seconds=0.3)
+
+        def make_browser_client(account):
+            client = MeroshareClient(**account.credentials())
+            client.driver = browser
+            return client
+
+        timer = threading.Timer(
+            0.3, lambda: browser.issues.append(make_issue(106, "Zeta Hydro Limited")))
+        timer.start()
+        try:
+            (result,) = PrewarmScheduler(
+                [ACCOUNT], make_browser_client, Opening(opens_at, "ZETA"),
+                lead=0.2, poll_interval=0.01).run()
+        finally:
+            timer.cancel()
+        return result
+
+    def test_browser_applies_from_listing_after_opening(self):
+        """Test the browser backend applies from a listing loaded after the issue opened."""
+        browser = FakeBrowser([make_issue(103, "Gamma Microfinance Limited", action="edit")])
+        result = self.run_browser(browser)
+
+        assert result.ok, result.detail
+        assert browser.applications == ["106"]
+
+    def test_awaited_issue_missing_from_listing_fails(self):
+        """Test applying from a listing without the opened issue is not a success."""
+        browser = FakeBrowser([make_issue(103, "Gamma Microfinance Limited", action="edit")])
+        # A page that keeps showing the listing from before the opening
+        browser.refresh = lambda: None
+        result = self.run_browser(browser)
+
+        assert not result.ok
+        assert "Not in the listing applied from: Zeta Hydro Limited" in result.detail
+        assert browser.applications == []
@@ -0,0 +1,96 @@
+"""
+Tests for the encrypted session cache and session reuse on login.
+"""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from meroshare import client as client_module
+from meroshare.client import MeroshareClient
+from meroshare.session_store import SessionStore, StoredSession
+from tests.conftest import make_api_client
+from tests.fake_meroshare import CRN, DP_ID, PASSWORD, TRANSACTION_PIN, USERNAME
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(directory=str(tmp_path / "sessions"))
+
+
+class TestSessionStore:
+    """Tests for storing sessions at rest."""
+
+    def test_round_trip(self, store):
+        """Test a saved session is loaded back with the same password."""
+        session = StoredSession(token="abc", cookies=[{'name': "c", 'value': "1"}],
+                                local_storage={'k': "v"})
+        store.save(DP_ID, USERNAME, PASSWORD, session)
+        assert store.load(DP_ID, USERNAME, PASSWORD) == session
+
+    def test_encrypted_at_rest(self, store):
+        """Test the token never appears in plain text on disk."""
+        store.save(DP_ID, USERNAME, PASSWORD, StoredSession(token="very-secret-token"))
+        (path,) = [os.path.join(store.directory, name) for name in os.listdir(store.directory)]
+        with open(path, 'rb') as f:
+            assert b"very-secret-token" not in f.read()
+        assert os.stat(path).st_mode & 0o077 == 0
+
+    def test_wrong_password_discards(self, store):
+        """Test a session cannot be read with a different password."""
+        store.save(DP_ID, USERNAME, PASSWORD, StoredSession(token="abc"))
+        assert store.load(DP_ID, USERNAME, "changed") is None
+        assert store.load(DP_ID, USERNAME, PASSWORD) is None
+
+    def test_expired_by_age(self, store):
+        """Test sessions older than max_age are ignored."""
+        store.save(DP_ID, USERNAME, PASSWORD, StoredSession(token="abc", saved_at=0))
+        assert store.load(DP_ID, USERNAME, PASSWORD) is None
+
+
+class TestSessionReuse:
+    """Tests for skipping login with a stored session."""
+
+    def auth_calls(self, fake):
+        return [request for request in fake.requests if request == ('POST', 'auth/')]
+
+    def test_second_run_skips_login(self, fake, store):
+        """Test back-to-back runs log in only once."""
+        for _ in range(2):
+            client = make_api_client(fake, session_store=store)
+            client.login()
+            client.navigate("asba")
+            client.getAvailableIPOS()
+            client.close()
+        assert len(self.auth_calls(fake)) == 1
+
+    def test_expired_session_falls_back_to_login(self, fake, store):
+        """Test an expired token triggers a full login."""
+        client = make_api_client(fake, session_store=store)
+        client.login()
+        client.close()
+
+        fake.expire_sessions()
+        client = make_api_client(fake, session_store=store)
+        client.login()
+        assert len(self.auth_calls(fake)) == 2
+        assert client.token in fake.tokens
+
+    def test_http_session_restores_in_the_browser(self, fake, store):
+        """Test a token-only session of the http backend is written into the page."""
+        client = make_api_client(fake, session_store=store)
+        client.login()
+        token = client.token
+        client.close()
+
+        browser = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN,
+                                  session_store=store, base_url=fake.url, api_url=f"{fake.url}/api/")
+        browser.driver = MagicMock()
+        browser.driver.execute_async_script.return_value = 200
+        with patch.object(client_module, 'wait_for'):
+            assert browser._restore_session()
+
+        (write,) = [call for call in browser.driver.execute_script.call_args_list
+                    if call.args[0] == client_module.WRITE_STORAGE_JS]
+        assert write.args[1:] == ({client_module.TOKEN_KEY: token}, {})
@@ -0,0 +1,35 @@
+"""
+Tests for keeping heavy backends out of CLI startup.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.startup import SCENARIOS, SRC, forbidden_imports, import_profile
+
+
+@pytest.mark.parametrize('scenario', sorted(SCENARIOS))
+def test_scenario_imports_no_forbidden_module(scenario):
+    statement, packages = SCENARIOS[scenario]
+    total, modules = import_profile(statement)
+    assert total > 0
+    assert forbidden_imports(modules, packages) == []
+
+
+def test_browser_backend_still_loads_selenium():
+    _, modules = import_profile("import main; main.load_backend('browser')")
+    assert forbidden_imports(modules, ('selenium',))
+
+
+def test_help_runs_without_backends():
+    completed = subprocess.run(
+        [sys.executable, '-c',
+         "import sys, runpy; sys.argv = ['main.py', '--help']\n"
+         "try:\n    runpy.run_path('main.py', run_name='__main__')\n"
+         "except SystemExit:\n    pass\n"
+         "print(sorted(m for m in sys.modules if m.startswith('selenium')))"],
+        cwd=SRC, capture_output=True, text=True, check=True)
+    assert "--backend" in completed.stdout
+    assert completed.stdout.strip().endswith("[]")
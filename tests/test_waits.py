@@ -0,0 +1,71 @@
+"""
+Tests for the in-page wait helpers.
+"""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from selenium.common.exceptions import JavascriptException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from meroshare.waits import poll_until, wait_for
+
+
+class TestWaitFor:
+    """Tests for waiting on elements through the page."""
+
+    def test_translates_locators(self):
+        """Test Selenium locators are passed to the page as CSS or XPath."""
+        driver = MagicMock()
+        wait_for(driver, (By.ID, "selectBank"), 15, 'clickable')
+        wait_for(driver, (By.XPATH, "//a[@href='#/asba']"), 10)
+
+        first, second = driver.execute_async_script.call_args_list
+        assert first.args[1:] == ('css', '[id="selectBank"]', 'clickable', 15000)
+        assert second.args[1:] == ('xpath', "//a[@href='#/asba']", 'present', 10000)
+
+    def test_timeout(self):
+        """Test a page-side timeout surfaces as TimeoutException."""
+        driver = MagicMock()
+        driver.execute_async_script.return_value = None
+        with pytest.raises(TimeoutException):
+            wait_for(driver, (By.NAME, "username"), 1)
+
+    def test_falls_back_to_polling(self):
+        """Test elements are still found when the async script cannot run."""
+        element = MagicMock()
+        driver = MagicMock()
+        driver.execute_async_script.side_effect = JavascriptException("document unloaded")
+        driver.find_elements.side_effect = [[], [], [element]]
+        assert wait_for(driver, (By.NAME, "username"), 1) is element
+
+    def test_fallback_only_polls_for_the_time_left(self):
+        """Test a failed async wait does not start a new full timeout."""
+        def unloaded(*args):
+            time.sleep(0.3)
+            raise JavascriptException("document unloaded")
+
+        driver = MagicMock()
+        driver.execute_async_script.side_effect = unloaded
+        driver.find_elements.return_value = []
+        start = time.monotonic()
+        with pytest.raises(TimeoutException):
+            wait_for(driver, (By.NAME, "username"), 0.4)
+        assert time.monotonic() - start < 0.6
+
+
+class TestPollUntil:
+    """Tests for adaptive polling."""
+
+    def test_returns_quickly(self):
+        """Test a condition that becomes true is noticed within a few ms."""
+        ready_at = time.monotonic() + 0.05
+        start = time.monotonic()
+        assert poll_until(lambda: time.monotonic() >= ready_at, timeout=1) is True
+        assert time.monotonic() - start < 0.2
+
+    def test_times_out(self):
+        """Test polling gives up after the timeout."""
+        with pytest.raises(TimeoutException, match="never"):
+            poll_until(lambda: False, timeout=0.05, message="never")
@@ -0,0 +1,158 @@
+"""
+Tests for the --watch polling loop against the local stand-in server.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from meroshare.client import MeroshareClient
+from meroshare.errors import SessionExpired
+from models.ipo import ApplyState, ApplyStatus, Issue, listing_fingerprint
+from tests.conftest import make_api_client
+from tests.fake_browser import FakeBrowser
+from tests.fake_meroshare import (
+    CRN, DP_ID, PASSWORD, TRANSACTION_PIN, USERNAME, FakeMeroshare, make_issue,
+)
+from watcher import Watcher
+
+
+@pytest.fixture
+def fake():
+    with FakeMeroshare(issues=[make_issue(103, "Gamma Microfinance Limited", action="edit")]) as server:
+        yield server
+
+
+@pytest.fixture
+def client(fake):
+    client = make_api_client(fake)
+    client.login()
+    yield client
+    client.close()
+
+
+def polls(fake):
+    return [request for request in fake.requests if request[1] == 'companyShare/applicableIssue/']
+
+
+class TestWatcher:
+    """Tests for change detection and the apply trigger."""
+
+    def test_unchanged_listing_costs_one_request(self, fake, client):
+        """Test a quiet poll makes a single listing request and applies nothing."""
+        watcher = Watcher(client)
+        watcher.check()
+        before = len(fake.requests)
+
+        assert watcher.check() is False
+        assert len(fake.requests) == before + 1
+        assert fake.applications == []
+
+    def test_applies_only_when_new_issue_appears(self, fake, client):
+        """Test the apply path runs once, for the newly listed issue."""
+        watcher = Watcher(client)
+        watcher.check()
+        assert fake.applications == []
+
+        fake.issues.append(make_issue(106, "Zeta Hydro Limited"))
+        assert watcher.check() is True
+        assert [app['companyShareId'] for app in fake.applications] == ["106"]
+
+        # The applied state changes the listing but nothing new is eligible
+        watcher.check()
+        watcher.check()
+        assert len(fake.applications) == 1
+
+    def test_issue_without_a_result_is_tried_again(self, fake, client):
+        """Test a new issue the apply path did not reach is not taken as handled."""
+        watcher = Watcher(client)
+        watcher.check()
+        fake.issues.append(make_issue(106, "Zeta Hydro Limited"))
+        with patch.object(client, 'applyAvailableIPOS', return_value=[]):
+            watcher.check()
+        assert fake.applications == []
+
+        watcher.check()
+        assert [app['companyShareId'] for app in fake.applications] == ["106"]
+
+    def test_browser_applies_for_new_issue(self):
+        """Test the browser backend reads the new issue from a listing loaded again."""
+        browser = FakeBrowser([make_issue(103, "Gamma Microfinance Limited", action="edit")])
+        client = MeroshareClient(USERNAME, PASSWORD, DP_ID, CRN, TRANSACTION_PIN)
+        client.driver = browser
+        client.login()
+        client.navigate("asba")
+        watcher = Watcher(client)
+        watcher.check()
+
+        browser.issues.append(make_issue(106, "Zeta Hydro Limited"))
+        assert watcher.check() is True
+        assert browser.applications == ["106"]
+        assert [(result.issue.key, result.status) for result in watcher.results] == [
+            ("103", ApplyStatus.SKIPPED), ("106", ApplyStatus.APPLIED)]
+
+    def test_watch_without_apply_only_logs(self, fake, client):
+        """Test apply=False detects the issue without submitting anything."""
+        watcher = Watcher(client, apply=False)
+        watcher.check()
+        fake.issues.append(make_issue(106, "Zeta Hydro Limited"))
+
+        assert watcher.check() is True
+        assert fake.applications == []
+
+    def test_pattern_ignores_other_issues(self, fake, client):
+        """Test issues not matching the pattern never trigger an application."""
+        watcher = Watcher(client, pattern="zeta")
+        watcher.check()
+        fake.issues.append(make_issue(107, "Eta Bank Limited"))
+        watcher.check()
+        assert fake.applications == []
+
+        fake.issues.append(make_issue(106, "Zeta Hydro Limited"))
+        watcher.check()
+        assert [app['companyShareId'] for app in fake.applications] == ["106"]
+
+    def test_logs_in_again_when_session_expires(self, fake, client):
+        """Test an expired token is replaced and the poll still succeeds."""
+        watcher = Watcher(client)
+        watcher.check()
+        old_token = client.token
+
+        fake.expire_sessions()
+        watcher.check()
+        assert client.token != old_token
+        assert client.token in fake.tokens
+
+    def test_poll_raises_session_expired(self, fake, client):
+        """Test a rejected token surfaces as SessionExpired."""
+        fake.expire_sessions()
+        with pytest.raises(SessionExpired):
+            client.poll_issues()
+        assert client.token is None
+
+    def test_run_stops_after_max_polls(self, fake):
+        """Test run() logs in, polls the given number of times and closes."""
+        client = make_api_client(fake)
+        summary = Watcher(client, interval=0, max_polls=3).run()
+
+        assert len(polls(fake)) == 3
+        assert summary.startswith("3 poll(s), 1 change(s)")
+        assert client.session is None
+
+
+class TestListingFingerprint:
+    """Tests for the listing hash."""
+
+    def test_order_does_not_matter(self):
+        """Test the same issues in another order hash the same."""
+        issues = [
+            Issue("A", "IPO", "Ordinary Shares", scrip="A", apply_state=ApplyState.AVAILABLE),
+            Issue("B", "IPO", "Ordinary Shares", scrip="B"),
+        ]
+        assert listing_fingerprint(issues) == listing_fingerprint(issues[::-1])
+
+    def test_state_change_changes_hash(self):
+        """Test applying for an issue changes the hash."""
+        available = Issue("A", "IPO", "Ordinary Shares", scrip="A", apply_state=ApplyState.AVAILABLE)
+        applied = Issue("A", "IPO", "Ordinary Shares", scrip="A", apply_state=ApplyState.APPLIED)
+        assert listing_fingerprint([available]) != listing_fingerprint([applied])
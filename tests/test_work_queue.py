@@ -0,0 +1,228 @@
+"""
+Tests for sharing accounts between workers through a job queue.
+"""
+
+import threading
+import time
+
+import pytest
+
+from models.account import Account
+from work_queue import (
+    DONE, LEASED, Job, SQLiteQueue, Worker, job_results, open_queue, publish, wait,
+)
+
+ACTION = {'apply_all': True}
+
+
+def make_accounts(count):
+    return [Account(f"user{i}", "pass", "13700", "CRN", name=f"acct{i}") for i in range(count)]
+
+
+class Clock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "queue.sqlite3")
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def queue(path, clock):
+    queue = SQLiteQueue(path, clock=clock)
+    yield queue
+    queue.close()
+
+
+class TestSQLiteQueue:
+    """Tests for leasing jobs from the SQLite store."""
+
+    def test_jobs_are_leased_in_order(self, queue):
+        batch = publish(queue, make_accounts(3), ACTION)
+        leased = [queue.lease("w1") for _ in range(3)]
+
+        assert [job.account for job in leased] == ["13700:user0", "13700:user1", "13700:user2"]
+        assert all(job.state == LEASED and job.attempts == 1 and job.action == ACTION
+                   for job in leased)
+        assert queue.lease("w1") is None
+        assert queue.open_jobs() == 3
+        assert [job.state for job in queue.jobs(batch)] == [LEASED] * 3
+
+    def test_each_job_is_leased_once(self, queue, path):
+        """Test workers on separate connections never get the same job."""
+        publish(queue, make_accounts(60), ACTION)
+        leased, lock = [], threading.Lock()
+
+        def drain(name):
+            other = SQLiteQueue(path)
+            while (job := other.lease(name)) is not None:
+                with lock:
+                    leased.append(job.id)
+            other.close()
+
+        threads = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(leased) == len(set(leased)) == 60
+
+    def test_expired_lease_is_run_again(self, queue, clock):
+        """Test a crashed worker's job goes to another worker, and its late result is dropped."""
+        batch = publish(queue, make_accounts(1), ACTION)
+        job = queue.lease("crashed", ttl=10)
+
+        clock.now += 5
+        assert queue.heartbeat(job.id, "crashed", ttl=10)
+        clock.now += 9
+        assert queue.lease("w2", ttl=10) is None
+
+        clock.now += 2
+        again = queue.lease("w2", ttl=10)
+        assert again.id == job.id and again.attempts == 2
+        assert not queue.heartbeat(job.id, "crashed")
+        assert not queue.complete(job.id, "crashed", True, "too late")
+
+        assert queue.complete(job.id, "w2", True, "1 applied", 3.5)
+        (done,) = queue.jobs(batch)
+        assert (done.state, done.ok, done.detail, done.worker) == (DONE, True, "1 applied", "w2")
+        assert queue.open_jobs() == 0
+
+    def test_gives_up_after_max_attempts(self, path, clock):
+        queue = SQLiteQueue(path, max_attempts=2, clock=clock)
+        batch = publish(queue, make_accounts(1), ACTION)
+        for _ in range(2):
+            assert queue.lease("w1", ttl=1)
+            clock.now += 2
+
+        assert queue.lease("w1") is None
+        (job,) = queue.jobs(batch)
+        assert job.state == DONE and job.ok is False and "2 expired" in job.detail
+        queue.close()
+
+    def test_wait_returns_results_in_order(self, queue):
+        accounts = make_accounts(2)
+        batch = publish(queue, accounts, ACTION)
+        for ok in (True, False):
+            job = queue.lease("w1")
+            queue.complete(job.id, "w1", ok, "done" if ok else "Invalid credentials", 1.0)
+
+        results = job_results(wait(queue, batch, poll_interval=0.01), accounts)
+        assert [(result.account, result.ok) for result in results] == [
+            ("acct0", True), ("acct1", False)]
+
+    def test_wait_timeout(self, queue):
+        batch = publish(queue, make_accounts(1), ACTION)
+        with pytest.raises(TimeoutError):
+            wait(queue, batch, poll_interval=0.01, timeout=0.05)
+
+
+class TestWorker:
+    """Tests for workers running leased jobs."""
+
+    def make_worker(self, path, accounts, run, name, **options):
+        options = {'concurrency': 2, 'idle_exit': 0.2, 'poll_interval': 0.02, **options}
+        return Worker(SQLiteQueue(path), accounts, run, name=name, **options)
+
+    def test_workers_share_a_batch(self, queue, path):
+        """Test two workers run every account once and write the results back."""
+        accounts = make_accounts(12)
+        batch = publish(queue, accounts, ACTION)
+        seen, lock = [], threading.Lock()
+
+        def run(account, action):
+            assert action == ACTION
+            time.sleep(0.02)
+            with lock:
+                seen.append(account.username)
+            return "1 applied"
+
+        workers = [self.make_worker(path, accounts, run, f"node{i}") for i in range(2)]
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for thread in threads:
+            thread.start()
+        jobs = wait(queue, batch, poll_interval=0.01)
+        for thread in threads:
+            thread.join()
+
+        assert sorted(seen) == sorted(account.username for account in accounts)
+        assert all(job.ok and job.detail == "1 applied" for job in jobs)
+        assert {job.worker for job in jobs} == {"node0", "node1"}
+
+    def test_failures_and_unknown_accounts_are_reported(self, queue, path):
+        accounts = make_accounts(2)
+        batch = publish(queue, accounts, ACTION)
+
+        def run(account, action):
+            raise Exception("Invalid credentials")
+
+        results = self.make_worker(path, accounts[:1], run, "node").run()
+        assert [result.ok for result in results] == [False, False]
+        jobs = queue.jobs(batch)
+        assert jobs[0].detail == "Invalid credentials"
+        assert jobs[1].detail == "Account is not configured on node"
+
+    def test_heartbeat_keeps_long_jobs(self, queue, path):
+        """Test a job outliving its lease time is not handed to another worker."""
+        accounts = make_accounts(1)
+        batch = publish(queue, accounts, ACTION)
+        runs = []
+
+        def run(account, action):
+            runs.append(account.username)
+            time.sleep(0.5)
+
+        workers = [self.make_worker(path, accounts, run, f"node{i}", lease_ttl=0.15)
+                   for i in range(2)]
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert runs == ["user0"]
+        assert queue.jobs(batch)[0].attempts == 1
+
+    def test_job_of_crashed_worker_is_recovered(self, path):
+        accounts = make_accounts(1)
+        queue = SQLiteQueue(path)
+        batch = publish(queue, accounts, ACTION)
+        queue.lease("crashed", ttl=0.1)
+
+        results = self.make_worker(path, accounts, lambda account, action: "ok", "node").run()
+        assert [result.ok for result in results] == [True]
+        (job,) = queue.jobs(batch)
+        assert job.worker == "node" and job.attempts == 2
+        queue.close()
+
+
+class TestOpenQueue:
+    """Tests for selecting a store by URL."""
+
+    def test_sqlite_url(self, tmp_path):
+        queue = open_queue(f"sqlite:///{tmp_path}/jobs.sqlite3")
+        assert isinstance(queue, SQLiteQueue) and queue.path == f"{tmp_path}/jobs.sqlite3"
+        queue.put([Job("b-0000", "b", "13700:user0", ACTION)])
+        assert queue.open_jobs() == 1
+        queue.close()
+
+    def test_redis_needs_the_package(self):
+        try:
+            import redis  # noqa: F401
+            pytest.skip("redis is installed")
+        except ImportError:
+            pass
+        with pytest.raises(ImportError, match="pip install redis"):
+            open_queue("redis://localhost:6379/0")